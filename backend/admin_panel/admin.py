@@ -2,7 +2,7 @@
 Admin interface for Admin Panel app
 """
 from django.contrib import admin
-from .models import SystemSettings
+from .models import SchedulerLease, SlowRequestLog, SystemSettings
 from django.contrib import messages
 
 # SimpleJWT token blacklist models
@@ -19,6 +19,27 @@ class SystemSettingsAdmin(admin.ModelAdmin):
     search_fields = ['key', 'description']
 
 
+@admin.register(SchedulerLease)
+class SchedulerLeaseAdmin(admin.ModelAdmin):
+    list_display = ['name', 'owner', 'expires_at', 'acquired_at']
+
+
+@admin.register(SlowRequestLog)
+class SlowRequestLogAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'method', 'path', 'view_name', 'action', 'status_code',
+                    'duration_ms', 'db_time_ms', 'query_count', 'max_repeated_query']
+    list_filter = ['method', 'status_code', 'view_name']
+    search_fields = ['path', 'view_name']
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 def blacklist_outstanding_tokens(modeladmin, request, queryset):
     """Admin action: blacklist selected OutstandingToken entries."""
     if OutstandingToken is None or BlacklistedToken is None:
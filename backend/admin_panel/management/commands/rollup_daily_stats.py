@@ -0,0 +1,42 @@
+"""
+Recompute the DailyStats rows behind the admin dashboard
+Run periodically (run_scheduler does this every SCHEDULER_STATS_ROLLUP_SECONDS)
+or once with --since to backfill history. Days before the range whose orders
+changed since the last run are re-rolled as well.
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from admin_panel.stats import rollup_changed_days, rollup_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute pre-aggregated daily dashboard statistics'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='Recompute the last N days including today (default: 7)'
+        )
+        parser.add_argument('--since', help='Recompute every day from this date (YYYY-MM-DD) until today')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['since']:
+            try:
+                start = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date (YYYY-MM-DD)')
+        else:
+            start = today - timedelta(days=max(options['days'], 1) - 1)
+
+        changed = rollup_changed_days(start)
+        count = rollup_daily_stats(start, today)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rolled up {count} day(s) from {start} to {today}, '
+            f'{changed} earlier day(s) with changed orders'
+        ))
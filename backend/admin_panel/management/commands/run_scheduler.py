@@ -0,0 +1,44 @@
+"""
+Long-running scheduler process (see admin_panel/scheduler.py)
+Replaces cron entries for send_event_notifications,
+cleanup_pending_registrations and cleanup_expired_tokens.
+"""
+import logging
+import signal
+
+from django.core.management.base import BaseCommand
+
+from admin_panel.scheduler import Lease, Scheduler
+
+
+class Command(BaseCommand):
+    help = 'Run event notifications and periodic cleanups in one long-lived process'
+
+    # Skip URL/system checks: they import the AI views (and TensorFlow),
+    # which the scheduler never needs
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-seconds', type=int, help='Max seconds between due-time refreshes (default: SCHEDULER_POLL_SECONDS)')
+        parser.add_argument('--lease-seconds', type=int, help='Leader lease length (default: SCHEDULER_LEASE_SECONDS)')
+        parser.add_argument('--owner', help='Lease owner name (default: hostname:pid)')
+
+    def handle(self, *args, **options):
+        if not logging.getLogger('admin_panel').handlers and not logging.getLogger().handlers:
+            logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+        scheduler = Scheduler(
+            lease=Lease(owner=options['owner'], ttl=options['lease_seconds']),
+            poll_seconds=options['poll_seconds'],
+        )
+
+        def shutdown(signum, frame):
+            self.stdout.write('Stopping scheduler...')
+            scheduler.stop()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        self.stdout.write(self.style.SUCCESS(f'Scheduler started as {scheduler.lease.owner}'))
+        scheduler.run_forever()
+        self.stdout.write(self.style.SUCCESS('Scheduler stopped'))
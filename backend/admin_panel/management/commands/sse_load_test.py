@@ -0,0 +1,140 @@
+"""
+Load test for the SSE push channel (/api/events/).
+
+Opens thousands of idle connections against the ASGI application in-process
+(no web server needed), publishes events to them and reports connect time,
+memory per connection and fan-out latency.
+"""
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from pawjeevan_backend.realtime import bus, user_topic
+
+
+class _Client:
+    """Minimal ASGI client that holds one SSE response open."""
+
+    def __init__(self, app, token):
+        self.app = app
+        self.token = token
+        self.status = None
+        self.events = 0
+        self.got_event = asyncio.Event()
+        self._disconnect = asyncio.Event()
+        self._sent_request = False
+
+    async def _receive(self):
+        if not self._sent_request:
+            self._sent_request = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self._disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def _send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+        elif message['type'] == 'http.response.body':
+            received = message.get('body', b'').count(b'event: notification')
+            if received:
+                self.events += received
+                self.got_event.set()
+
+    async def run(self):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': '/api/events/',
+            'raw_path': b'/api/events/',
+            'query_string': f'token={self.token}'.encode(),
+            'headers': [(b'host', b'localhost')],
+            'server': ('localhost', 80),
+            'client': ('127.0.0.1', 0),
+        }
+        await self.app(scope, self._receive, self._send)
+
+    def close(self):
+        self._disconnect.set()
+
+
+class Command(BaseCommand):
+    help = 'Open many idle SSE connections in-process and measure fan-out latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=2000, help='Idle connections to open (default: 2000)')
+        parser.add_argument('--events', type=int, default=5, help='Events to publish to every connection (default: 5)')
+        parser.add_argument('--connect-timeout', type=float, default=120, help='Seconds to wait for all clients to subscribe')
+        parser.add_argument('--trace-memory', action='store_true', help='Report memory per connection (slows the run down)')
+
+    def handle(self, *args, **options):
+        from users.models import User
+
+        user = User.objects.create_user(
+            username='sse_load_test_user', email='sse_load_test_user@example.invalid', password='load-test-123'
+        )
+        try:
+            asyncio.run(self._run(str(AccessToken.for_user(user)), user.id, options))
+        finally:
+            user.delete()
+
+    async def _run(self, token, user_id, options):
+        from pawjeevan_backend.asgi import application
+
+        n = max(options['connections'], 1)
+        topic = user_topic(user_id)
+        if options['trace_memory']:
+            tracemalloc.start()
+        base_mem = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        clients = [_Client(application, token) for _ in range(n)]
+        tasks = [asyncio.create_task(c.run()) for c in clients]
+        deadline = start + options['connect_timeout']
+        while len(bus._topics.get(topic, ())) < n:
+            if time.perf_counter() > deadline:
+                self.stderr.write(f'Only {len(bus._topics.get(topic, ()))}/{n} clients connected')
+                break
+            await asyncio.sleep(0.05)
+        connect_time = time.perf_counter() - start
+        connected = len(bus._topics.get(topic, ()))
+        self.stdout.write(f'connected {connected}/{n} in {connect_time:.2f}s')
+        if tracemalloc.is_tracing():
+            mem_per_conn = (tracemalloc.get_traced_memory()[0] - base_mem) / max(connected, 1)
+            self.stdout.write(f'memory: {mem_per_conn / 1024:.1f} KiB/connection')
+        if any(c.status not in (None, 200) for c in clients):
+            self.stderr.write(f'non-200 responses: {sum(1 for c in clients if c.status not in (None, 200))}')
+
+        latencies = []
+        for i in range(options['events']):
+            for c in clients:
+                c.got_event.clear()
+            t0 = time.perf_counter()
+            await sync_to_async(bus.publish)(topic, 'notification', {'id': i, 'title': 'load test'})
+            await asyncio.gather(*(c.got_event.wait() for c in clients if c.status == 200))
+            latencies.append(time.perf_counter() - t0)
+
+        if latencies:
+            latencies.sort()
+            self.stdout.write(
+                f'fan-out to {connected} clients: '
+                f'min {latencies[0] * 1000:.1f}ms  median {latencies[len(latencies) // 2] * 1000:.1f}ms  '
+                f'max {latencies[-1] * 1000:.1f}ms'
+            )
+
+        for c in clients:
+            c.close()
+        # Disconnect handling goes through Django's sync close/signal path,
+        # so give large runs time to drain
+        await asyncio.wait(tasks, timeout=30 + n * 0.05)
+        gc.collect()
+        await asyncio.sleep(0.5)
+        tracemalloc.stop()
+        self.stdout.write(self.style.SUCCESS(f'closed; bus now {bus.stats()}'))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0002_scheduler_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('new_users', models.PositiveIntegerField(default=0)),
+                ('new_products', models.PositiveIntegerField(default=0)),
+                ('new_orders', models.PositiveIntegerField(default=0)),
+                ('paid_orders', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('new_posts', models.PositiveIntegerField(default=0)),
+                ('new_comments', models.PositiveIntegerField(default=0)),
+                ('new_groups', models.PositiveIntegerField(default=0)),
+                ('total_users', models.PositiveIntegerField(blank=True, null=True)),
+                ('active_users', models.PositiveIntegerField(blank=True, null=True)),
+                ('total_products', models.PositiveIntegerField(blank=True, null=True)),
+                ('active_products', models.PositiveIntegerField(blank=True, null=True)),
+                ('total_orders', models.PositiveIntegerField(blank=True, null=True)),
+                ('pending_orders', models.PositiveIntegerField(blank=True, null=True)),
+                ('total_revenue', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('total_posts', models.PositiveIntegerField(blank=True, null=True)),
+                ('total_comments', models.PositiveIntegerField(blank=True, null=True)),
+                ('total_groups', models.PositiveIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'daily stats',
+                'ordering': ['date'],
+            },
+        ),
+    ]
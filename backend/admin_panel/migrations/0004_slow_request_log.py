@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0003_daily_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowRequestLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=500)),
+                ('view_name', models.CharField(blank=True, max_length=200)),
+                ('action', models.CharField(blank=True, max_length=100)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('user_id', models.IntegerField(blank=True, null=True)),
+                ('duration_ms', models.FloatField()),
+                ('db_time_ms', models.FloatField()),
+                ('query_count', models.PositiveIntegerField()),
+                ('max_repeated_query', models.PositiveIntegerField(default=0)),
+                ('slowest_queries', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -15,4 +15,118 @@ class SystemSettings(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return self.key
\ No newline at end of file
+        return self.key
+
+
+class SchedulerLease(models.Model):
+    """
+    Time-bound lock used to elect a single leader among scheduler processes
+    (see admin_panel/scheduler.py). The holder renews it before it expires;
+    anyone may take over an expired lease.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    owner = models.CharField(max_length=200)
+    expires_at = models.DateTimeField()
+
+    acquired_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} held by {self.owner} until {self.expires_at}"
+
+
+class DailyStats(models.Model):
+    """
+    One row per day of pre-aggregated dashboard numbers, maintained by
+    admin_panel/stats.py (rollup_daily_stats command / scheduler).
+
+    Flow fields count what was created that day. Snapshot fields are
+    site-wide totals as of the last rollup of that day; they are null for
+    days that were only backfilled later.
+    """
+    date = models.DateField(unique=True)
+
+    # Flows
+    new_users = models.PositiveIntegerField(default=0)
+    new_products = models.PositiveIntegerField(default=0)
+    new_orders = models.PositiveIntegerField(default=0)
+    paid_orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    new_posts = models.PositiveIntegerField(default=0)
+    new_comments = models.PositiveIntegerField(default=0)
+    new_groups = models.PositiveIntegerField(default=0)
+
+    # Snapshots
+    total_users = models.PositiveIntegerField(null=True, blank=True)
+    active_users = models.PositiveIntegerField(null=True, blank=True)
+    total_products = models.PositiveIntegerField(null=True, blank=True)
+    active_products = models.PositiveIntegerField(null=True, blank=True)
+    total_orders = models.PositiveIntegerField(null=True, blank=True)
+    pending_orders = models.PositiveIntegerField(null=True, blank=True)
+    total_revenue = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    total_posts = models.PositiveIntegerField(null=True, blank=True)
+    total_comments = models.PositiveIntegerField(null=True, blank=True)
+    total_groups = models.PositiveIntegerField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['date']
+        verbose_name_plural = 'daily stats'
+
+    def __str__(self):
+        return f"Stats for {self.date}"
+
+
+class SlowRequestLog(models.Model):
+    """
+    Sampled record of a slow or query-heavy request, written by
+    pawjeevan_backend.profiling.QueryProfilingMiddleware.
+    """
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    action = models.CharField(max_length=100, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    user_id = models.IntegerField(null=True, blank=True)
+
+    duration_ms = models.FloatField()
+    db_time_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    # Executions of the most repeated SQL statement; high values point at N+1 loops
+    max_repeated_query = models.PositiveIntegerField(default=0)
+    slowest_queries = models.JSONField(default=list, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} {self.duration_ms:.0f}ms ({self.query_count} queries)"
+
+
+class ReplicationHeartbeat(models.Model):
+    """
+    Single row the scheduler touches on the primary; comparing it with the
+    copy on a read replica gives the replica's lag
+    (pawjeevan_backend/db_router.py).
+    """
+    beat_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Heartbeat at {self.beat_at}"
+
+
+class RealtimeEvent(models.Model):
+    """
+    An event on its way to the SSE clients of every process, when the
+    realtime channel is the database (pawjeevan_backend/realtime.py). Rows are
+    deleted after REALTIME_EVENT_RETENTION seconds.
+    """
+    topic = models.CharField(max_length=100)
+    event_type = models.CharField(max_length=50)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.event_type} -> {self.topic}"
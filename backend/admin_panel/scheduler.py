@@ -0,0 +1,336 @@
+"""
+In-process scheduler that replaces the cron-driven maintenance commands.
+
+One long-lived process keeps a priority queue (heapq) of upcoming work:
+
+- the event notification dispatcher, queued for the next moment anything
+  becomes due (a ScheduledNotification.send_at, an event entering its
+  "starting soon" window or already in it with attendees not yet notified,
+  or an event ending), and
+- periodic jobs (pending registration, expired JWT and old slow request
+  log cleanups, the dashboard DailyStats rollup, the read replica
+  heartbeat), re-queued after each run with random jitter so several
+  deployments don't fire together.
+
+It sleeps until the head of the queue is due. Rows created by other
+processes can't wake it, so due times are re-read from the database at
+least every SCHEDULER_POLL_SECONDS.
+
+Only the holder of the "scheduler" SchedulerLease runs jobs; other
+instances stand by and take over once the lease expires. The leader renews
+it between jobs and, from a background thread, while a job runs, so a job
+longer than SCHEDULER_LEASE_SECONDS doesn't let a standby start a second
+copy of it. If a renewal fails anyway, no further job runs until the lease
+is won back.
+"""
+import heapq
+import itertools
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError, close_old_connections, connection
+from django.db.models import Min, Q
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "scheduler"
+
+# How far ahead of start_datetime "event starting" notifications go out;
+# must match the window used by community.notifications
+EVENT_STARTING_LEAD = timedelta(hours=1)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ---------------------------------------------------------------------------
+# Leader election
+# ---------------------------------------------------------------------------
+
+class Lease:
+    """A SchedulerLease row held by this process until it stops renewing it."""
+
+    def __init__(self, name=LEASE_NAME, owner=None, ttl=None):
+        self.name = name
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.ttl = timedelta(seconds=ttl or _setting("SCHEDULER_LEASE_SECONDS", 60))
+        self.held = False
+
+    def acquire(self):
+        """Take or renew the lease; returns whether this process is leader."""
+        from .models import SchedulerLease
+
+        now = timezone.now()
+        expires = now + self.ttl
+        # Conditional UPDATE is atomic, so only one contender can win an
+        # expired lease
+        updated = SchedulerLease.objects.filter(
+            Q(owner=self.owner) | Q(expires_at__lt=now), name=self.name
+        ).update(owner=self.owner, expires_at=expires)
+        if not updated:
+            try:
+                SchedulerLease.objects.create(name=self.name, owner=self.owner, expires_at=expires)
+                updated = 1
+            except IntegrityError:
+                # Someone else holds it
+                updated = 0
+
+        if bool(updated) != self.held:
+            logger.info("Scheduler %s %s leadership", self.owner, "acquired" if updated else "lost")
+        self.held = bool(updated)
+        return self.held
+
+    @contextmanager
+    def kept_alive(self):
+        """Keep renewing the lease from a background thread while the block runs"""
+        stop = threading.Event()
+
+        def renew():
+            try:
+                while not stop.wait(self.ttl.total_seconds() / 3):
+                    try:
+                        if not self.acquire():
+                            return
+                    except DatabaseError:
+                        logger.exception("Scheduler %s could not renew its lease", self.owner)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=renew, name=f"{self.name}-lease", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def release(self):
+        from .models import SchedulerLease
+
+        if self.held:
+            SchedulerLease.objects.filter(name=self.name, owner=self.owner).delete()
+            self.held = False
+
+
+# ---------------------------------------------------------------------------
+# Jobs
+# ---------------------------------------------------------------------------
+
+def next_notification_due(now):
+    """Earliest time the event notification dispatcher has something to do, or None"""
+    from community.models import Event
+    from community.notifications import has_unsent_starting
+    from users.models import ScheduledNotification
+
+    candidates = []
+    # A leased row (claimed, or failed and waiting to retry) isn't due before its lease ends
+    send_at = ScheduledNotification.objects.filter(processed=False).aggregate(
+        t=Min(Greatest("send_at", Coalesce("leased_until", "send_at")))
+    )["t"]
+    if send_at:
+        candidates.append(send_at)
+    start = Event.objects.filter(start_datetime__gt=now + EVENT_STARTING_LEAD).aggregate(t=Min("start_datetime"))["t"]
+    if start:
+        candidates.append(start - EVENT_STARTING_LEAD)
+    # Events created or moved inside the window never pass its start
+    if has_unsent_starting(now):
+        candidates.append(now)
+    end = Event.objects.filter(end_datetime__gt=now).aggregate(t=Min("end_datetime"))["t"]
+    if end:
+        candidates.append(end)
+    return min(candidates) if candidates else None
+
+
+def dispatch_notifications():
+    from community.notifications import dispatch_event_notifications
+
+    result = dispatch_event_notifications()
+    if any(result.values()):
+        logger.info("Event notifications: %s", result)
+
+
+def _command(name, **options):
+    def run():
+        out = StringIO()
+        call_command(name, stdout=out, **options)
+        logger.info("%s: %s", name, out.getvalue().strip())
+    run.__name__ = name
+    return run
+
+
+class PeriodicJob:
+    def __init__(self, name, func, interval, jitter=0.1):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+
+    def next_delay(self):
+        spread = self.interval * self.jitter
+        return self.interval + random.uniform(-spread, spread)
+
+
+def default_periodic_jobs():
+    from pawjeevan_backend.profiling import prune_slow_request_logs
+
+    jobs = [
+        PeriodicJob(
+            "cleanup_pending_registrations",
+            _command("cleanup_pending_registrations"),
+            _setting("SCHEDULER_REGISTRATION_CLEANUP_SECONDS", 15 * 60),
+        ),
+        PeriodicJob(
+            "cleanup_expired_tokens",
+            _command("cleanup_expired_tokens"),
+            _setting("SCHEDULER_TOKEN_CLEANUP_SECONDS", 6 * 60 * 60),
+        ),
+        PeriodicJob(
+            "prune_slow_request_logs",
+            prune_slow_request_logs,
+            _setting("SCHEDULER_PROFILING_PRUNE_SECONDS", 60 * 60),
+        ),
+        PeriodicJob(
+            "rollup_daily_stats",
+            _command("rollup_daily_stats", days=2),
+            _setting("SCHEDULER_STATS_ROLLUP_SECONDS", 10 * 60),
+        ),
+    ]
+    if _setting("DATABASE_REPLICAS", []):
+        from pawjeevan_backend.db_router import write_heartbeat
+
+        # Replica lag is measured in heartbeat intervals; keep them regular
+        jobs.append(PeriodicJob(
+            "replica_heartbeat", write_heartbeat, _setting("SCHEDULER_REPLICA_HEARTBEAT_SECONDS", 5), jitter=0,
+        ))
+    return jobs
+
+
+# ---------------------------------------------------------------------------
+# Main loop
+# ---------------------------------------------------------------------------
+
+class Scheduler:
+    """
+    Priority queue of (due_monotonic, seq, name). "notifications" is queued
+    for its next due time; periodic jobs re-queue themselves after running.
+    """
+
+    NOTIFICATIONS = "notifications"
+
+    def __init__(self, periodic_jobs=None, lease=None, poll_seconds=None, clock=time.monotonic):
+        self.jobs = {job.name: job for job in (periodic_jobs if periodic_jobs is not None else default_periodic_jobs())}
+        self.lease = lease or Lease()
+        self.poll_seconds = poll_seconds or _setting("SCHEDULER_POLL_SECONDS", 30)
+        self.clock = clock
+        self.stop_event = threading.Event()
+        self._heap = []
+        self._seq = itertools.count()
+        self._queued_notifications = None
+
+    # queue helpers
+
+    def _push(self, due, name):
+        heapq.heappush(self._heap, (due, next(self._seq), name))
+
+    def _schedule_notifications(self, due):
+        """Keep at most one live "notifications" entry, at the earliest due time"""
+        if self._queued_notifications is not None and self._queued_notifications <= due:
+            return
+        self._queued_notifications = due
+        self._push(due, self.NOTIFICATIONS)
+
+    def refresh(self, min_delay=0):
+        """Re-read the next notification due time from the database"""
+        due_at = next_notification_due(timezone.now())
+        if due_at is None:
+            return
+        delay = max((due_at - timezone.now()).total_seconds(), min_delay)
+        self._schedule_notifications(self.clock() + delay)
+
+    def _run(self, name):
+        started = time.perf_counter()
+        try:
+            with self.lease.kept_alive():
+                if name == self.NOTIFICATIONS:
+                    dispatch_notifications()
+                else:
+                    self.jobs[name].func()
+        except Exception:
+            logger.exception("Scheduler job %s failed", name)
+        finally:
+            close_old_connections()
+        logger.debug("Scheduler job %s took %.3fs", name, time.perf_counter() - started)
+
+    # lifecycle
+
+    def start(self):
+        now = self.clock()
+        # Catch up on anything missed while no scheduler was running, then
+        # stagger the cleanups
+        self._schedule_notifications(now)
+        for job in self.jobs.values():
+            self._push(now + random.uniform(0, job.interval * job.jitter), job.name)
+
+    def run_pending(self):
+        """Run every job whose time has come; returns seconds until the next one"""
+        # Stop as soon as the lease is lost, even in the middle of a backlog
+        while self.lease.held and self._heap and self._heap[0][0] <= self.clock():
+            due, _, name = heapq.heappop(self._heap)
+            if name == self.NOTIFICATIONS:
+                if due != self._queued_notifications:
+                    continue  # superseded by an earlier entry
+                self._queued_notifications = None
+                self._run(name)
+                # What it sent is no longer due; queue whatever comes next.
+                # The floor stops a failing dispatch from spinning.
+                self.refresh(min_delay=1)
+            else:
+                self._run(name)
+                self._push(self.clock() + self.jobs[name].next_delay(), name)
+        if self._heap:
+            return max(self._heap[0][0] - self.clock(), 0)
+        return None
+
+    def run_forever(self):
+        self.start()
+        renew_every = self.lease.ttl.total_seconds() / 3
+        next_renew = 0
+        next_refresh = 0
+        try:
+            while not self.stop_event.is_set():
+                now = self.clock()
+                if now >= next_renew or not self.lease.held:
+                    if not self.lease.acquire():
+                        # Stand by; retry before the current holder's lease could lapse
+                        close_old_connections()
+                        self.stop_event.wait(renew_every)
+                        continue
+                    next_renew = now + renew_every
+                if now >= next_refresh:
+                    self.refresh()
+                    next_refresh = now + self.poll_seconds
+
+                wait = self.run_pending()
+                now = self.clock()
+                wake = min(next_renew, next_refresh)
+                if wait is not None:
+                    wake = min(wake, now + wait)
+                self.stop_event.wait(max(wake - now, 0))
+        finally:
+            self.lease.release()
+            close_old_connections()
+
+    def stop(self):
+        self.stop_event.set()
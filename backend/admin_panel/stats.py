@@ -0,0 +1,219 @@
+"""
+Daily rollups behind the admin dashboard.
+
+rollup_daily_stats() recomputes DailyStats rows for a date range with one
+grouped query per source table (bounded by created_at, so indexes apply)
+and upserts them. The dashboard then reads a range of rows in one query
+and re-buckets them by day, week or month.
+
+Orders count towards the day they were placed, but their payment status
+changes later. rollup_changed_days() re-rolls the earlier days whose orders
+were saved since the last rollup, so a late payment or refund still reaches
+that day's paid_orders/revenue.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from community.models import Comment, Group, Post
+from store.models import Order, Product
+from users.models import User
+
+from .models import DailyStats
+
+GRANULARITIES = ('day', 'week', 'month')
+
+FLOW_FIELDS = (
+    'new_users', 'new_products', 'new_orders', 'paid_orders', 'revenue',
+    'new_posts', 'new_comments', 'new_groups',
+)
+SNAPSHOT_FIELDS = (
+    'total_users', 'active_users', 'total_products', 'active_products',
+    'total_orders', 'pending_orders', 'total_revenue',
+    'total_posts', 'total_comments', 'total_groups',
+)
+
+# (model, {field: aggregate}) counted per creation day
+_FLOW_SOURCES = (
+    (User, {'new_users': Count('id')}),
+    (Product, {'new_products': Count('id')}),
+    (Order, {
+        'new_orders': Count('id'),
+        'paid_orders': Count('id', filter=Q(payment_status='paid')),
+        'revenue': Sum('total', filter=Q(payment_status='paid')),
+    }),
+    (Post, {'new_posts': Count('id')}),
+    (Comment, {'new_comments': Count('id')}),
+    (Group, {'new_groups': Count('id')}),
+)
+
+
+# Overlap between successive checks for changed orders, covering orders
+# saved while the previous rollup was running
+CHANGED_ORDERS_OVERLAP = timedelta(minutes=5)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def _snapshot():
+    """Site-wide totals right now (one aggregate per table)"""
+    users = User.objects.aggregate(total_users=Count('id'), active_users=Count('id', filter=Q(is_active=True)))
+    products = Product.objects.aggregate(
+        total_products=Count('id'), active_products=Count('id', filter=Q(is_active=True))
+    )
+    orders = Order.objects.aggregate(
+        total_orders=Count('id'),
+        pending_orders=Count('id', filter=Q(status='pending')),
+        total_revenue=Sum('total', filter=Q(payment_status='paid')),
+    )
+    orders['total_revenue'] = orders['total_revenue'] or 0
+    return {
+        **users, **products, **orders,
+        'total_posts': Post.objects.count(),
+        'total_comments': Comment.objects.count(),
+        'total_groups': Group.objects.count(),
+    }
+
+
+def rollup_daily_stats(start, end, now=None):
+    """Recompute DailyStats for every day in [start, end]; returns the row count"""
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    end = min(end, today)
+    if start > end:
+        return 0
+
+    lower, upper = _day_start(start), _day_start(end + timedelta(days=1))
+    values = {}
+    for model, aggregates in _FLOW_SOURCES:
+        per_day = (
+            model.objects.filter(created_at__gte=lower, created_at__lt=upper)
+            .annotate(day=TruncDate('created_at'))
+            .values('day')
+            .annotate(**aggregates)
+            .order_by()
+        )
+        for row in per_day:
+            day = row.pop('day')
+            values.setdefault(day, {}).update({k: v or 0 for k, v in row.items()})
+
+    past, current = [], []
+    day = start
+    while day <= end:
+        stats = DailyStats(date=day, **values.get(day, {}))
+        if day == today:
+            for field, value in _snapshot().items():
+                setattr(stats, field, value)
+            current.append(stats)
+        else:
+            past.append(stats)
+        day += timedelta(days=1)
+
+    # Past days keep whatever snapshot they were last given
+    DailyStats.objects.bulk_create(
+        past, update_conflicts=True, unique_fields=['date'],
+        update_fields=[*FLOW_FIELDS, 'updated_at'],
+    )
+    DailyStats.objects.bulk_create(
+        current, update_conflicts=True, unique_fields=['date'],
+        update_fields=[*FLOW_FIELDS, *SNAPSHOT_FIELDS, 'updated_at'],
+    )
+    return len(past) + len(current)
+
+
+def rollup_changed_days(before, now=None):
+    """
+    Re-roll the days before ``before`` whose orders were saved (paid,
+    refunded, ...) since the last rollup; returns the row count
+    """
+    now = now or timezone.now()
+    last_rollup = (
+        DailyStats.objects.filter(date__lt=timezone.localdate(now))
+        .aggregate(last=Max('updated_at'))['last']
+    )
+    if last_rollup is None:
+        return 0  # nothing rolled up yet; backfill with --since
+
+    days = (
+        Order.objects.filter(updated_at__gte=last_rollup - CHANGED_ORDERS_OVERLAP, created_at__lt=_day_start(before))
+        .annotate(day=TruncDate('created_at'))
+        .values_list('day', flat=True)
+        .distinct()
+        .order_by('day')
+    )
+    return sum(rollup_daily_stats(day, day, now) for day in days)
+
+
+def _bucket(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def dashboard_stats(start, end, granularity='day'):
+    """
+    Dashboard payload for [start, end]: snapshot totals, flow totals for the
+    range and a time series at the requested granularity.
+    """
+    now = timezone.now()
+    today = timezone.localdate(now)
+    max_age = timedelta(seconds=getattr(settings, 'DAILY_STATS_MAX_AGE', 900))
+
+    rows = list(DailyStats.objects.filter(date__range=(start, end)))
+    if start <= today <= end:
+        latest = rows[-1] if rows else None
+        if latest is None or latest.date != today or latest.updated_at < now - max_age:
+            # Nothing has rolled up today recently (scheduler not running?);
+            # refresh just today's row
+            rollup_daily_stats(today, today, now)
+            rows = list(DailyStats.objects.filter(date__range=(start, end)))
+
+    series = {}
+    for row in rows:
+        bucket = series.setdefault(_bucket(row.date, granularity), dict.fromkeys(FLOW_FIELDS, 0))
+        for field in FLOW_FIELDS:
+            bucket[field] += getattr(row, field)
+    totals = dict.fromkeys(FLOW_FIELDS, 0)
+    for bucket in series.values():
+        for field in FLOW_FIELDS:
+            totals[field] += bucket[field]
+
+    snapshot_row = next((row for row in reversed(rows) if row.total_users is not None), None)
+    snapshot = {field: getattr(snapshot_row, field, None) for field in SNAPSHOT_FIELDS}
+
+    return {
+        'range': {'start': start, 'end': end, 'granularity': granularity},
+        'as_of': snapshot_row.updated_at if snapshot_row else None,
+        'users': {
+            'total': snapshot['total_users'],
+            'active': snapshot['active_users'],
+            'new_in_range': totals['new_users'],
+        },
+        'store': {
+            'total_products': snapshot['total_products'],
+            'active_products': snapshot['active_products'],
+            'total_orders': snapshot['total_orders'],
+            'pending_orders': snapshot['pending_orders'],
+            'total_revenue': snapshot['total_revenue'],
+            'new_products_in_range': totals['new_products'],
+            'orders_in_range': totals['new_orders'],
+            'paid_orders_in_range': totals['paid_orders'],
+            'revenue_in_range': totals['revenue'],
+        },
+        'community': {
+            'total_posts': snapshot['total_posts'],
+            'total_comments': snapshot['total_comments'],
+            'total_groups': snapshot['total_groups'],
+            'posts_in_range': totals['new_posts'],
+            'comments_in_range': totals['new_comments'],
+            'groups_in_range': totals['new_groups'],
+        },
+        'series': [{'period': period, **values} for period, values in sorted(series.items())],
+    }
@@ -1,3 +1,181 @@
-from django.test import TestCase
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from community.models import Event
+from community.notifications import dispatch_event_notifications
+from store.models import Order
+from users.models import Notification, User
+
+from .models import DailyStats
+from .scheduler import Lease, PeriodicJob, Scheduler, next_notification_due
+from .stats import dashboard_stats
+
+
+class SchedulerLeaseTests(TransactionTestCase):
+    """Leader election between scheduler processes (admin_panel/scheduler.py)"""
+
+    def test_one_holder_at_a_time(self):
+        leader, standby = Lease(owner='leader', ttl=60), Lease(owner='standby', ttl=60)
+        self.assertTrue(leader.acquire())
+        self.assertFalse(standby.acquire())
+
+        leader.release()
+        self.assertTrue(standby.acquire())
+
+    def test_lease_is_renewed_while_a_long_job_runs(self):
+        leader, standby = Lease(owner='leader', ttl=1), Lease(owner='standby', ttl=1)
+        taken_over = []
+
+        def slow_job():
+            # Runs past the lease length; the standby must not get in
+            for _ in range(4):
+                time.sleep(0.5)
+                taken_over.append(standby.acquire())
+
+        scheduler = Scheduler(periodic_jobs=[PeriodicJob('slow', slow_job, 60)], lease=leader)
+        self.assertTrue(leader.acquire())
+        scheduler._push(0, 'slow')
+        scheduler.run_pending()
+
+        self.assertEqual(taken_over, [False] * 4)
+        self.assertTrue(leader.held)
+
+    def test_no_jobs_run_once_the_lease_is_lost(self):
+        leader = Lease(owner='leader', ttl=60)
+        ran = []
+
+        def loses_the_lease():
+            ran.append('first')
+            leader.held = False  # as when a renewal finds another owner
+
+        scheduler = Scheduler(
+            periodic_jobs=[PeriodicJob('first', loses_the_lease, 60),
+                           PeriodicJob('second', lambda: ran.append('second'), 60)],
+            lease=leader,
+        )
+        self.assertTrue(leader.acquire())
+        scheduler._push(0, 'first')
+        scheduler._push(0, 'second')
+
+        scheduler.run_pending()
+        self.assertEqual(ran, ['first'])
+
+
+class NotificationDueTests(TestCase):
+    """When the scheduler wakes up for event notifications"""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.user = User.objects.create_user(username='attendee', email='attendee@example.com', password='x')
+
+    def make_event(self, starts_in):
+        event = Event.objects.create(
+            title='Park walk', description='', event_type='meetup', location='Park', address='',
+            start_datetime=self.now + starts_in, end_datetime=self.now + starts_in + timedelta(hours=2),
+            organizer=self.user,
+        )
+        event.attendees.add(self.user)
+        return event
+
+    def test_event_ahead_is_due_when_it_enters_the_window(self):
+        event = self.make_event(timedelta(hours=3))
+        self.assertEqual(next_notification_due(self.now), event.start_datetime - timedelta(hours=1))
+
+    def test_event_created_inside_the_window_is_due_now(self):
+        event = self.make_event(timedelta(minutes=30))
+        self.assertEqual(next_notification_due(self.now), self.now)
+
+        dispatch_event_notifications()
+        self.assertTrue(Notification.objects.filter(user=self.user, notification_type='event_starting').exists())
+        # Once sent, the next thing due is the event's end
+        self.assertEqual(next_notification_due(self.now), event.end_datetime)
+
+
+class DailyStatsTests(TestCase):
+    """DailyStats rollups and the dashboard built on them (admin_panel/stats.py)"""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='x')
+
+    def place_order(self, days_ago, total='100.00'):
+        order = Order.objects.create(
+            order_number=f'ORD-{Order.objects.count() + 1}', user=self.user, delivery_method='pickup',
+            shipping_address='', shipping_city='', shipping_state='', shipping_zip='', shipping_phone='',
+            subtotal=Decimal(total), total=Decimal(total),
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        order.refresh_from_db()
+        return order
+
+    def rollup(self, **options):
+        call_command('rollup_daily_stats', stdout=StringIO(), **options)
+
+    def test_late_payment_updates_the_day_the_order_was_placed(self):
+        order = self.place_order(days_ago=5)
+        self.rollup(since=(self.today - timedelta(days=10)).isoformat())
+        placed = DailyStats.objects.get(date=self.today - timedelta(days=5))
+        self.assertEqual((placed.new_orders, placed.paid_orders), (1, 0))
+
+        order.payment_status = 'paid'
+        order.save()
+        self.rollup(days=2)
+
+        placed.refresh_from_db()
+        self.assertEqual((placed.new_orders, placed.paid_orders, placed.revenue), (1, 1, Decimal('100.00')))
+
+    def test_only_today_gets_a_snapshot(self):
+        self.place_order(days_ago=3)
+        self.rollup(days=7)
+
+        rows = {row.date: row for row in DailyStats.objects.all()}
+        self.assertEqual(len(rows), 7)
+        self.assertIsNone(rows[self.today - timedelta(days=3)].total_orders)
+        self.assertEqual(rows[self.today].total_orders, 1)
+
+    def test_series_is_bucketed_by_granularity(self):
+        # Monday 2024-01-01 .. Wednesday 2024-01-31, one new user a day
+        start, end = date(2024, 1, 1), date(2024, 1, 31)
+        DailyStats.objects.bulk_create(
+            DailyStats(date=start + timedelta(days=n), new_users=1) for n in range((end - start).days + 1)
+        )
+
+        weeks = dashboard_stats(start, end, 'week')
+        self.assertEqual([b['period'] for b in weeks['series']], [date(2024, 1, d) for d in (1, 8, 15, 22, 29)])
+        self.assertEqual([b['new_users'] for b in weeks['series']], [7, 7, 7, 7, 3])
+
+        months = dashboard_stats(start, end, 'month')
+        self.assertEqual([(b['period'], b['new_users']) for b in months['series']], [(start, 31)])
+        self.assertEqual(months['users']['new_in_range'], 31)
+
+    def test_snapshot_comes_from_the_last_rolled_up_day(self):
+        # The 10th was rolled up live; the later days were only backfilled
+        DailyStats.objects.create(date=date(2024, 1, 10), total_users=40, total_orders=5)
+        DailyStats.objects.create(date=date(2024, 1, 11), new_users=2)
+        DailyStats.objects.create(date=date(2024, 1, 12), new_users=3)
+
+        stats = dashboard_stats(date(2024, 1, 1), date(2024, 1, 31))
+        self.assertEqual((stats['users']['total'], stats['store']['total_orders']), (40, 5))
+        self.assertEqual(stats['users']['new_in_range'], 5)
+
+    def test_stale_today_is_refreshed(self):
+        self.rollup(days=1)
+        DailyStats.objects.filter(date=self.today).update(updated_at=timezone.now() - timedelta(hours=1))
+        User.objects.create_user(username='newcomer', email='newcomer@example.com', password='x')
+
+        stats = dashboard_stats(self.today - timedelta(days=6), self.today)
+        self.assertEqual((stats['users']['total'], stats['users']['new_in_range']), (2, 2))
+
+    def test_fresh_today_is_read_as_stored(self):
+        self.rollup(days=1)
+        User.objects.create_user(username='newcomer', email='newcomer@example.com', password='x')
+
+        with self.assertNumQueries(1):
+            stats = dashboard_stats(self.today - timedelta(days=6), self.today)
+        self.assertEqual(stats['users']['total'], 1)
@@ -5,11 +5,15 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
-from django.db.models import Count, Sum
+from datetime import date, timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from store.analytics import GROUP_BY_FIELDS, sales_summary
+from users.authentication import invalidate_cached_user
 from users.models import User
-from store.models import Product, Order
-from community.models import Post, Comment, Group
 from .models import SystemSettings
+from .stats import GRANULARITIES, dashboard_stats
 from .serializers import AdminUserSerializer, SystemSettingsSerializer
 
 
@@ -28,6 +32,7 @@ class AdminUserViewSet(viewsets.ModelViewSet):
         user = self.get_object()
         user.is_active = False
         user.save()
+        invalidate_cached_user(user.pk)
         return Response({'status': 'user banned'})
     
     @action(detail=True, methods=['post'])
@@ -36,6 +41,7 @@ class AdminUserViewSet(viewsets.ModelViewSet):
         user = self.get_object()
         user.is_active = True
         user.save()
+        invalidate_cached_user(user.pk)
         return Response({'status': 'user unbanned'})
 
 
@@ -45,37 +51,112 @@ class AdminAnalyticsViewSet(viewsets.ViewSet):
     GET /api/admin/analytics/dashboard/ - Dashboard stats
     GET /api/admin/analytics/users/ - User analytics
     GET /api/admin/analytics/sales/ - Sales analytics
+    GET /api/admin/analytics/ai-cache/ - AI prompt cache hit rate
+    GET /api/admin/analytics/throttles/ - Auth endpoint rate-limit hits
     """
     permission_classes = [IsAdminUser]
     
+    def _date_range(self, request):
+        """(start, end, error_response) from ?start=&end= (default: the last 30 days)"""
+        today = timezone.localdate()
+        try:
+            end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else today
+            start = (
+                date.fromisoformat(request.query_params['start'])
+                if 'start' in request.query_params else end - timedelta(days=29)
+            )
+        except ValueError:
+            return None, None, Response(
+                {'error': 'start and end must be dates (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if start > end:
+            return None, None, Response({'error': 'start must not be after end'}, status=status.HTTP_400_BAD_REQUEST)
+        return start, end, None
+
+    def _granularity(self, request):
+        granularity = request.query_params.get('granularity', 'day')
+        if granularity not in GRANULARITIES:
+            return None, Response(
+                {'error': f"granularity must be one of: {', '.join(GRANULARITIES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return granularity, None
+
+    def _cacheable(self, response):
+        patch_cache_control(response, private=True, max_age=settings.SALES_ANALYTICS_CACHE_SECONDS)
+        return response
+
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
-        """Get dashboard statistics"""
-        stats = {
-            'users': {
-                'total': User.objects.count(),
-                'active': User.objects.filter(is_active=True).count(),
-                'new_this_month': User.objects.filter(
-                    created_at__month=timezone.now().month
-                ).count(),
-            },
-            'store': {
-                'total_products': Product.objects.count(),
-                'active_products': Product.objects.filter(is_active=True).count(),
-                'total_orders': Order.objects.count(),
-                'pending_orders': Order.objects.filter(status='pending').count(),
-                'total_revenue': Order.objects.filter(
-                    payment_status='paid'
-                ).aggregate(Sum('total'))['total__sum'] or 0,
-            },
-            'community': {
-                'total_posts': Post.objects.count(),
-                'total_comments': Comment.objects.count(),
-                'total_groups': Group.objects.count(),
-            }
-        }
-        
-        return Response(stats)
+        """
+        Get dashboard statistics from the DailyStats rollup
+        Query params: start, end (YYYY-MM-DD; default the last 30 days),
+        granularity (day|week|month; default day)
+        """
+        start, end, error = self._date_range(request)
+        if error:
+            return error
+        granularity, error = self._granularity(request)
+        if error:
+            return error
+        return Response(dashboard_stats(start, end, granularity))
+
+    @action(detail=False, methods=['get'])
+    def users(self, request):
+        """Sign-ups per day/week/month from the DailyStats rollup"""
+        start, end, error = self._date_range(request)
+        if error:
+            return error
+        granularity, error = self._granularity(request)
+        if error:
+            return error
+        stats = dashboard_stats(start, end, granularity)
+        return self._cacheable(Response({
+            'range': stats['range'],
+            'totals': stats['users'],
+            'series': [{'period': row['period'], 'new_users': row['new_users']} for row in stats['series']],
+        }))
+
+    @action(detail=False, methods=['get'])
+    def sales(self, request):
+        """
+        Sales from the OrderLineFact table
+        Query params: group_by (day|product|category|brand; default day),
+        start, end, paid_only (true/false), limit
+        """
+        start, end, error = self._date_range(request)
+        if error:
+            return error
+        group_by = request.query_params.get('group_by', 'day')
+        if group_by not in GROUP_BY_FIELDS:
+            return Response(
+                {'error': f"group_by must be one of: {', '.join(GROUP_BY_FIELDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(request.query_params['limit']) if 'limit' in request.query_params else None
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        paid_only = request.query_params.get('paid_only', '').lower() in ('1', 'true', 'yes')
+        return self._cacheable(Response(sales_summary(start, end, group_by, paid_only, limit)))
+
+    @action(detail=False, methods=['get'], url_path='ai-cache')
+    def ai_cache(self, request):
+        """Prompt cache statistics for the Ollama integration (this process)"""
+        from ai_module.ollama_service import get_prompt_cache_stats
+        return Response(get_prompt_cache_stats())
+
+    @action(detail=False, methods=['get'])
+    def throttles(self, request):
+        """Requests checked/rejected per rate-limit scope (this process)"""
+        from users.throttling import get_throttle_stats
+        return Response(get_throttle_stats())
+
+    @action(detail=False, methods=['get'], url_path='response-cache')
+    def response_cache(self, request):
+        """Anonymous response cache hits/misses per view (this process)"""
+        from pawjeevan_backend.response_cache import get_response_cache_stats
+        return Response(get_response_cache_stats())
 
 
 class SystemSettingsViewSet(viewsets.ModelViewSet):
@@ -13,6 +13,8 @@ from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import GlobalAveragePooling2D, Dense
 from django.conf import settings
 
+from pawjeevan_backend import metrics
+
 # Get the directory where this file is located
 AI_MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -93,6 +95,37 @@ def _path_to_tensor(img_path):
     return np.expand_dims(x, axis=0)
 
 
+def _paths_to_tensor(img_paths):
+    """
+    Stack several images into a single (N, 224, 224, 3) batch tensor.
+    Returns (tensor, valid_indices) - images that cannot be read are skipped
+    and their indices left out of valid_indices.
+    """
+    tensors = []
+    valid = []
+    for idx, img_path in enumerate(img_paths):
+        try:
+            tensors.append(_path_to_tensor(img_path))
+            valid.append(idx)
+        except Exception as e:
+            print(f"[BreedDetector] Could not load image {img_path}: {e}")
+    if not tensors:
+        return None, []
+    return np.vstack(tensors), valid
+
+
+def _top_predictions(predictions, top=5):
+    """Return [{"breed", "confidence"}, ...] for the top-N classifier outputs"""
+    top_indices = np.argsort(predictions)[-top:][::-1]
+    return [
+        {
+            "breed": _dog_names[idx].replace("_", " "),
+            "confidence": float(predictions[idx])
+        }
+        for idx in top_indices
+    ]
+
+
 def _ResNet50_predict_labels(img_path):
     """Predict ImageNet labels using ResNet50"""
     img = preprocess_input(_path_to_tensor(img_path))
@@ -135,6 +168,7 @@ def detect_face(img_path):
         return False
 
 
+@metrics.timed("ai_inference_duration_seconds", model="breed", mode="single")
 def predict_breed(img_path):
     """
     Predict dog breed from image.
@@ -161,14 +195,7 @@ def predict_breed(img_path):
         confidence = float(predictions[top_idx])
         
         # Get top 5 predictions for alternatives
-        top_indices = np.argsort(predictions)[-5:][::-1]
-        all_predictions = [
-            {
-                "breed": _dog_names[idx].replace("_", " "),
-                "confidence": float(predictions[idx])
-            }
-            for idx in top_indices
-        ]
+        all_predictions = _top_predictions(predictions)
         
         return breed_name, confidence, all_predictions
         
@@ -220,3 +247,81 @@ def detect_breed_from_image(img_path):
         "is_dog": False,
         "is_human": False,
     }
+
+
+def _failed_result(error):
+    return {
+        "success": False,
+        "error": error,
+        "detected_breed": None,
+        "confidence": 0.0,
+        "alternative_breeds": [],
+        "is_dog": False,
+        "is_human": False,
+    }
+
+
+@metrics.timed("ai_inference_duration_seconds", model="breed", mode="batch")
+def detect_breeds_from_images(img_paths):
+    """
+    Batch version of detect_breed_from_image.
+    All images are stacked into one tensor so each model runs a single
+    forward pass for the whole batch instead of one pass per image.
+    Returns a list of result dictionaries in the same order as img_paths.
+    """
+    img_paths = list(img_paths)
+    if not img_paths:
+        return []
+
+    if not _models_loaded:
+        if not load_models():
+            return [
+                _failed_result("ML models not loaded. Please ensure model weights are installed.")
+                for _ in img_paths
+            ]
+
+    results = [_failed_result("Could not read image.") for _ in img_paths]
+    batch, valid = _paths_to_tensor(img_paths)
+    if batch is None:
+        return results
+
+    try:
+        # preprocess_input works in place, so do it once and share the batch
+        batch = preprocess_input(batch)
+
+        # Dog detection: ImageNet labels 151-268 are dog breeds
+        labels = np.argmax(_ResNet50_model.predict(batch, verbose=0), axis=1)
+        is_dog = (labels >= 151) & (labels <= 268)
+
+        # Face detection is only needed for images without a dog
+        is_human = np.array([
+            False if is_dog[row] else detect_face(img_paths[idx])
+            for row, idx in enumerate(valid)
+        ], dtype=bool)
+
+        rows = np.flatnonzero(is_dog | is_human)
+        predictions = None
+        if rows.size:
+            bottleneck_features = _ResNet50_feature_extractor.predict(batch[rows], verbose=0)
+            predictions = _breed_classifier.predict(bottleneck_features, verbose=0)
+    except Exception as e:
+        print(f"[BreedDetector] Batch prediction error: {e}")
+        return [_failed_result(f"Prediction failed: {e}") for _ in img_paths]
+
+    for row, idx in enumerate(valid):
+        results[idx] = _failed_result("No dog or human face detected in the image.")
+
+    for pos, row in enumerate(rows):
+        idx = valid[row]
+        alternatives = _top_predictions(predictions[pos])
+        results[idx] = {
+            "success": True,
+            "detected_breed": alternatives[0]["breed"],
+            "confidence": alternatives[0]["confidence"],
+            "alternative_breeds": alternatives[1:],  # Exclude top prediction
+            "is_dog": bool(is_dog[row]),
+            "is_human": bool(is_human[row]),
+            "model_version": "ResNet50-v1.0",
+        }
+
+    return results
@@ -4,30 +4,167 @@ Loads breed-specific diet data from dog_diets.json and combines it with
 the user's pet profile (breed, age, weight) and breed-detection history
 to generate personalised diet recommendations.
 """
+import difflib
+import functools
 import json
-import os
+import re
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
+
+import numpy as np
 
 # ---------------------------------------------------------------------------
-# Load the diet dataset once at module level
+# Load the diet dataset once at module level and compile it into lookup tables
 # ---------------------------------------------------------------------------
 _DATA_DIR = Path(__file__).resolve().parent / "data"
-_DIET_DATA: dict = {}
+_DIET_PATH = _DATA_DIR / "dog_diets.json"
+
+LIFE_STAGES = ("puppy", "young_adult", "adult", "senior", "geriatric")
+WEIGHT_STATUSES = ("underweight", "ideal", "overweight", "obese")
+
+# Ideal weight ranges (kg) per size category used for the weight-status heuristic
+_IDEAL_RANGES = {
+    "toy": (1, 5),
+    "small": (5, 10),
+    "medium": (10, 25),
+    "large": (25, 45),
+    "giant": (45, 90),
+}
+
+# Minimum similarity for fuzzy breed-name matches (0-1, see difflib)
+_FUZZY_CUTOFF = 0.85
+
+# How often (seconds) get_diet_index() stats dog_diets.json for changes
+_RELOAD_CHECK_INTERVAL = 2.0
+
+
+@dataclass(frozen=True, eq=False)  # hashed by identity, for _resolve_in_index
+class DietIndex:
+    """Read-only lookup structures compiled from dog_diets.json."""
+    data: MappingProxyType
+    size_categories: MappingProxyType   # size name -> {"name": ..., **category data}
+    breed_sizes: MappingProxyType       # breed key -> size name
+    aliases: MappingProxyType           # normalised alias -> breed key
+    fuzzy_candidates: tuple             # normalised aliases for difflib
+    age_stages: MappingProxyType        # stage -> {"stage": ..., **adjustments}
+    weight_statuses: MappingProxyType   # status -> {"status": ..., **guidelines}
+    calorie_factors: MappingProxyType   # (size|None, stage, status) -> kcal per kg
+    mtime_ns: int
+
+
+_INDEX: DietIndex | None = None
+_INDEX_LOCK = threading.Lock()
+_last_reload_check = 0.0
+
+
+def _alias_key(name: str) -> str:
+    """Case/punctuation-insensitive form used for alias and fuzzy matching."""
+    return re.sub(r"[^a-z0-9]+", "", (name or "").lower())
+
+
+# Breed names come from clients, so the cache is bounded
+@functools.lru_cache(maxsize=1024)
+def _resolve_in_index(breed_key: str, index: DietIndex) -> str:
+    resolved = breed_key
+    if breed_key not in index.breed_sizes and breed_key not in index.data.get("breed_specific_diets", {}):
+        alias = _alias_key(breed_key)
+        if alias in index.aliases:
+            resolved = index.aliases[alias]
+        else:
+            matches = difflib.get_close_matches(alias, index.fuzzy_candidates, n=1, cutoff=_FUZZY_CUTOFF)
+            if matches:
+                resolved = index.aliases[matches[0]]
+    return resolved
+
+
+def _compile_index(data: dict, mtime_ns: int) -> DietIndex:
+    size_categories = {}
+    breed_sizes = {}
+    for cat_name, cat_data in data.get("size_categories", {}).items():
+        size_categories[cat_name] = MappingProxyType({"name": cat_name, **cat_data})
+        for breed in cat_data.get("breeds", []):
+            # Keep the first category a breed appears in (matches the old scan order)
+            breed_sizes.setdefault(breed, cat_name)
+
+    aliases = {}
+    for breed in list(breed_sizes) + list(data.get("breed_specific_diets", {})):
+        aliases.setdefault(_alias_key(breed), breed)
+
+    stages = data.get("age_adjustments", {})
+    age_stages = {
+        stage: MappingProxyType({"stage": stage, **stages.get(stage, {})})
+        for stage in LIFE_STAGES
+    }
+    guidelines = data.get("weight_guidelines", {})
+    weight_statuses = {
+        status: MappingProxyType({"status": status, **guidelines.get(status, {})})
+        for status in WEIGHT_STATUSES
+    }
 
+    calorie_factors = {}
+    for size_name in list(size_categories) + [None]:
+        base = (size_categories.get(size_name) or {}).get("base_calories_per_kg", 30)
+        for stage, stage_data in age_stages.items():
+            for status, status_data in weight_statuses.items():
+                calorie_factors[(size_name, stage, status)] = (
+                    base
+                    * stage_data.get("calorie_multiplier", 1.0)
+                    * status_data.get("calorie_adjustment", 1.0)
+                )
+
+    return DietIndex(
+        data=MappingProxyType(data),
+        size_categories=MappingProxyType(size_categories),
+        breed_sizes=MappingProxyType(breed_sizes),
+        aliases=MappingProxyType(aliases),
+        fuzzy_candidates=tuple(aliases),
+        age_stages=MappingProxyType(age_stages),
+        weight_statuses=MappingProxyType(weight_statuses),
+        calorie_factors=MappingProxyType(calorie_factors),
+        mtime_ns=mtime_ns,
+    )
 
-def _load_diet_data():
-    global _DIET_DATA
-    if _DIET_DATA:
-        return
-    diet_path = _DATA_DIR / "dog_diets.json"
-    if diet_path.exists():
-        with open(diet_path, "r", encoding="utf-8") as f:
-            _DIET_DATA = json.load(f)
-    else:
-        _DIET_DATA = {}
+
+def _dataset_mtime() -> int:
+    try:
+        return _DIET_PATH.stat().st_mtime_ns
+    except OSError:
+        return 0
 
 
-_load_diet_data()
+def reload_diet_data() -> DietIndex:
+    """
+    (Re)compile dog_diets.json into the lookup tables.
+    Called at import time and whenever the file on disk changes.
+    """
+    global _INDEX
+    with _INDEX_LOCK:
+        mtime_ns = _dataset_mtime()
+        data = {}
+        if mtime_ns:
+            with open(_DIET_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        _INDEX = _compile_index(data, mtime_ns)
+        _resolve_in_index.cache_clear()
+        return _INDEX
+
+
+def get_diet_index() -> DietIndex:
+    """Return the compiled dataset, hot-reloading it if dog_diets.json changed."""
+    global _last_reload_check
+    index = _INDEX
+    now = time.monotonic()
+    if index is None or now - _last_reload_check >= _RELOAD_CHECK_INTERVAL:
+        _last_reload_check = now
+        if index is None or index.mtime_ns != _dataset_mtime():
+            index = reload_diet_data()
+    return index
+
+
+reload_diet_data()
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -40,112 +177,121 @@ def _normalise_breed(breed_name: str) -> str:
     return breed_name.strip().replace(" ", "_")
 
 
-def _get_size_category(breed_key: str) -> dict | None:
+def _resolve_breed_key(breed_name: str, index: DietIndex | None = None) -> str:
+    """
+    Map a breed name to its dataset key: exact key first, then a
+    case/punctuation-insensitive alias, then the closest fuzzy match.
+    Unknown breeds resolve to their normalised form.
+    """
+    breed_key = _normalise_breed(breed_name)
+    if not breed_key:
+        return ""
+    return _resolve_in_index(breed_key, index or get_diet_index())
+
+
+
+def _get_size_category(breed_key: str, index: DietIndex | None = None) -> dict | None:
     """Return the size-category dict for a breed, or None."""
-    cats = _DIET_DATA.get("size_categories", {})
-    for cat_name, cat_data in cats.items():
-        if breed_key in cat_data.get("breeds", []):
-            return {"name": cat_name, **cat_data}
-    return None
+    index = index or get_diet_index()
+    size_name = index.breed_sizes.get(breed_key)
+    return index.size_categories[size_name] if size_name else None
 
 
-def _get_breed_diet(breed_key: str) -> dict | None:
+def _get_breed_diet(breed_key: str, index: DietIndex | None = None) -> dict | None:
     """Return breed-specific diet tips, or None."""
-    return _DIET_DATA.get("breed_specific_diets", {}).get(breed_key)
+    index = index or get_diet_index()
+    return index.data.get("breed_specific_diets", {}).get(breed_key)
 
 
-def _get_age_stage(age_years: float) -> dict:
+def _get_age_stage(age_years: float, index: DietIndex | None = None) -> dict:
     """Return age-stage info from the dataset."""
-    stages = _DIET_DATA.get("age_adjustments", {})
+    index = index or get_diet_index()
     if age_years < 1:
-        return {"stage": "puppy", **stages.get("puppy", {})}
+        return index.age_stages["puppy"]
     elif age_years < 3:
-        return {"stage": "young_adult", **stages.get("young_adult", {})}
+        return index.age_stages["young_adult"]
     elif age_years < 7:
-        return {"stage": "adult", **stages.get("adult", {})}
+        return index.age_stages["adult"]
     elif age_years < 10:
-        return {"stage": "senior", **stages.get("senior", {})}
+        return index.age_stages["senior"]
     else:
-        return {"stage": "geriatric", **stages.get("geriatric", {})}
+        return index.age_stages["geriatric"]
 
 
-def _get_weight_status(weight_kg: float, size_cat_name: str | None) -> dict:
+def _get_weight_status(weight_kg: float, size_cat_name: str | None, index: DietIndex | None = None) -> dict:
     """
     Rough heuristic for weight status based on size category.
     Returns the matching weight-guideline entry.
     """
-    ideal_ranges = {
-        "toy": (1, 5),
-        "small": (5, 10),
-        "medium": (10, 25),
-        "large": (25, 45),
-        "giant": (45, 90),
-    }
-    guidelines = _DIET_DATA.get("weight_guidelines", {})
-    if size_cat_name and size_cat_name in ideal_ranges:
-        lo, hi = ideal_ranges[size_cat_name]
+    index = index or get_diet_index()
+    if size_cat_name and size_cat_name in _IDEAL_RANGES:
+        lo, hi = _IDEAL_RANGES[size_cat_name]
         if weight_kg < lo * 0.9:
-            return {"status": "underweight", **guidelines.get("underweight", {})}
+            return index.weight_statuses["underweight"]
         elif weight_kg > hi * 1.2:
-            return {"status": "obese", **guidelines.get("obese", {})}
+            return index.weight_statuses["obese"]
         elif weight_kg > hi:
-            return {"status": "overweight", **guidelines.get("overweight", {})}
-    return {"status": "ideal", **guidelines.get("ideal", {})}
-
-
-# ---------------------------------------------------------------------------
-# Public API
-# ---------------------------------------------------------------------------
-
-def generate_diet_recommendation(
-    pet,
-    user,
-    *,
-    allergies: str = "",
-    health_conditions: str = "",
-    special_considerations: str = "",
-):
-    """
-    Generate a comprehensive diet recommendation for a pet.
-
-    ``pet`` – a PetProfile model instance (has .breed, .age, .weight, etc.)
-    ``user`` – the request user
+            return index.weight_statuses["overweight"]
+    return index.weight_statuses["ideal"]
 
-    Returns a dict ready to be unpacked into DietRecommendation.objects.create().
-    """
-    _load_diet_data()  # ensure data is available
 
+def _build_profile(pet, recent_detections: list, index: DietIndex) -> dict:
+    """Resolve everything about a pet the recommendation depends on, except calories."""
     breed_raw = pet.breed or ""
-    breed_key = _normalise_breed(breed_raw)
-    age = pet.age or 1  # years
-    weight = float(pet.weight) if pet.weight else 5.0
-
-    # ----- look up breed-detection history for this user ----
-    from .models import BreedDetection
-    recent_detections = list(
-        BreedDetection.objects.filter(user=user)
-        .exclude(detected_breed="")
-        .order_by("-created_at")[:5]
-        .values_list("detected_breed", flat=True)
-    )
+    breed_key = _resolve_breed_key(breed_raw, index)
     # If the pet's breed is empty but we have detection history, use the latest
     if not breed_key and recent_detections:
-        breed_key = _normalise_breed(recent_detections[0])
+        breed_key = _resolve_breed_key(recent_detections[0], index)
         breed_raw = recent_detections[0]
 
-    # ----- gather data from JSON dataset -----
-    size_cat = _get_size_category(breed_key)
-    breed_diet = _get_breed_diet(breed_key)
-    age_stage = _get_age_stage(age)
-    weight_info = _get_weight_status(weight, size_cat["name"] if size_cat else None)
+    weight = float(pet.weight) if pet.weight else 5.0
+    size_cat = _get_size_category(breed_key, index)
+    age_stage = _get_age_stage(pet.age or 1, index)
+    weight_info = _get_weight_status(weight, size_cat["name"] if size_cat else None, index)
+    return {
+        "breed_raw": breed_raw,
+        "age": pet.age or 1,  # years
+        "weight": weight,
+        "size_cat": size_cat,
+        "breed_diet": _get_breed_diet(breed_key, index),
+        "age_stage": age_stage,
+        "weight_info": weight_info,
+        "calorie_factor": index.calorie_factors[(
+            size_cat["name"] if size_cat else None,
+            age_stage["stage"],
+            weight_info["status"],
+        )],
+        "recent_detections": recent_detections,
+    }
+
+
+def _daily_calories(weights, calorie_factors):
+    """Vectorised daily calories: weight * kcal-per-kg, with a sensible minimum."""
+    weights = np.asarray(weights, dtype=float)
+    factors = np.asarray(calorie_factors, dtype=float)
+    return np.maximum((weights * factors).astype(int), 100)
+
 
-    # ----- calculate daily calories -----
-    base_cal_per_kg = (size_cat or {}).get("base_calories_per_kg", 30)
-    cal_multiplier = age_stage.get("calorie_multiplier", 1.0)
-    weight_adj = weight_info.get("calorie_adjustment", 1.0)
-    daily_calories = int(weight * base_cal_per_kg * cal_multiplier * weight_adj)
-    # Ensure a sensible minimum
-    daily_calories = max(daily_calories, 100)
+def _render_recommendation(
+    pet,
+    profile: dict,
+    daily_calories: int,
+    index: DietIndex,
+    *,
+    allergies: str = "",
+    health_conditions: str = "",
+    special_considerations: str = "",
+) -> dict:
+    """Turn a resolved profile into the DietRecommendation field values."""
+    breed_raw = profile["breed_raw"]
+    age = profile["age"]
+    weight = profile["weight"]
+    size_cat = profile["size_cat"]
+    breed_diet = profile["breed_diet"]
+    age_stage = profile["age_stage"]
+    weight_info = profile["weight_info"]
+    recent_detections = profile["recent_detections"]
+    daily_calories = int(daily_calories)
 
     # ----- feeding frequency -----
     feeding_freq = age_stage.get(
@@ -156,7 +302,7 @@ def generate_diet_recommendation(
     # ----- build food-types list -----
     food_types = []
     if breed_diet:
-        food_types = breed_diet.get("recommended_foods", [])
+        food_types = list(breed_diet.get("recommended_foods", []))
     elif size_cat:
         food_types = ["Premium dry food suited for " + (size_cat.get("name", "") + " breeds"),
                       "Lean protein", "Vegetables", "Fresh water"]
@@ -215,7 +361,7 @@ def generate_diet_recommendation(
     special_text = ". ".join(sc_parts)
 
     # ----- general danger foods -----
-    danger_foods = _DIET_DATA.get("general_foods_to_never_feed", [])
+    danger_foods = list(index.data.get("general_foods_to_never_feed", []))
 
     recommended_text = "\n".join(lines)
 
@@ -234,10 +380,119 @@ def generate_diet_recommendation(
             "life_stage": age_stage.get("stage"),
             "weight_status": weight_info.get("status"),
             "breed_specific_available": breed_diet is not None,
-            "foods_to_avoid": (breed_diet or {}).get("foods_to_avoid", []) + danger_foods,
-            "supplements": (breed_diet or {}).get("supplements", []),
+            "foods_to_avoid": list((breed_diet or {}).get("foods_to_avoid", [])) + danger_foods,
+            "supplements": list((breed_diet or {}).get("supplements", [])),
             "recent_detections": recent_detections,
             "age_stage_notes": age_stage.get("notes", ""),
             "weight_notes": weight_info.get("notes", ""),
         },
     }
+
+
+def recent_breed_detections(user_ids, limit: int = 5) -> dict:
+    """
+    Latest detected breeds (newest first) for many users in one query.
+    Returns {user_id: [breed, ...]}.
+    """
+    from django.db.models import F, Window
+    from django.db.models.functions import RowNumber
+    from .models import BreedDetection
+
+    history = {}
+    rows = (
+        BreedDetection.objects.filter(user_id__in=set(user_ids))
+        .exclude(detected_breed="")
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=[F("user_id")],
+            order_by=[F("created_at").desc(), F("id").desc()],
+        ))
+        .filter(rank__lte=limit)
+        .order_by("user_id", "rank")
+        .values_list("user_id", "detected_breed")
+    )
+    for user_id, breed in rows:
+        history.setdefault(user_id, []).append(breed)
+    return history
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def generate_diet_recommendation(
+    pet,
+    user,
+    *,
+    allergies: str = "",
+    health_conditions: str = "",
+    special_considerations: str = "",
+    recent_detections: list | None = None,
+):
+    """
+    Generate a comprehensive diet recommendation for a pet.
+
+    ``pet`` – a PetProfile model instance (has .breed, .age, .weight, etc.)
+    ``user`` – the request user
+    ``recent_detections`` – the user's latest detected breeds (newest first);
+    queried from BreedDetection when not supplied by the caller.
+
+    Returns a dict ready to be unpacked into DietRecommendation.objects.create().
+    """
+    index = get_diet_index()
+
+    # ----- look up breed-detection history for this user ----
+    if recent_detections is None:
+        recent_detections = recent_breed_detections([user.pk]).get(user.pk, [])
+
+    profile = _build_profile(pet, recent_detections, index)
+    daily_calories = _daily_calories([profile["weight"]], [profile["calorie_factor"]])[0]
+    return _render_recommendation(
+        pet,
+        profile,
+        daily_calories,
+        index,
+        allergies=allergies,
+        health_conditions=health_conditions,
+        special_considerations=special_considerations,
+    )
+
+
+def generate_diet_recommendations_bulk(
+    pets,
+    *,
+    allergies: str = "",
+    health_conditions: str = "",
+    special_considerations: str = "",
+) -> list:
+    """
+    Generate recommendations for many pets at once (multi-pet households,
+    shelters). Breed-detection history for every owner is fetched in a single
+    query and calories are computed for the whole batch in one numpy pass.
+
+    Returns a list of (pet, result) pairs; each result has the same shape as
+    generate_diet_recommendation()'s return value.
+    """
+    pets = list(pets)
+    if not pets:
+        return []
+
+    index = get_diet_index()
+    history = recent_breed_detections(pet.owner_id for pet in pets)
+    profiles = [_build_profile(pet, history.get(pet.owner_id, []), index) for pet in pets]
+    calories = _daily_calories(
+        [profile["weight"] for profile in profiles],
+        [profile["calorie_factor"] for profile in profiles],
+    )
+    return [
+        (pet, _render_recommendation(
+            pet,
+            profile,
+            daily_calories,
+            index,
+            allergies=allergies,
+            health_conditions=health_conditions,
+            special_considerations=special_considerations,
+        ))
+        for pet, profile, daily_calories in zip(pets, profiles, calories)
+    ]
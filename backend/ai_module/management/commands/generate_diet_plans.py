@@ -0,0 +1,56 @@
+"""
+Management command to generate diet recommendations in bulk
+Useful for shelters and multi-pet households: one run covers every pet
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ai_module.diet_service import generate_diet_recommendations_bulk
+from ai_module.models import DietRecommendation
+from users.models import PetProfile
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Generate diet recommendations for all pets of a user (or of every user)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email, username or id of the owner')
+        parser.add_argument('--all-users', action='store_true', help='Generate for every pet in the database')
+        parser.add_argument('--batch-size', type=int, default=500, help='Pets processed per batch (default 500)')
+        parser.add_argument('--dry-run', action='store_true', help='Compute recommendations without saving them')
+
+    def handle(self, *args, **options):
+        if bool(options['user']) == options['all_users']:
+            raise CommandError('Pass exactly one of --user or --all-users')
+
+        pets = PetProfile.objects.order_by('id')
+        if options['user']:
+            pets = pets.filter(owner=self._get_user(options['user']))
+
+        batch_size = max(options['batch_size'], 1)
+        pet_ids = list(pets.values_list('id', flat=True))
+        created = 0
+        for i in range(0, len(pet_ids), batch_size):
+            batch = PetProfile.objects.filter(id__in=pet_ids[i:i + batch_size]).order_by('id')
+            recs = []
+            for pet, result in generate_diet_recommendations_bulk(batch):
+                result.pop('_extra', None)
+                recs.append(DietRecommendation(user_id=pet.owner_id, pet=pet, **result))
+
+            if not options['dry_run']:
+                with transaction.atomic():
+                    DietRecommendation.objects.bulk_create(recs)
+            created += len(recs)
+
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {created} diet recommendation(s) for {len(pet_ids)} pet(s)'))
+
+    def _get_user(self, value):
+        lookup = {'id': value} if value.isdigit() else {'email__iexact': value} if '@' in value else {'username': value}
+        try:
+            return User.objects.get(**lookup)
+        except User.DoesNotExist:
+            raise CommandError(f'User "{value}" not found')
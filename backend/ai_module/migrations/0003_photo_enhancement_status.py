@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:24
+
+from django.db import migrations, models
+
+
+def mark_existing_completed(apps, schema_editor):
+    """Rows created before the worker existed were already "processed" inline"""
+    PhotoEnhancement = apps.get_model('ai_module', 'PhotoEnhancement')
+    PhotoEnhancement.objects.using(schema_editor.connection.alias).update(status='completed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_module', '0002_add_is_dog_is_human_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photoenhancement',
+            name='error_message',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='photoenhancement',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_existing_completed, migrations.RunPython.noop),
+    ]
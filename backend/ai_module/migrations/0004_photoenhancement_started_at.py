@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_module', '0003_photo_enhancement_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photoenhancement',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -161,6 +161,13 @@ class PhotoEnhancement(models.Model):
         ('background', 'Background Removal'),
         ('colorize', 'Colorization'),
     ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='photo_enhancements')
     original_image = models.ImageField(upload_to='photo_enhancement/original/')
@@ -169,6 +176,11 @@ class PhotoEnhancement(models.Model):
     
     parameters = models.JSONField(default=dict, blank=True, help_text="Enhancement parameters")
     processing_time = models.FloatField(null=True, blank=True)
+
+    # Processing runs on a background worker (see photo_enhancer.py)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    started_at = models.DateTimeField(null=True, blank=True)  # when a worker claimed it (or it was requeued)
+    error_message = models.TextField(blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -4,9 +4,18 @@ Communicates with the local Ollama API.
 """
 import requests
 import base64
+import hashlib
 import json
+import re
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
+from django.conf import settings
+
+from pawjeevan_backend import metrics
+
 # Ollama API endpoint (local)
 OLLAMA_BASE_URL = "http://localhost:11434"
 OLLAMA_MODEL = "llama3.2:latest"
@@ -54,6 +63,109 @@ Format your response as JSON with these fields:
 }"""
 
 
+# ---------------------------------------------------------------------------
+# Prompt-level response cache
+# ---------------------------------------------------------------------------
+# Identical prompts (e.g. a disease_type with no symptoms or pet info, or an
+# FAQ-style first chat message) are common and each costs a full generation.
+# Low-temperature replies are effectively deterministic, so they are kept in a
+# small in-process LRU with a TTL. Higher-temperature calls are never cached.
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class PromptCache:
+    """Thread-safe LRU + TTL cache for chat completions."""
+
+    def __init__(self, max_entries=256, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, result, generation_seconds)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, messages: list) -> str:
+        """(model, system prompt hash, normalised messages) -> stable hash."""
+        normalized = [
+            (m.get("role", ""), _WHITESPACE_RE.sub(" ", m.get("content", "")).strip().casefold())
+            for m in messages
+        ]
+        system_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        payload = json.dumps([model, system_hash, normalized], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry[2]
+            return dict(entry[1])
+
+    def set(self, key, result, generation_seconds):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, dict(result), generation_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+            self.saved_seconds = 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+
+_prompt_cache = PromptCache(
+    max_entries=getattr(settings, "OLLAMA_CACHE_MAX_ENTRIES", 256),
+    ttl=getattr(settings, "OLLAMA_CACHE_TTL", 3600),
+)
+
+
+def _is_cacheable(temperature: float) -> bool:
+    return temperature <= getattr(settings, "OLLAMA_CACHE_MAX_TEMPERATURE", 0.3)
+
+
+def get_prompt_cache_stats() -> dict:
+    """Hit rate and generation time saved by the prompt cache."""
+    return _prompt_cache.stats()
+
+
+def clear_prompt_cache():
+    _prompt_cache.clear()
+
+
+def _post(endpoint: str, url: str, **kwargs):
+    """requests.post timed into ollama_request_duration_seconds"""
+    with metrics.timed("ollama_request_duration_seconds", endpoint=endpoint):
+        return requests.post(url, **kwargs)
+
+
 def check_ollama_available() -> bool:
     """Check if Ollama service is running."""
     try:
@@ -79,6 +191,7 @@ def chat_with_ollama(
     messages: list,
     system_prompt: str = PET_ASSISTANT_SYSTEM_PROMPT,
     model: str = OLLAMA_MODEL,
+    temperature: float = 0.7,
 ) -> dict:
     """
     Send a chat request to Ollama.
@@ -87,10 +200,19 @@ def chat_with_ollama(
         messages: List of {"role": "user"|"assistant", "content": "..."}
         system_prompt: System prompt for the model
         model: Model name to use
+        temperature: Sampling temperature; low-temperature replies are cached
         
     Returns:
-        dict with "success", "content", "error"
+        dict with "success", "content", "error" (and "cached" when served from cache)
     """
+    cache_key = None
+    if _is_cacheable(temperature):
+        cache_key = PromptCache.make_key(model, system_prompt, messages)
+        cached = _prompt_cache.get(cache_key)
+        if cached is not None:
+            cached["cached"] = True
+            return cached
+
     if not check_ollama_available():
         return {
             "success": False,
@@ -103,14 +225,16 @@ def chat_with_ollama(
     full_messages.extend(messages)
     
     try:
-        response = requests.post(
+        start = time.monotonic()
+        response = _post(
+            "chat",
             f"{OLLAMA_BASE_URL}/api/chat",
             json={
                 "model": model,
                 "messages": full_messages,
                 "stream": False,
                 "options": {
-                    "temperature": 0.7,
+                    "temperature": temperature,
                     "top_p": 0.9,
                 }
             },
@@ -120,13 +244,16 @@ def chat_with_ollama(
         if response.status_code == 200:
             data = response.json()
             content = data.get("message", {}).get("content", "")
-            return {
+            result = {
                 "success": True,
                 "content": content,
                 "error": None,
                 "total_duration": data.get("total_duration"),
                 "eval_count": data.get("eval_count"),
             }
+            if cache_key and content:
+                _prompt_cache.set(cache_key, result, time.monotonic() - start)
+            return result
         else:
             return {
                 "success": False,
@@ -204,7 +331,8 @@ Provide your analysis in the JSON format specified."""
     try:
         # Use llama3.2-vision if available, otherwise fall back to base model
         # Note: For vision, we need a vision-capable model
-        response = requests.post(
+        response = _post(
+            "vision",
             f"{OLLAMA_BASE_URL}/api/chat",
             json={
                 "model": model if (model := "llama3.2-vision:latest") in get_available_models() else OLLAMA_MODEL,
@@ -319,6 +447,8 @@ Respond in JSON format:
     result = chat_with_ollama(
         messages=[{"role": "user", "content": prompt}],
         system_prompt=DISEASE_ANALYSIS_SYSTEM_PROMPT,
+        # 0.7 like any chat unless configured lower (which makes it cacheable)
+        temperature=getattr(settings, "OLLAMA_TEXT_ANALYSIS_TEMPERATURE", 0.7),
     )
     
     if result["success"]:
@@ -0,0 +1,267 @@
+"""
+Pet Photo Enhancement Service
+CPU image processing with Pillow/NumPy, run on a small background worker pool
+
+A row is claimed (pending -> processing, started_at set) by exactly one
+worker. Rows whose worker died (process restarted, killed mid-job) are
+requeued when polled after PHOTO_ENHANCEMENT_TIMEOUT seconds, once per
+timeout; see requeue_if_stale().
+"""
+import os
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+from PIL import Image, ImageFilter, ImageOps
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+SUPPORTED_TYPES = ("enhance", "filter", "colorize")
+
+# Bounds of the user-supplied parameters that drive the cost of a job
+# (validated by PhotoEnhancementParametersSerializer, clamped again here)
+DENOISE_SIZE_RANGE = (3, 9)
+SHARPEN_RANGE = (0.0, 3.0)
+CONTRAST_CUTOFF_RANGE = (0.0, 20.0)
+
+# Spool output in memory up to this size before falling back to a temp file
+_SPOOL_MAX_SIZE = 4 * 1024 * 1024
+
+_executor = None
+
+
+# ---------------------------------------------------------------------------
+# Look-up tables for the "filter" type
+# ---------------------------------------------------------------------------
+
+def _curve(gamma=1.0, lift=0.0, gain=1.0):
+    """256-entry tone curve: out = lift + gain * in ** gamma (all in 0..1)."""
+    x = np.linspace(0.0, 1.0, 256)
+    y = lift + gain * np.power(x, gamma)
+    return np.clip(np.round(y * 255), 0, 255).astype(np.uint8)
+
+
+_IDENTITY = _curve()
+
+# Per-channel (R, G, B) tables, concatenated the way Image.point() expects
+FILTER_LUTS = {
+    "warm": (_curve(0.9, 0.0, 1.0), _curve(1.0), _curve(1.1, 0.0, 0.9)),
+    "cool": (_curve(1.1, 0.0, 0.9), _curve(1.0), _curve(0.9, 0.0, 1.0)),
+    "vintage": (_curve(0.95, 0.08, 0.85), _curve(1.0, 0.05, 0.85), _curve(1.05, 0.1, 0.7)),
+    "vivid": (_curve(1.2), _curve(1.2), _curve(1.2)),
+    "fade": (_curve(0.9, 0.12, 0.82), _curve(0.9, 0.12, 0.82), _curve(0.9, 0.12, 0.82)),
+    "noir": None,  # handled as grayscale + contrast curve
+}
+_NOIR_CURVE = _curve(1.4)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ---------------------------------------------------------------------------
+# Processing steps
+# ---------------------------------------------------------------------------
+
+def _clamp(value, bounds):
+    low, high = bounds
+    return min(max(value, low), high)
+
+
+def _auto_contrast(img, cutoff):
+    return ImageOps.autocontrast(img, cutoff=_clamp(cutoff, CONTRAST_CUTOFF_RANGE))
+
+
+def _denoise(img, size):
+    # Median filter needs an odd kernel size
+    size = _clamp(int(size) | 1, DENOISE_SIZE_RANGE)
+    return img.filter(ImageFilter.MedianFilter(size))
+
+
+def _sharpen(img, amount):
+    amount = _clamp(amount, SHARPEN_RANGE)
+    return img.filter(ImageFilter.UnsharpMask(radius=2, percent=int(amount * 100), threshold=3))
+
+
+def enhance_image(img, params):
+    """Auto-contrast, optional denoise and unsharp-mask sharpening."""
+    img = _auto_contrast(img, float(params.get("contrast_cutoff", 1)))
+    if params.get("denoise", True):
+        size = params.get("denoise_size", 3)
+        img = _denoise(img, size)
+    sharpen = float(params.get("sharpen", 1.2))
+    if sharpen > 0:
+        img = _sharpen(img, sharpen)
+    return img
+
+
+def apply_filter(img, params):
+    """Apply one of the named LUT filters (see FILTER_LUTS)."""
+    name = params.get("filter", "warm")
+    if name not in FILTER_LUTS:
+        raise ValueError(f"Unknown filter '{name}'. Available: {', '.join(sorted(FILTER_LUTS))}")
+
+    if name == "noir":
+        gray = ImageOps.grayscale(img).point(_NOIR_CURVE.tolist())
+        return gray.convert("RGB")
+
+    luts = FILTER_LUTS[name]
+    strength = min(max(float(params.get("strength", 1.0)), 0.0), 1.0)
+    if strength < 1.0:
+        # Blend each table towards identity rather than blending the pixels
+        luts = tuple(
+            np.round(_IDENTITY + (lut.astype(float) - _IDENTITY) * strength).astype(np.uint8)
+            for lut in luts
+        )
+    return img.point(np.concatenate(luts).tolist())
+
+
+def colorize_image(img, params):
+    """Map luminance onto a black → mid → white colour ramp (sepia by default)."""
+    gray = ImageOps.autocontrast(ImageOps.grayscale(img), cutoff=1)
+    return ImageOps.colorize(
+        gray,
+        black=params.get("black", "#2b1a0e"),
+        white=params.get("white", "#fff4e0"),
+        mid=params.get("mid", "#a0785a"),
+    )
+
+
+_PIPELINES = {
+    "enhance": enhance_image,
+    "filter": apply_filter,
+    "colorize": colorize_image,
+}
+
+
+def _open_limited(fh, max_dim):
+    """
+    Open an image from a file handle and bound its resolution.
+    For JPEGs draft() lets the decoder downscale while reading. Other formats
+    decode at full size, so anything still above PHOTO_ENHANCEMENT_MAX_PIXELS
+    is rejected from its header, before any pixels are loaded.
+    """
+    img = Image.open(fh)
+    img.draft("RGB", (max_dim, max_dim))
+    width, height = img.size
+    if width * height > _setting("PHOTO_ENHANCEMENT_MAX_PIXELS", 40_000_000):
+        raise ValueError(f"Image is too large to process ({width}x{height})")
+    img = ImageOps.exif_transpose(img)
+    img = img.convert("RGB")
+    if max(img.size) > max_dim:
+        img.thumbnail((max_dim, max_dim), Image.LANCZOS)
+    return img
+
+
+def process_image(fh, enhancement_type, params=None, max_dim=None):
+    """Run the pipeline for ``enhancement_type`` on an open file and return a PIL image."""
+    if enhancement_type not in _PIPELINES:
+        raise ValueError(f"Unsupported enhancement type '{enhancement_type}'")
+    max_dim = max_dim or _setting("PHOTO_ENHANCEMENT_MAX_DIMENSION", 2048)
+    img = _open_limited(fh, max_dim)
+    return _PIPELINES[enhancement_type](img, params or {})
+
+
+# ---------------------------------------------------------------------------
+# Background worker
+# ---------------------------------------------------------------------------
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=_setting("PHOTO_ENHANCEMENT_WORKERS", 2),
+            thread_name_prefix="photo-enhancer",
+        )
+    return _executor
+
+
+def run_enhancement(enhancement_id):
+    """
+    Process one PhotoEnhancement row. Runs on a worker thread, so it manages
+    its own DB connection and records failures on the row instead of raising.
+    """
+    from .models import PhotoEnhancement
+
+    close_old_connections()
+    try:
+        now = timezone.now()
+        # Claimed before started_at existed, or by a worker that is gone
+        stale = Q(started_at__isnull=True) | Q(started_at__lt=now - _timeout())
+        claimed = PhotoEnhancement.objects.filter(
+            Q(status="pending") | Q(stale, status="processing"),
+            id=enhancement_id,
+        ).update(status="processing", started_at=now)
+        if not claimed:
+            return
+
+        enh = PhotoEnhancement.objects.get(id=enhancement_id)
+        start = time.perf_counter()
+        try:
+            with enh.original_image.open("rb") as src:
+                result = process_image(src, enh.enhancement_type, enh.parameters)
+
+            base = os.path.splitext(os.path.basename(enh.original_image.name))[0]
+            with tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE) as out:
+                result.save(out, format="JPEG", quality=_setting("PHOTO_ENHANCEMENT_JPEG_QUALITY", 90), optimize=True)
+                out.seek(0)
+                enh.enhanced_image.save(f"{base}_{enh.enhancement_type}.jpg", File(out), save=False)
+
+            enh.status = "completed"
+            enh.error_message = ""
+        except Exception as e:
+            print(f"[PhotoEnhancer] Enhancement {enhancement_id} failed: {e}")
+            enh.status = "failed"
+            enh.error_message = str(e)
+
+        enh.processing_time = time.perf_counter() - start
+        enh.save(update_fields=["enhanced_image", "status", "error_message", "processing_time"])
+    finally:
+        close_old_connections()
+
+
+def schedule_enhancement(enhancement_id):
+    """Queue processing once the surrounding transaction has committed."""
+    transaction.on_commit(lambda: _get_executor().submit(run_enhancement, enhancement_id))
+
+
+def _timeout():
+    return timedelta(seconds=_setting("PHOTO_ENHANCEMENT_TIMEOUT", 600))
+
+
+def requeue_if_stale(enh):
+    """
+    Queue ``enh`` again if it has been pending or processing for longer than
+    PHOTO_ENHANCEMENT_TIMEOUT (its worker is gone). The same conditional
+    UPDATE puts it back to pending and restarts the clock on started_at, so
+    concurrent and later polls don't requeue it again until another timeout
+    has passed. Returns whether it was requeued.
+    """
+    from .models import PhotoEnhancement
+
+    now = timezone.now()
+    cutoff = now - _timeout()
+    if enh.status == "pending":
+        looks_stale = (enh.started_at or enh.created_at) < cutoff
+    elif enh.status == "processing":
+        looks_stale = enh.started_at is None or enh.started_at < cutoff
+    else:
+        looks_stale = False
+    if not looks_stale:
+        return False  # the common case: no query
+
+    stale = (
+        Q(status="pending") & (Q(started_at__lt=cutoff) | Q(started_at__isnull=True, created_at__lt=cutoff))
+        | Q(status="processing") & (Q(started_at__isnull=True) | Q(started_at__lt=cutoff))
+    )
+    requeued = PhotoEnhancement.objects.filter(stale, id=enh.id).update(status="pending", started_at=now)
+    if requeued:
+        print(f"[PhotoEnhancer] Requeueing stale enhancement {enh.id} ({enh.status})")
+        enh.status, enh.started_at = "pending", now
+        schedule_enhancement(enh.id)
+    return bool(requeued)
@@ -1,6 +1,7 @@
 # backend/ai_module/serializers.py
 from rest_framework import serializers
 from users.serializers import AbsoluteURLImageField
+from .photo_enhancer import CONTRAST_CUTOFF_RANGE, DENOISE_SIZE_RANGE, FILTER_LUTS, SHARPEN_RANGE
 from .models import (
     BreedDetection, DiseaseDetection, DietRecommendation,
     ChatSession, ChatMessage, PhotoEnhancement
@@ -65,4 +66,26 @@ class PhotoEnhancementSerializer(serializers.ModelSerializer):
     class Meta:
         model = PhotoEnhancement
         fields = "__all__"
-        read_only_fields = ["user", "processing_time", "created_at"]
\ No newline at end of file
+        read_only_fields = [
+            "user", "enhanced_image", "processing_time", "status", "started_at", "error_message", "created_at"
+        ]
+
+
+class PhotoEnhancementParametersSerializer(serializers.Serializer):
+    """
+    The ``parameters`` of a photo enhancement request. Kernel sizes and
+    strengths are bounded so a single request can't occupy a worker for long.
+    """
+    contrast_cutoff = serializers.FloatField(
+        required=False, min_value=CONTRAST_CUTOFF_RANGE[0], max_value=CONTRAST_CUTOFF_RANGE[1]
+    )
+    denoise = serializers.BooleanField(required=False)
+    denoise_size = serializers.IntegerField(
+        required=False, min_value=DENOISE_SIZE_RANGE[0], max_value=DENOISE_SIZE_RANGE[1]
+    )
+    sharpen = serializers.FloatField(required=False, min_value=SHARPEN_RANGE[0], max_value=SHARPEN_RANGE[1])
+    filter = serializers.ChoiceField(choices=sorted(FILTER_LUTS), required=False)
+    strength = serializers.FloatField(required=False, min_value=0.0, max_value=1.0)
+    black = serializers.CharField(required=False, max_length=32)
+    white = serializers.CharField(required=False, max_length=32)
+    mid = serializers.CharField(required=False, max_length=32)
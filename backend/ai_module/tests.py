@@ -1,3 +1,241 @@
-from django.test import TestCase
+"""
+Photo enhancement requests: 202 + polling the detail endpoint while the
+worker pool processes the upload, parameter bounds, and requeueing jobs
+whose worker went away (once per timeout), and the decoded size limit.
+Uploads are written to a temporary MEDIA_ROOT.
+Also breed name resolution for diet recommendations, and the Ollama prompt
+cache (with Ollama itself mocked out).
+"""
+import io
+import json
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from . import diet_service, ollama_service
+from .models import PhotoEnhancement
+from .ollama_service import PromptCache
+from .photo_enhancer import process_image, requeue_if_stale
+
+URL = '/api/ai/photo-enhancement/'
+
+
+def make_upload(name='pet.jpg'):
+    buf = io.BytesIO()
+    Image.new('RGB', (64, 48), (120, 80, 40)).save(buf, format='JPEG')
+    return SimpleUploadedFile(name, buf.getvalue(), content_type='image/jpeg')
+
+
+class PhotoEnhancementTests(TransactionTestCase):
+    # Processing runs on the worker pool's own connections, so rows must be
+    # committed for it to see them
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        overrides = override_settings(MEDIA_ROOT=media)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, enhancement_type='enhance', **parameters):
+        return self.client.post(URL, {
+            'image': make_upload(),
+            'enhancement_type': enhancement_type,
+            'parameters': json.dumps(parameters),
+        }, format='multipart')
+
+    def poll(self, pk, timeout=10):
+        deadline = time.monotonic() + timeout
+        while True:
+            response = self.client.get(f'{URL}{pk}/')
+            self.assertEqual(response.status_code, 200)
+            if response.data['status'] in ('completed', 'failed') or time.monotonic() > deadline:
+                return response.data
+            time.sleep(0.05)
+
+    def test_accepted_then_completed(self):
+        response = self.post(denoise_size=5, sharpen=1.5)
+        self.assertEqual(response.status_code, 202)
+        self.assertIn(response.data['status'], ('pending', 'processing', 'completed'))
+
+        data = self.poll(response.data['id'])
+        self.assertEqual(data['status'], 'completed', data['error_message'])
+        self.assertTrue(data['enhanced_image'])
+        self.assertIsNotNone(data['processing_time'])
+
+    def test_filter(self):
+        data = self.poll(self.post('filter', filter='noir').data['id'])
+        self.assertEqual(data['status'], 'completed', data['error_message'])
+
+    def test_parameters_are_bounded(self):
+        for parameters in ({'denoise_size': 99}, {'denoise_size': 1}, {'sharpen': 50}, {'filter': 'nope'}):
+            with self.subTest(parameters=parameters):
+                response = self.post(**parameters)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(parameters)), response.data['parameters'])
+        self.assertFalse(PhotoEnhancement.objects.exists())
+
+    def test_unknown_type_is_rejected(self):
+        self.assertEqual(self.post('background').status_code, 400)
+
+    def _stuck(self, status, age):
+        enh = PhotoEnhancement.objects.create(
+            user=self.user, original_image=make_upload(), enhancement_type='enhance', status=status,
+        )
+        stamp = timezone.now() - age
+        PhotoEnhancement.objects.filter(pk=enh.pk).update(created_at=stamp, started_at=stamp if status == 'processing' else None)
+        return enh
+
+    def test_job_of_a_dead_worker_is_requeued(self):
+        for status in ('pending', 'processing'):
+            with self.subTest(status=status):
+                enh = self._stuck(status, timedelta(hours=1))
+                data = self.poll(enh.pk)
+                self.assertEqual(data['status'], 'completed', data['error_message'])
+
+    def test_running_job_is_left_alone(self):
+        enh = self._stuck('processing', timedelta(seconds=5))
+        response = self.client.get(f'{URL}{enh.pk}/')
+        self.assertEqual(response.data['status'], 'processing')
+
+    def test_stale_job_is_requeued_once_per_timeout(self):
+        for status in ('pending', 'processing'):
+            with self.subTest(status=status):
+                enh = self._stuck(status, timedelta(hours=1))
+                with mock.patch('ai_module.photo_enhancer.schedule_enhancement') as schedule:
+                    # Two polls that both loaded the row before either requeued it
+                    first, second = (PhotoEnhancement.objects.get(pk=enh.pk) for _ in range(2))
+                    self.assertTrue(requeue_if_stale(first))
+                    self.assertFalse(requeue_if_stale(second))
+                    self.assertFalse(requeue_if_stale(PhotoEnhancement.objects.get(pk=enh.pk)))
+                schedule.assert_called_once_with(enh.pk)
+                self.assertEqual(PhotoEnhancement.objects.get(pk=enh.pk).status, 'pending')
+
+
+def encode(size, format):
+    buf = io.BytesIO()
+    Image.new('RGB', size, (120, 80, 40)).save(buf, format=format)
+    buf.seek(0)
+    return buf
+
+
+@override_settings(PHOTO_ENHANCEMENT_MAX_PIXELS=200 * 150)
+class DecodeLimitTests(SimpleTestCase):
+
+    def test_oversized_images_are_rejected_before_decoding(self):
+        for format in ('PNG', 'WEBP'):
+            with self.subTest(format=format):
+                upload = encode((400, 300), format)
+                with mock.patch.object(Image.Image, 'load') as load:
+                    with self.assertRaisesMessage(ValueError, 'too large'):
+                        process_image(upload, 'enhance')
+                load.assert_not_called()
+
+    def test_jpegs_are_downscaled_while_decoding(self):
+        # draft() decodes at half size, which is within the limit
+        img = process_image(encode((400, 300), 'JPEG'), 'enhance', max_dim=100)
+        self.assertLessEqual(max(img.size), 100)
+
+
+class BreedResolutionTests(SimpleTestCase):
+
+    def setUp(self):
+        diet_service._resolve_in_index.cache_clear()
+
+    def test_aliases_and_typos_resolve_to_dataset_keys(self):
+        self.assertEqual(diet_service._resolve_breed_key('golden retriever'), 'Golden_retriever')
+        self.assertEqual(diet_service._resolve_breed_key('Chinese-Crested'), 'Chinese_crested')
+        self.assertEqual(diet_service._resolve_breed_key('Chihuahuaa'), 'Chihuahua')
+
+    def test_cache_is_bounded(self):
+        # Breed names come from clients; arbitrary ones must not grow memory
+        maxsize = diet_service._resolve_in_index.cache_info().maxsize
+        for n in range(maxsize + 100):
+            diet_service._resolve_breed_key(f'made up breed {n}')
+        self.assertEqual(diet_service._resolve_in_index.cache_info().currsize, maxsize)
+
+    def test_reload_clears_the_cache(self):
+        diet_service._resolve_breed_key('golden retriever')
+        diet_service.reload_diet_data()
+        self.assertEqual(diet_service._resolve_in_index.cache_info().currsize, 0)
+
+
+class PromptCacheTests(SimpleTestCase):
+
+    def test_key_ignores_case_and_whitespace_only(self):
+        key = PromptCache.make_key('llama', 'system', [{'role': 'user', 'content': 'How often  should I\nfeed my puppy? '}])
+        self.assertEqual(key, PromptCache.make_key('llama', 'system', [{'role': 'user', 'content': 'how often should i feed my puppy?'}]))
+        for model, system, role in (('mistral', 'system', 'user'), ('llama', 'other', 'user'), ('llama', 'system', 'assistant')):
+            with self.subTest(model=model, system=system, role=role):
+                self.assertNotEqual(key, PromptCache.make_key(model, system, [{'role': role, 'content': 'how often should i feed my puppy?'}]))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = PromptCache(max_entries=2)
+        cache.set('a', {'content': 'A'}, 1.0)
+        cache.set('b', {'content': 'B'}, 1.0)
+        cache.get('a')
+        cache.set('c', {'content': 'C'}, 1.0)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual([cache.get(k)['content'] for k in ('a', 'c')], ['A', 'C'])
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_entries_expire(self):
+        cache = PromptCache(ttl=60)
+        with mock.patch('ai_module.ollama_service.time.monotonic', return_value=1000.0):
+            cache.set('a', {'content': 'A'}, 2.5)
+        with mock.patch('ai_module.ollama_service.time.monotonic', return_value=1059.0):
+            self.assertEqual(cache.get('a'), {'content': 'A'})
+        with mock.patch('ai_module.ollama_service.time.monotonic', return_value=1061.0):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['saved_seconds'], 2.5)
+
+
+class ChatPromptCacheTests(TestCase):
+    """The chat's first question is only cached once its temperature is lowered"""
+
+    def setUp(self):
+        ollama_service.clear_prompt_cache()
+        self.addCleanup(ollama_service.clear_prompt_cache)
+        reply = mock.Mock(status_code=200)
+        reply.json.return_value = {'message': {'content': 'Three times a day.'}}
+        available = mock.patch.object(ollama_service, 'check_ollama_available', return_value=True)
+        post = mock.patch.object(ollama_service, '_post', return_value=reply)
+        available.start()
+        self.post = post.start()
+        self.addCleanup(mock.patch.stopall)
+
+    def ask_first_question(self, username):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username=username, email=f'{username}@example.com', password='x'))
+        session = client.post('/api/ai/chat-sessions/', {}, format='json').data
+        response = client.post(
+            f'/api/ai/chat-sessions/{session["id"]}/send_message/',
+            {'message': 'How often should I feed my puppy?'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data['cached']
+
+    def test_off_at_the_default_temperature(self):
+        self.assertEqual([self.ask_first_question(name) for name in ('ann', 'ben')], [False, False])
+        self.assertEqual(self.post.call_count, 2)
+
+    @override_settings(OLLAMA_FIRST_QUESTION_TEMPERATURE=0.2)
+    def test_on_below_the_threshold(self):
+        self.assertEqual([self.ask_first_question(name) for name in ('ann', 'ben')], [False, True])
+        self.assertEqual(self.post.call_count, 1)
+        self.assertEqual(ollama_service.get_prompt_cache_stats()['hits'], 1)
@@ -4,8 +4,10 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from django.conf import settings
 import time
 import os
+import json
 
 from .models import (
     BreedDetection, DiseaseDetection, DietRecommendation,
@@ -13,11 +15,15 @@ from .models import (
 )
 from .serializers import (
     BreedDetectionSerializer, DiseaseDetectionSerializer, DietRecommendationSerializer,
-    ChatSessionSerializer, ChatMessageSerializer, PhotoEnhancementSerializer
+    ChatSessionSerializer, ChatMessageSerializer, PhotoEnhancementSerializer,
+    PhotoEnhancementParametersSerializer,
 )
 
 # Import the breed detector ML service
-from .breed_detector import detect_breed_from_image, load_models, is_models_loaded
+from .breed_detector import (
+    detect_breed_from_image, detect_breeds_from_images, load_models, is_models_loaded
+)
+from .photo_enhancer import SUPPORTED_TYPES as SUPPORTED_ENHANCEMENTS, requeue_if_stale, schedule_enhancement
 
 
 class BreedDetectionViewSet(viewsets.ModelViewSet):
@@ -88,6 +94,81 @@ class BreedDetectionViewSet(viewsets.ModelViewSet):
             
         return Response(response_data, status=201)
 
+    @action(detail=False, methods=["post"], url_path="batch")
+    def batch(self, request):
+        """
+        Detect breeds for several images in one request.
+        POST multipart with repeated "images" fields; all images are run
+        through the model as a single tensor batch.
+        """
+        start = time.time()
+        files = request.FILES.getlist("images")
+        if not files:
+            return Response({"error": "No images provided"}, status=400)
+
+        max_batch = getattr(settings, "BREED_DETECTION_MAX_BATCH", 10)
+        if len(files) > max_batch:
+            return Response(
+                {"error": f"A maximum of {max_batch} images can be processed per request"},
+                status=400,
+            )
+
+        # Store the uploads first so the detector can read them from disk;
+        # rows are inserted afterwards in a single bulk_create.
+        detections = []
+        for upload in files:
+            det = BreedDetection(user=request.user)
+            det.image.save(upload.name, upload, save=False)
+            detections.append(det)
+
+        inference_start = time.time()
+        try:
+            results = detect_breeds_from_images([det.image.path for det in detections])
+        except Exception as e:
+            results = [{"success": False, "error": str(e), "model_version": "error"} for _ in detections]
+        inference_time = time.time() - inference_start
+
+        per_image_time = (time.time() - start) / len(detections)
+        for det, result in zip(detections, results):
+            if result.get("success"):
+                det.detected_breed = result["detected_breed"]
+                det.confidence = result["confidence"]
+                det.alternative_breeds = result["alternative_breeds"]
+                det.model_version = result.get("model_version", "ResNet50-v1.0")
+                det.is_dog = result.get("is_dog", False)
+                det.is_human = result.get("is_human", False)
+            else:
+                det.detected_breed = "Error" if result.get("model_version") == "error" else "Unknown"
+                det.confidence = 0.0
+                det.alternative_breeds = []
+                det.model_version = result.get("model_version", "ResNet50-v1.0")
+                det.is_dog = False
+                det.is_human = False
+            det.processing_time = per_image_time
+
+        detections = BreedDetection.objects.bulk_create(detections)
+
+        ser = self.get_serializer(detections, many=True)
+        items = []
+        for data, result in zip(ser.data, results):
+            item = {**data}
+            if not result.get("success"):
+                item["error"] = result.get("error", "Detection failed")
+            items.append(item)
+
+        total_time = time.time() - start
+        return Response(
+            {
+                "results": items,
+                "count": len(items),
+                "successful": sum(1 for r in results if r.get("success")),
+                "inference_time": inference_time,
+                "total_processing_time": total_time,
+                "average_processing_time": total_time / len(items),
+            },
+            status=201,
+        )
+
 
 class DiseaseDetectionViewSet(viewsets.ModelViewSet):
     queryset = DiseaseDetection.objects.all()
@@ -264,6 +345,56 @@ class DietRecommendationViewSet(viewsets.ModelViewSet):
             status=201
         )
 
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Generate recommendations for several pets in one call.
+        Body: {"pet_ids": [...]} – omit to cover every pet the user owns.
+        """
+        from users.models import PetProfile
+        from .diet_service import generate_diet_recommendations_bulk
+
+        pets = PetProfile.objects.filter(owner=request.user)
+        pet_ids = request.data.get("pet_ids")
+        missing = []
+        if pet_ids:
+            if isinstance(pet_ids, str):
+                pet_ids = pet_ids.split(",")
+            try:
+                pet_ids = [int(pid) for pid in pet_ids]
+            except (TypeError, ValueError):
+                return Response({"error": "pet_ids must be a list of integers"}, status=400)
+            pets = pets.filter(id__in=pet_ids)
+        pets = list(pets.order_by("id"))
+        if pet_ids:
+            found = {pet.id for pet in pets}
+            missing = [pid for pid in pet_ids if pid not in found]
+        if not pets:
+            return Response({"error": "No pets found", "missing_pet_ids": missing}, status=404)
+
+        generated = generate_diet_recommendations_bulk(
+            pets,
+            allergies=request.data.get("allergies", ""),
+            health_conditions=request.data.get("health_conditions", ""),
+            special_considerations=request.data.get("special_considerations", ""),
+        )
+
+        recs, extras = [], []
+        for pet, result in generated:
+            extras.append(result.pop("_extra", {}))
+            recs.append(DietRecommendation(user=request.user, pet=pet, **result))
+        recs = DietRecommendation.objects.bulk_create(recs)
+
+        ser = self.get_serializer(recs, many=True)
+        return Response(
+            {
+                "count": len(recs),
+                "results": [{**row, **extra} for row, extra in zip(ser.data, extras)],
+                "missing_pet_ids": missing,
+            },
+            status=201
+        )
+
 
 class ChatSessionViewSet(viewsets.ModelViewSet):
     queryset = ChatSession.objects.all()
@@ -317,9 +448,15 @@ class ChatSessionViewSet(viewsets.ModelViewSet):
         # Add current message
         messages.append({"role": "user", "content": message})
         
+        # Opening questions tend to be FAQ-style ("how often should I feed
+        # my puppy?"); OLLAMA_FIRST_QUESTION_TEMPERATURE can lower their
+        # temperature so repeats are served from the prompt cache.
+        is_first_question = not any(m.role == "user" and m.id != user_msg.id for m in history)
+        temperature = getattr(settings, "OLLAMA_FIRST_QUESTION_TEMPERATURE", 0.7) if is_first_question else 0.7
+
         # Call Ollama
         start = time.time()
-        result = chat_with_ollama(messages)
+        result = chat_with_ollama(messages, temperature=temperature)
         response_time = time.time() - start
         
         if result["success"]:
@@ -346,6 +483,7 @@ class ChatSessionViewSet(viewsets.ModelViewSet):
         return Response({
             "user_message": ser_user.data,
             "ai_message": ser_ai.data,
+            "cached": result.get("cached", False),
             "ollama_available": check_ollama_available(),
         })
 
@@ -368,24 +506,42 @@ class PhotoEnhancementViewSet(viewsets.ModelViewSet):
         if "image" not in request.FILES:
             return Response({"error": "No image provided"}, status=400)
 
+        enhancement_type = request.data.get("enhancement_type", "enhance")
+        if enhancement_type not in SUPPORTED_ENHANCEMENTS:
+            return Response(
+                {"error": f"enhancement_type must be one of: {', '.join(SUPPORTED_ENHANCEMENTS)}"},
+                status=400,
+            )
+
+        parameters = request.data.get("parameters", {})
+        if isinstance(parameters, str):
+            # Multipart requests send the parameters as a JSON string
+            try:
+                parameters = json.loads(parameters) if parameters else {}
+            except ValueError:
+                return Response({"error": "parameters must be a JSON object"}, status=400)
+        if not isinstance(parameters, dict):
+            return Response({"error": "parameters must be a JSON object"}, status=400)
+        params_ser = PhotoEnhancementParametersSerializer(data=parameters)
+        if not params_ser.is_valid():
+            return Response({"error": "Invalid parameters", "parameters": params_ser.errors}, status=400)
+
         enh = PhotoEnhancement.objects.create(
             user=request.user,
             original_image=request.FILES["image"],
-            enhancement_type=request.data.get("enhancement_type", "enhance")
+            enhancement_type=enhancement_type,
+            parameters=params_ser.validated_data,
         )
 
-        # TODO: plug actual image processing
-        enh.enhanced_image = enh.original_image
-        enh.processing_time = 0.2
-        enh.parameters = request.data.get("parameters", {})
-        enh.save()
+        # Processing happens on the worker pool; poll the detail endpoint
+        # until status is "completed" or "failed".
+        schedule_enhancement(enh.id)
 
         ser = self.get_serializer(enh)
-        return Response(
-            {
-                **ser.data,
-                "message": "TODO: Integrate image enhancement model",
-                "note": "Returning original as enhanced"
-            },
-            status=201
-        )
\ No newline at end of file
+        return Response(ser.data, status=202)
+
+    def retrieve(self, request, *args, **kwargs):
+        enh = self.get_object()
+        # Clients poll here; pick up jobs whose worker went away
+        requeue_if_stale(enh)
+        return Response(self.get_serializer(enh).data)
\ No newline at end of file
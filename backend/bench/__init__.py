@@ -0,0 +1,5 @@
+"""
+Reproducible API benchmarks: a seeded data generator (bench.generator),
+scripted request scenarios (bench.scenarios) and a runner reporting latency
+percentiles and query counts as JSON (bench.runner). See bench/README.md.
+"""
@@ -0,0 +1,77 @@
+"""
+python -m bench [--scale small] [--seed 42] [--iterations 50] [--output run.json]
+
+Creates a throwaway database (Django's test database for the configured
+backend), fills it with bench.generator, runs the scenarios and prints or
+writes the JSON report. --compare prints deltas against an earlier report.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pawjeevan_backend.settings')
+
+
+def parse_args(argv=None):
+    from bench.generator import SCALES
+    from bench.scenarios import SCENARIOS
+
+    parser = argparse.ArgumentParser(prog='python -m bench', description='PawJeevan API benchmarks')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per scenario')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), dest='scenarios',
+                        help='Run only this scenario (repeatable)')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    parser.add_argument('--compare', help='Earlier JSON report to compare against')
+    parser.add_argument('--keepdb', action='store_true', help='Keep the bench database afterwards')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    import django
+
+    django.setup()
+    from django.conf import settings
+    from django.test.utils import setup_test_environment
+
+    from bench.generator import generate
+    from bench.runner import compare, create_bench_db, destroy_bench_db, metadata, run_scenario
+    from bench.scenarios import SCENARIOS, Context
+
+    args = parse_args(argv)
+    setup_test_environment(debug=False)
+    # Slow requests are expected here; don't fill the log table or stderr
+    settings.PROFILING_SAMPLE_RATE = 0
+    logging.getLogger('pawjeevan.profiling').setLevel(logging.ERROR)
+
+    old_name = create_bench_db()
+    try:
+        print(f'Generating {args.scale} dataset (seed {args.seed})...', file=sys.stderr)
+        dataset = generate(args.seed, args.scale)
+        ctx = Context(dataset, args.seed)
+        report = {'meta': metadata(dataset, args.iterations, args.warmup), 'scenarios': {}}
+        for name in args.scenarios or SCENARIOS:
+            print(f'  {name}', file=sys.stderr)
+            report['scenarios'][name] = run_scenario(SCENARIOS[name](ctx), args.iterations, args.warmup)
+    finally:
+        if not args.keepdb:
+            destroy_bench_db(old_name)
+
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+        print(f'Wrote {args.output}', file=sys.stderr)
+    else:
+        print(text)
+    if args.compare:
+        print(compare(report, json.loads(Path(args.compare).read_text())), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+python -m bench.db_writes [--threads 8] [--seconds 10] [--journal wal|rollback]
+
+Write throughput of the configured database (DB_PROFILE) under concurrent
+writers. Each thread has its own connection and runs a mix of the writes
+the API does most: toggling a post like, adding to a cart, and placing an
+order (order + items + stock decrement + sales facts), each in its own
+transaction. Reports transactions per second, latency percentiles and
+errors (e.g. "database is locked") as JSON.
+
+--journal rollback reproduces the old SQLite setup (rollback journal,
+deferred transactions, 5 s busy timeout) for comparison. For PostgreSQL run
+with DB_PROFILE=postgres against a local server, e.g.
+
+    docker run --rm -e POSTGRES_USER=pawjeevan -e POSTGRES_PASSWORD=pawjeevan -p 5432:5432 postgres:16
+    DB_PROFILE=postgres DB_PASSWORD=pawjeevan python -m bench.db_writes --threads 16
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pawjeevan_backend.settings')
+
+OPERATIONS = (('like', 0.4), ('cart', 0.4), ('order', 0.2))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.db_writes', description='Concurrent write benchmark')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--journal', choices=('wal', 'rollback'), default='wal',
+                        help='SQLite only: rollback reproduces the untuned default configuration')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    return parser.parse_args(argv)
+
+
+class Writer(threading.Thread):
+    def __init__(self, index, dataset, seed, deadline):
+        super().__init__(name=f'writer-{index}')
+        self.rng = random.Random(f'{seed}:{index}')
+        self.dataset = dataset
+        self.deadline = deadline
+        self.latencies = {name: [] for name, _ in OPERATIONS}
+        self.errors = Counter()
+
+    def like(self, user_id):
+        from community.models import Post
+
+        post = Post.objects.get(pk=self.rng.choice(self.dataset.post_ids))
+        if post.likes.filter(pk=user_id).exists():
+            post.likes.remove(user_id)
+        else:
+            post.likes.add(user_id)
+
+    def cart(self, user_id):
+        from django.db.models import F
+
+        from store.models import Cart, CartItem, Product
+
+        cart, _ = Cart.objects.get_or_create(user_id=user_id)
+        product = Product.objects.get(pk=self.rng.choice(self.dataset.product_ids))
+        item, created = CartItem.objects.get_or_create(
+            cart=cart, product=product,
+            defaults={'quantity': 1, 'product_name': product.name, 'product_price': product.final_price},
+        )
+        if not created:
+            CartItem.objects.filter(pk=item.pk).update(quantity=F('quantity') + 1)
+
+    def order(self, user_id):
+        from django.db.models import F
+
+        from store.analytics import record_order_facts
+        from store.models import Order, OrderItem, Product
+
+        products = list(Product.objects.filter(pk__in=self.rng.sample(self.dataset.product_ids, 2)))
+        subtotal = sum(p.final_price for p in products)
+        order = Order.objects.create(
+            user_id=user_id, order_number=f'ORD-{uuid.uuid4().hex[:12].upper()}', delivery_method='shipping',
+            shipping_address='1 Bench Street', shipping_city='Kathmandu', shipping_state='Bagmati',
+            shipping_zip='44600', shipping_phone='9800000000', subtotal=subtotal, total=subtotal,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=p, product_name=p.name, product_sku=p.sku,
+                      product_price=p.final_price, quantity=1)
+            for p in products
+        ])
+        Product.objects.filter(pk__in=[p.pk for p in products]).update(stock=F('stock') - 1)
+        record_order_facts(order)
+
+    def run(self):
+        from django.db import OperationalError, connection, transaction
+
+        names = [name for name, _ in OPERATIONS]
+        weights = [weight for _, weight in OPERATIONS]
+        try:
+            while time.monotonic() < self.deadline:
+                name = self.rng.choices(names, weights)[0]
+                user_id = self.rng.choice(self.dataset.user_ids)
+                start = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        getattr(self, name)(user_id)
+                except OperationalError as exc:
+                    self.errors[f'{name}: {exc}'] += 1
+                    continue
+                self.latencies[name].append(time.perf_counter() - start)
+        finally:
+            connection.close()
+
+
+def use_rollback_journal(connection):
+    """Switch the bench database back to SQLite's defaults"""
+    connection.close()
+    connection.settings_dict['OPTIONS'] = {}
+    connection.settings_dict['CONN_MAX_AGE'] = 0
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=DELETE')
+    connection.close()
+
+
+def summarise(writers, elapsed):
+    from bench.runner import _ms, percentile
+
+    report = {'transactions': 0, 'per_second': 0, 'operations': {}, 'errors': {}}
+    for name, _ in OPERATIONS:
+        timings = sorted(t for w in writers for t in w.latencies[name])
+        report['operations'][name] = {
+            'count': len(timings),
+            'per_second': round(len(timings) / elapsed, 1),
+            **{f'p{p}_ms': _ms(percentile(timings, p)) if timings else None for p in (50, 95, 99)},
+        }
+        report['transactions'] += len(timings)
+    report['per_second'] = round(report['transactions'] / elapsed, 1)
+    errors = Counter()
+    for writer in writers:
+        errors.update(writer.errors)
+    report['errors'] = dict(errors.most_common())
+    report['error_count'] = sum(errors.values())
+    return report
+
+
+def main(argv=None):
+    import django
+
+    django.setup()
+    from django.conf import settings
+    from django.db import connection
+
+    from bench.generator import generate
+    from bench.runner import create_bench_db, destroy_bench_db, git_commit
+
+    args = parse_args(argv)
+    settings.PROFILING_SAMPLE_RATE = 0
+    logging.getLogger('pawjeevan.profiling').setLevel(logging.ERROR)
+
+    old_name = create_bench_db()
+    try:
+        print('Generating dataset...', file=sys.stderr)
+        dataset = generate(args.seed, 'small')
+        journal = None
+        if connection.vendor == 'sqlite':
+            if args.journal == 'rollback':
+                use_rollback_journal(connection)
+            with connection.cursor() as cursor:
+                journal = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+        connection.close()
+
+        print(f'Running {args.threads} writers for {args.seconds:g}s...', file=sys.stderr)
+        start = time.monotonic()
+        writers = [Writer(i, dataset, args.seed, start + args.seconds) for i in range(args.threads)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        elapsed = time.monotonic() - start
+    finally:
+        destroy_bench_db(old_name)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'database': connection.vendor,
+            'db_profile': settings.DB_PROFILE,
+            'journal_mode': journal,
+            'pooled': bool(connection.settings_dict['OPTIONS'].get('pool')),
+            'threads': args.threads,
+            'seconds': round(elapsed, 2),
+        },
+        **summarise(writers, elapsed),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+        print(f'Wrote {args.output}', file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,390 @@
+"""
+Seeded synthetic data for benchmarks.
+
+generate(seed, scale) fills an (empty) database with users and a skewed
+follower graph, products with images and reviews, carts and past orders,
+posts with likes and nested comments, groups with members and messages,
+events with attendees, notifications, and per-user records (pets, AI
+history, adoption and lost/found listings). The same seed and scale always
+produce the same rows, so runs on different commits measure the same data.
+
+Rows are written with bulk_create, which bypasses the model signals, so the
+denormalised follower counts are recomputed at the end.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from ai_module.models import (
+    BreedDetection, ChatMessage, ChatSession, DietRecommendation, DiseaseDetection, PhotoEnhancement,
+)
+from community.models import Comment, Event, Group, GroupMessage, GroupPost, LostFoundReport, Post
+from store.models import (
+    AdoptionListing, Brand, Cart, CartItem, Category, Order, OrderItem, Product, ProductImage, Review,
+    Wishlist,
+)
+from store.analytics import backfill_order_facts
+from users.follows import Follow, refresh_follow_counts
+from users.models import MedicalRecord, Notification, PetProfile, User, VaccinationRecord
+
+PASSWORD = 'bench-password'
+
+SCALES = {
+    'small': {
+        'users': 200, 'follows_per_user': 15, 'categories': 8, 'brands': 10,
+        'products': 300, 'images_per_product': 3, 'reviews_per_product': 5,
+        'cart_items': 3, 'orders_per_user': 2, 'items_per_order': 3,
+        'posts': 1000, 'likes_per_post': 10, 'comments_per_post': 4, 'reply_ratio': 0.5,
+        'groups': 20, 'members_per_group': 30, 'messages_per_group': 100,
+        'events': 30, 'attendees_per_event': 40, 'notifications_per_user': 30,
+        'group_posts_per_group': 10, 'power_user_rows': 25,
+    },
+    'medium': {
+        'users': 2000, 'follows_per_user': 40, 'categories': 12, 'brands': 30,
+        'products': 2000, 'images_per_product': 4, 'reviews_per_product': 10,
+        'cart_items': 4, 'orders_per_user': 3, 'items_per_order': 3,
+        'posts': 10000, 'likes_per_post': 25, 'comments_per_post': 6, 'reply_ratio': 0.5,
+        'groups': 100, 'members_per_group': 150, 'messages_per_group': 300,
+        'events': 150, 'attendees_per_event': 200, 'notifications_per_user': 60,
+        'group_posts_per_group': 30, 'power_user_rows': 25,
+    },
+}
+
+WORDS = (
+    'dog cat puppy kitten walk treat leash collar food bowl toy ball park vet '
+    'groom bath brush sleep play fetch train sit stay paw tail fur happy'
+).split()
+
+ORDER_STATUSES = ['pending', 'processing', 'shipped', 'delivered', 'delivered', 'cancelled']
+
+
+class Dataset:
+    """Ids of the generated rows, for scenarios to pick from"""
+
+    def __init__(self, seed, scale):
+        self.seed = seed
+        self.scale = scale
+        self.user_ids = []
+        self.product_ids = []
+        self.product_slugs = []
+        self.post_ids = []
+        self.group_ids = []
+        self.event_ids = []
+        self.counts = {}
+
+    def as_dict(self):
+        return {'seed': self.seed, 'scale': self.scale, 'rows': self.counts}
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def _skewed(rng, population, k):
+    """k distinct picks, favouring the start of population (a few popular items)"""
+    k = min(k, len(population))
+    picks = set()
+    while len(picks) < k:
+        # Squaring a uniform draw puts most picks near the front
+        picks.add(population[int(rng.random() ** 2 * len(population))])
+    return list(picks)
+
+
+def _sample(rng, population, k):
+    return rng.sample(population, min(k, len(population)))
+
+
+def _choices(model_choices):
+    return [choice for choice, _ in model_choices]
+
+
+def _per_user_records(rng, cfg, user_ids, products, groups):
+    """
+    One of each per-user record for every user, plus enough for the first
+    user (a heavy user) to fill a page of every list endpoint.
+    """
+    today = timezone.localdate()
+    owners = user_ids + [user_ids[0]] * cfg['power_user_rows']
+
+    pets = PetProfile.objects.bulk_create([
+        PetProfile(
+            owner_id=owner, name=f'Pet {n}', pet_type=rng.choice(_choices(PetProfile.PET_TYPE_CHOICES)),
+            breed=rng.choice(['Labrador', 'Beagle', 'Persian', 'Mixed']),
+            gender=rng.choice(_choices(PetProfile.GENDER_CHOICES)),
+            date_of_birth=today - timedelta(days=rng.randint(60, 4000)),
+            weight=Decimal(rng.randrange(10, 600)) / 10,
+        )
+        for n, owner in enumerate(owners)
+    ])
+    VaccinationRecord.objects.bulk_create([
+        VaccinationRecord(
+            pet=pet, vaccine_name=rng.choice(['Rabies', 'DHPP', 'FVRCP']),
+            vaccination_date=today - timedelta(days=rng.randint(1, 365)),
+            next_due_date=today + timedelta(days=rng.randint(1, 365)),
+        )
+        for pet in pets
+    ])
+    MedicalRecord.objects.bulk_create([
+        MedicalRecord(
+            pet=pet, record_type=rng.choice(_choices(MedicalRecord.RECORD_TYPE_CHOICES)),
+            title=_text(rng, 3), description=_text(rng, 15), date=today - timedelta(days=rng.randint(1, 365)),
+        )
+        for pet in pets
+    ])
+    pet_of = {}
+    for pet in pets:
+        pet_of.setdefault(pet.owner_id, pet)
+
+    LostFoundReport.objects.bulk_create([
+        LostFoundReport(
+            report_type=rng.choice(_choices(LostFoundReport.REPORT_TYPES)), pet_name=f'Pet {n}', pet_type='dog',
+            color='brown', description=_text(rng, 15), location='Kathmandu', address='1 Bench Street',
+            date_lost_found=today - timedelta(days=rng.randint(0, 30)), reporter_id=owner,
+            contact_phone='9800000000',
+        )
+        for n, owner in enumerate(owners)
+    ])
+    AdoptionListing.objects.bulk_create([
+        AdoptionListing(
+            title=_text(rng, 4), pet_name=f'Pet {n}', pet_type=rng.choice(_choices(AdoptionListing.PET_TYPE_CHOICES)),
+            age=rng.randint(2, 120), gender=rng.choice(['male', 'female']), description=_text(rng, 20),
+            health_status='Healthy', vaccination_status='Up to date', poster_id=owner,
+            contact_phone='9800000000', contact_email=f'bench_user_{owner}@example.com', location='Kathmandu',
+        )
+        for n, owner in enumerate(owners)
+    ])
+    GroupPost.objects.bulk_create([
+        GroupPost(group=group, author_id=rng.choice(user_ids), content=_text(rng, 20))
+        for group in groups
+        for _ in range(cfg['group_posts_per_group'])
+    ])
+    wishlists = Wishlist.objects.bulk_create([Wishlist(user_id=user_id) for user_id in user_ids])
+    WishlistProduct = Wishlist.products.through
+    WishlistProduct.objects.bulk_create([
+        WishlistProduct(wishlist_id=wishlist.id, product_id=product.id)
+        for wishlist in wishlists
+        for product in _skewed(rng, products, 5)
+    ])
+
+    BreedDetection.objects.bulk_create([
+        BreedDetection(
+            user_id=owner, image=f'breed_detection/bench_{n}.jpg', detected_breed='Labrador',
+            confidence=rng.uniform(50, 99), alternative_breeds=[{'breed': 'Beagle', 'confidence': 10.0}],
+        )
+        for n, owner in enumerate(owners)
+    ])
+    DiseaseDetection.objects.bulk_create([
+        DiseaseDetection(
+            user_id=owner, pet=pet_of[owner], image=f'disease_detection/bench_{n}.jpg',
+            disease_type=rng.choice(_choices(DiseaseDetection.DISEASE_TYPES)), detected_disease='Analysis Complete',
+            confidence=rng.uniform(0.3, 0.9),
+        )
+        for n, owner in enumerate(owners)
+    ])
+    DietRecommendation.objects.bulk_create([
+        DietRecommendation(
+            user_id=owner, pet=pet_of[owner], recommended_diet=_text(rng, 20),
+            daily_calories=rng.randint(200, 1500), feeding_frequency='Twice a day', food_types=['dry', 'wet'],
+        )
+        for owner in owners
+    ])
+    sessions = ChatSession.objects.bulk_create([ChatSession(user_id=owner, title=_text(rng, 3)) for owner in owners])
+    ChatMessage.objects.bulk_create([
+        ChatMessage(session=session, role=role, content=_text(rng, 20))
+        for session in sessions
+        for role in ('user', 'assistant', 'user', 'assistant')
+    ])
+    PhotoEnhancement.objects.bulk_create([
+        PhotoEnhancement(
+            user_id=owner, original_image=f'photo_enhancement/original/bench_{n}.jpg',
+            enhancement_type=rng.choice(_choices(PhotoEnhancement.ENHANCEMENT_TYPES)), status='completed',
+        )
+        for n, owner in enumerate(owners)
+    ])
+    return len(pets)
+
+
+@transaction.atomic
+def generate(seed=42, scale='small'):
+    """Populate the database; returns a Dataset"""
+    rng = random.Random(seed)
+    cfg = SCALES[scale]
+    data = Dataset(seed, scale)
+    now = timezone.now()
+
+    # Users and follower graph
+    password = make_password(PASSWORD)
+    users = User.objects.bulk_create([
+        User(
+            username=f'bench_user_{i}', email=f'bench_user_{i}@example.com', password=password,
+            bio=_text(rng, 12), location=rng.choice(['Kathmandu', 'Pokhara', 'Lalitpur', 'Biratnagar']),
+            is_verified=True,
+        )
+        for i in range(cfg['users'])
+    ])
+    data.user_ids = user_ids = [u.id for u in users]
+    follows = []
+    for follower in user_ids:
+        for followed in _skewed(rng, user_ids, cfg['follows_per_user']):
+            if followed != follower:
+                # from_user is followed by to_user (see users.follows)
+                follows.append(Follow(from_user_id=followed, to_user_id=follower))
+    Follow.objects.bulk_create(follows)
+    refresh_follow_counts(user_ids)
+
+    # Catalogue
+    categories = Category.objects.bulk_create([
+        Category(name=f'Bench Category {i}', slug=f'bench-category-{i}', description=_text(rng, 8))
+        for i in range(cfg['categories'])
+    ])
+    brands = Brand.objects.bulk_create([
+        Brand(name=f'Bench Brand {i}', slug=f'bench-brand-{i}', description=_text(rng, 8))
+        for i in range(cfg['brands'])
+    ])
+    products = []
+    for i in range(cfg['products']):
+        price = Decimal(rng.randrange(100, 20000)) / 10
+        products.append(Product(
+            name=f'Bench product {i}', slug=f'bench-product-{i}', description=_text(rng, 40),
+            category=rng.choice(categories), brand=rng.choice(brands), pet_type=rng.choice(_choices(Product.PET_TYPE_CHOICES)),
+            price=price, discount_price=(price * Decimal('0.9')).quantize(Decimal('0.01')) if rng.random() < 0.3 else None,
+            stock=10 ** 6, sku=f'BENCH-{i:06d}', is_featured=rng.random() < 0.05,
+        ))
+    products = Product.objects.bulk_create(products)
+    data.product_ids = product_ids = [p.id for p in products]
+    data.product_slugs = [p.slug for p in products]
+    ProductImage.objects.bulk_create([
+        ProductImage(product=product, image=f'products/bench/{product.id}_{n}.jpg', is_primary=n == 0)
+        for product in products
+        for n in range(cfg['images_per_product'])
+    ])
+    Review.objects.bulk_create([
+        Review(
+            product=product, user_id=user_id, rating=rng.randint(1, 5),
+            title=_text(rng, 4), comment=_text(rng, 25), helpful_count=rng.randrange(10),
+        )
+        for product in products
+        for user_id in _sample(rng, user_ids, cfg['reviews_per_product'])
+    ])
+
+    # Carts and past orders
+    carts = Cart.objects.bulk_create([Cart(user_id=user_id) for user_id in user_ids])
+    by_id = {p.id: p for p in products}
+    CartItem.objects.bulk_create([
+        CartItem(cart=cart, product_id=pid, product_name=by_id[pid].name,
+                 product_price=by_id[pid].final_price, quantity=rng.randint(1, 3))
+        for cart in carts
+        for pid in _skewed(rng, product_ids, cfg['cart_items'])
+    ])
+    orders, lines = [], []
+    for user_id in user_ids:
+        for _ in range(cfg['orders_per_user']):
+            picked = [(by_id[pid], rng.randint(1, 3)) for pid in _skewed(rng, product_ids, cfg['items_per_order'])]
+            subtotal = sum(p.final_price * qty for p, qty in picked)
+            status = rng.choice(ORDER_STATUSES)
+            order = Order(
+                order_number=f'BENCH-{len(orders):08d}', user_id=user_id, delivery_method='shipping',
+                shipping_address='1 Bench Street', shipping_city='Kathmandu', shipping_state='Bagmati',
+                shipping_zip='44600', shipping_phone='9800000000', subtotal=subtotal, total=subtotal,
+                status=status, payment_status='paid' if status in ('shipped', 'delivered') else 'pending',
+            )
+            orders.append(order)
+            lines.append(picked)
+    orders = Order.objects.bulk_create(orders)
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order, product=product, product_name=product.name, product_sku=product.sku,
+            product_meta={'category': product.category.slug, 'brand': product.brand.name},
+            product_price=product.final_price, quantity=qty,
+        )
+        for order, picked in zip(orders, lines)
+        for product, qty in picked
+    ])
+    backfill_order_facts(orders)
+
+    # Posts, likes and nested comments
+    posts = Post.objects.bulk_create([
+        Post(author_id=rng.choice(user_ids), content=_text(rng, 30), is_public=rng.random() < 0.95)
+        for _ in range(cfg['posts'])
+    ])
+    data.post_ids = [p.id for p in posts if p.is_public]
+    Like = Post.likes.through
+    Like.objects.bulk_create([
+        Like(post_id=post.id, user_id=user_id)
+        for post in posts
+        for user_id in _sample(rng, user_ids, rng.randint(0, 2 * cfg['likes_per_post']))
+    ])
+    top_level = Comment.objects.bulk_create([
+        Comment(post=post, author_id=rng.choice(user_ids), content=_text(rng, 15))
+        for post in posts
+        for _ in range(rng.randint(0, 2 * cfg['comments_per_post']))
+    ])
+    replies = Comment.objects.bulk_create([
+        Comment(post_id=parent.post_id, parent=parent, author_id=rng.choice(user_ids), content=_text(rng, 10))
+        for parent in top_level
+        if rng.random() < cfg['reply_ratio']
+    ])
+
+    # Groups with members and chat
+    groups = Group.objects.bulk_create([
+        Group(
+            name=f'Bench group {i}', slug=f'bench-group-{i}', description=_text(rng, 20),
+            group_type=rng.choice(_choices(Group.GROUP_TYPES)), creator_id=rng.choice(user_ids),
+        )
+        for i in range(cfg['groups'])
+    ])
+    data.group_ids = [g.id for g in groups]
+    Membership = Group.members.through
+    Membership.objects.bulk_create([
+        Membership(group_id=group.id, user_id=user_id)
+        for group in groups
+        for user_id in _skewed(rng, user_ids, cfg['members_per_group'])
+    ])
+    GroupMessage.objects.bulk_create([
+        GroupMessage(group=group, sender_id=rng.choice(user_ids), content=_text(rng, 12))
+        for group in groups
+        for _ in range(cfg['messages_per_group'])
+    ])
+
+    # Events with attendees
+    events = Event.objects.bulk_create([
+        Event(
+            title=f'Bench event {i}', description=_text(rng, 20), event_type=rng.choice(_choices(Event.EVENT_TYPES)),
+            location='Bench park', address='1 Bench Street',
+            start_datetime=now + timedelta(hours=rng.randint(-240, 240)),
+            end_datetime=now + timedelta(hours=rng.randint(241, 480)),
+            organizer_id=rng.choice(user_ids), group=rng.choice(groups) if rng.random() < 0.5 else None,
+        )
+        for i in range(cfg['events'])
+    ])
+    data.event_ids = [e.id for e in events]
+    Attendance = Event.attendees.through
+    Attendance.objects.bulk_create([
+        Attendance(event_id=event.id, user_id=user_id)
+        for event in events
+        for user_id in _sample(rng, user_ids, rng.randint(0, 2 * cfg['attendees_per_event']))
+    ])
+
+    # Notifications
+    notification_types = _choices(Notification.NOTIFICATION_TYPES)
+    Notification.objects.bulk_create([
+        Notification(
+            user_id=user_id, notification_type=rng.choice(notification_types),
+            title=_text(rng, 4), message=_text(rng, 15), is_read=rng.random() < 0.6,
+        )
+        for user_id in user_ids
+        for _ in range(cfg['notifications_per_user'])
+    ])
+
+    pets = _per_user_records(rng, cfg, user_ids, products, groups)
+
+    data.counts = {
+        'users': len(users), 'follows': len(follows), 'products': len(products),
+        'orders': len(orders), 'posts': len(posts), 'comments': len(top_level) + len(replies),
+        'groups': len(groups), 'events': len(events), 'pets': pets,
+    }
+    return data
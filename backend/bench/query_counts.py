@@ -0,0 +1,134 @@
+"""
+Query counts for every DRF router registration.
+
+endpoints() walks the routers of ROUTER_MODULES (mounted wherever the root
+URLconf includes them). measure() requests each endpoint's list at page
+sizes 1 and 20 and one detail taken from that list, and returns the query
+counts. bench/tests.py compares them with the budgets checked in at
+bench/query_budgets.json.
+"""
+import json
+from contextlib import nullcontext
+from importlib import import_module
+from inspect import ismodule
+from pathlib import Path
+from unittest import mock
+
+from django.urls import URLResolver, get_resolver
+
+from bench.runner import QueryCounter
+
+ROUTER_MODULES = ('store.urls', 'community.urls', 'users.urls', 'ai_module.urls', 'admin_panel.urls')
+
+PAGE_SIZES = (1, 20)
+
+BUDGETS_FILE = Path(__file__).with_name('query_budgets.json')
+
+
+class Endpoint:
+    def __init__(self, module, url, prefix, viewset):
+        self.module = module
+        self.prefix = prefix
+        self.viewset = viewset
+        self.list_url = f'{url}{prefix}/'
+
+    @property
+    def key(self):
+        return f'{self.module} {self.prefix}'
+
+    @property
+    def has_list(self):
+        return hasattr(self.viewset, 'list')
+
+    @property
+    def has_detail(self):
+        return hasattr(self.viewset, 'retrieve')
+
+    def detail_url(self, item):
+        field = self.viewset.lookup_field
+        value = item.get('id' if field == 'pk' else field)
+        return None if value is None else f'{self.list_url}{value}/'
+
+    def __repr__(self):
+        return f'<Endpoint {self.key}>'
+
+
+def _mount_points():
+    """{urlconf module name: URL prefix} from the root URLconf"""
+    mounts = {}
+    for pattern in get_resolver().url_patterns:
+        # include('app.urls') resolvers hold the imported module
+        if isinstance(pattern, URLResolver) and ismodule(pattern.urlconf_name):
+            mounts[pattern.urlconf_name.__name__] = f'/{pattern.pattern}'
+    return mounts
+
+
+def endpoints():
+    mounts = _mount_points()
+    found = []
+    for module in ROUTER_MODULES:
+        router = import_module(module).router
+        for prefix, viewset, _basename in router.registry:
+            endpoint = Endpoint(module, mounts[module], prefix, viewset)
+            if endpoint.has_list or endpoint.has_detail:
+                found.append(endpoint)
+    return found
+
+
+def _items(data):
+    if isinstance(data, dict):
+        return data.get('results', [])
+    return data if isinstance(data, list) else []
+
+
+def _get(client, url, counter):
+    client.get(url)  # warm per-user caches (unread counts, cached JWT user...)
+    with counter:
+        response = client.get(url)
+    return response, counter.count
+
+
+def measure(endpoint, client):
+    """
+    {'list_1': n, 'list_20': n, 'rows_1': n, 'rows_20': n, 'detail': n}
+    (keys missing where the endpoint has no such view or no rows)
+    """
+    counter = QueryCounter()
+    result = {}
+    items = []
+    if endpoint.has_list:
+        paginator = getattr(endpoint.viewset, 'pagination_class', None)
+        for size in PAGE_SIZES:
+            patch = mock.patch.object(paginator, 'page_size', size) if paginator else nullcontext()
+            with patch:
+                response, count = _get(client, endpoint.list_url, counter)
+            assert response.status_code == 200, f'{endpoint.list_url} returned {response.status_code}'
+            items = _items(response.data)
+            result[f'list_{size}'] = count
+            result[f'rows_{size}'] = len(items)
+    if endpoint.has_detail and items:
+        url = endpoint.detail_url(items[0])
+        if url:
+            response, count = _get(client, url, counter)
+            assert response.status_code == 200, f'{url} returned {response.status_code}'
+            result['detail'] = count
+    return result
+
+
+def load_budgets():
+    return json.loads(BUDGETS_FILE.read_text())
+
+
+def write_budgets(measured):
+    """Rewrite the budgets file from {endpoint key: measure() result}"""
+    budgets = {}
+    for key, counts in sorted(measured.items()):
+        entry = {}
+        if 'list_1' in counts:
+            entry['list'] = counts['list_1']
+            if counts['list_20'] != counts['list_1']:
+                entry['list_20'] = counts['list_20']
+        if 'detail' in counts:
+            entry['detail'] = counts['detail']
+        budgets[key] = entry
+    BUDGETS_FILE.write_text(json.dumps(budgets, indent=2) + '\n')
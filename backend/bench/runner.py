@@ -0,0 +1,141 @@
+"""
+Runs scenarios and summarises latency and query counts.
+"""
+import math
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+import django
+from django.db import connection, connections
+from django.utils import timezone
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class QueryCounter:
+    """execute_wrapper counting statements on every connection"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.count = 0
+        self._stack = ExitStack()
+        for conn in connections.all():
+            self._stack.enter_context(conn.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc):
+        self._stack.close()
+
+
+def create_bench_db():
+    """Create and migrate a throwaway database; returns the name to restore"""
+    if connection.vendor == 'sqlite' and not connection.settings_dict['TEST'].get('NAME'):
+        # Measure an on-disk database like production, not :memory:
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.gettempdir(), 'pawjeevan_bench.sqlite3')
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+    return old_name
+
+
+def destroy_bench_db(old_name):
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+def summarise(timings, queries, statuses):
+    timings = sorted(timings)
+    return {
+        'iterations': len(timings),
+        'latency_ms': {
+            **{f'p{p}': _ms(percentile(timings, p)) for p in PERCENTILES},
+            'min': _ms(timings[0]),
+            'max': _ms(timings[-1]),
+            'mean': _ms(sum(timings) / len(timings)),
+        },
+        'queries': {
+            'min': min(queries),
+            'max': max(queries),
+            'mean': round(sum(queries) / len(queries), 2),
+        },
+        'status': {str(code): n for code, n in sorted(Counter(statuses).items())},
+    }
+
+
+def run_scenario(scenario, iterations, warmup):
+    for i in range(warmup):
+        scenario.prepare(i)
+        scenario.request(i)
+
+    timings, queries, statuses = [], [], []
+    counter = QueryCounter()
+    for i in range(warmup, warmup + iterations):
+        scenario.prepare(i)
+        with counter:
+            start = time.perf_counter()
+            response = scenario.request(i)
+            timings.append(time.perf_counter() - start)
+        queries.append(counter.count)
+        statuses.append(response.status_code)
+    return summarise(timings, queries, statuses)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(dataset, iterations, warmup):
+    return {
+        'commit': git_commit(),
+        'started_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'iterations': iterations,
+        'warmup': warmup,
+        'dataset': dataset.as_dict(),
+    }
+
+
+def compare(current, baseline):
+    """Text table of p50/p95 latency and mean queries against a baseline run"""
+    lines = [f"{'scenario':<16}{'p50 ms':>18}{'p95 ms':>18}{'queries':>16}"]
+    for name, result in current['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        cells = []
+        for value, old in (
+            (result['latency_ms']['p50'], base and base['latency_ms']['p50']),
+            (result['latency_ms']['p95'], base and base['latency_ms']['p95']),
+            (result['queries']['mean'], base and base['queries']['mean']),
+        ):
+            if old:
+                cells.append(f'{value:.1f} ({(value - old) / old:+.0%})')
+            else:
+                cells.append(f'{value:.1f}')
+        lines.append(f'{name:<16}{cells[0]:>18}{cells[1]:>18}{cells[2]:>16}')
+    return '\n'.join(lines)
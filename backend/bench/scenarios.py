@@ -0,0 +1,134 @@
+"""
+Scripted request scenarios against the main endpoints.
+
+Each scenario turns an iteration number into one request. Users, products
+and posts are picked with a Random seeded from the scenario name and the
+run seed, so two runs issue exactly the same request sequence. prepare()
+runs before the timed request and is not measured (checkout fills the
+cart there).
+"""
+import random
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import User
+
+
+class Context:
+    """Generated dataset plus one authenticated API client per user"""
+
+    def __init__(self, dataset, seed):
+        self.dataset = dataset
+        self.seed = seed
+        self._clients = {}
+
+    def rng(self, name):
+        return random.Random(f'{self.seed}:{name}')
+
+    def client(self, user_id=None):
+        if user_id not in self._clients:
+            client = APIClient()
+            if user_id is not None:
+                # Real bearer tokens, so authentication is part of what is measured
+                token = RefreshToken.for_user(User.objects.get(pk=user_id)).access_token
+                client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            self._clients[user_id] = client
+        return self._clients[user_id]
+
+
+class Scenario:
+    name = ''
+    description = ''
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.rng = ctx.rng(self.name)
+
+    def prepare(self, i):
+        pass
+
+    def request(self, i):
+        """Issue one request; returns the response"""
+        raise NotImplementedError
+
+    def user(self):
+        return self.rng.choice(self.ctx.dataset.user_ids)
+
+
+class ProductList(Scenario):
+    name = 'product_list'
+    description = 'GET /api/store/products/ (anonymous, first five pages)'
+
+    def request(self, i):
+        return self.ctx.client().get('/api/store/products/', {'page': i % 5 + 1})
+
+
+class ProductDetail(Scenario):
+    name = 'product_detail'
+    description = 'GET /api/store/products/<slug>/ (anonymous)'
+
+    def request(self, i):
+        slug = self.rng.choice(self.ctx.dataset.product_slugs)
+        return self.ctx.client().get(f'/api/store/products/{slug}/')
+
+
+class Feed(Scenario):
+    name = 'feed'
+    description = 'GET /api/community/posts/?following=true'
+
+    def request(self, i):
+        return self.ctx.client(self.user()).get('/api/community/posts/', {'following': 'true'})
+
+
+class PostDetail(Scenario):
+    name = 'post_detail'
+    description = 'GET /api/community/posts/<id>/'
+
+    def request(self, i):
+        post_id = self.rng.choice(self.ctx.dataset.post_ids)
+        return self.ctx.client(self.user()).get(f'/api/community/posts/{post_id}/')
+
+
+class Checkout(Scenario):
+    name = 'checkout'
+    description = 'POST /api/store/orders/ from a cart of two products'
+
+    def prepare(self, i):
+        self.user_id = self.user()
+        client = self.ctx.client(self.user_id)
+        for product_id in self.rng.sample(self.ctx.dataset.product_ids, 2):
+            client.post('/api/store/cart/add_item/', {'product_id': product_id, 'quantity': 1}, format='json')
+
+    def request(self, i):
+        return self.ctx.client(self.user_id).post('/api/store/orders/', {
+            'delivery_method': 'shipping',
+            'shipping_address': '1 Bench Street',
+            'shipping_city': 'Kathmandu',
+            'shipping_state': 'Bagmati',
+            'shipping_zip': '44600',
+            'shipping_phone': '9800000000',
+            'payment_method': 'cod',
+        }, format='json')
+
+
+class Notifications(Scenario):
+    name = 'notifications'
+    description = 'GET /api/users/notifications/'
+
+    def request(self, i):
+        return self.ctx.client(self.user()).get('/api/users/notifications/')
+
+
+class UnreadCount(Scenario):
+    name = 'unread_count'
+    description = 'GET /api/users/notifications/unread_count/'
+
+    def request(self, i):
+        return self.ctx.client(self.user()).get('/api/users/notifications/unread_count/')
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (ProductList, ProductDetail, Feed, PostDetail, Checkout, Notifications, UnreadCount)
+}
@@ -0,0 +1,88 @@
+"""
+Query-count budgets for every router registration (see bench/query_counts.py).
+
+Each endpoint's list must run the same number of queries at page size 1 and
+20, and no more than its budget in bench/query_budgets.json. An endpoint
+with a "list_20" budget has a known per-row query and is exempt from the
+constant-count check until it is fixed; don't add new ones.
+
+After an intentional change, rewrite the budgets file with
+
+    QUERY_BUDGETS_UPDATE=1 python manage.py test bench
+"""
+import os
+import re
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from .generator import generate
+from .query_counts import endpoints, load_budgets, measure, write_budgets
+
+UPDATE = bool(os.environ.get('QUERY_BUDGETS_UPDATE'))
+
+
+# The profiler would log (and store) every slow request
+@override_settings(PROFILING_SLOW_REQUEST_MS=10 ** 9, PROFILING_SLOW_QUERY_COUNT=10 ** 9)
+class QueryBudgetTests(TestCase):
+    measured = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        dataset = generate(seed=42, scale='small')
+        # The heavy user owns a full page of every per-user record; staff so
+        # admin_panel endpoints answer too
+        User.objects.filter(pk=dataset.user_ids[0]).update(is_staff=True, is_superuser=True)
+        cls.user = User.objects.get(pk=dataset.user_ids[0])
+        cls.budgets = {} if UPDATE else load_budgets()
+
+    @classmethod
+    def tearDownClass(cls):
+        if UPDATE and cls.measured:
+            write_budgets(cls.measured)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def check_endpoint(self, endpoint):
+        counts = measure(endpoint, self.client)
+        self.measured[endpoint.key] = counts
+        if UPDATE:
+            return
+
+        budget = self.budgets.get(endpoint.key)
+        if budget is None:
+            self.fail(
+                f'No query budget for {endpoint.key!r}; add it to bench/query_budgets.json '
+                f'(measured {counts})'
+            )
+        if 'list_1' in counts:
+            self.assertLessEqual(counts['list_1'], budget['list'], f'{endpoint.list_url} at page size 1')
+            self.assertLessEqual(
+                counts['list_20'], budget.get('list_20', budget['list']), f'{endpoint.list_url} at page size 20'
+            )
+            if 'list_20' not in budget and counts['rows_20'] > counts['rows_1']:
+                self.assertEqual(
+                    counts['list_20'], counts['list_1'],
+                    f'{endpoint.list_url} runs more queries for {counts["rows_20"]} rows than for '
+                    f'{counts["rows_1"]} (a query per row?)',
+                )
+        if 'detail' in counts:
+            self.assertLessEqual(counts['detail'], budget['detail'], f'{endpoint.key} detail')
+
+
+def _add_test(endpoint):
+    def test(self):
+        self.check_endpoint(endpoint)
+
+    name = 'test_' + re.sub(r'\W+', '_', endpoint.key).strip('_')
+    test.__name__ = name
+    setattr(QueryBudgetTests, name, test)
+
+
+for _endpoint in endpoints():
+    _add_test(_endpoint)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CommunityConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'community'
+
+    def ready(self):
+        # Register signal receivers (realtime push)
+        from . import signals  # noqa: F401
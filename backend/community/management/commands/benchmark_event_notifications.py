@@ -0,0 +1,115 @@
+"""
+Benchmark the event notification dispatcher at scale
+Seeds an event with N attendees (default 10k) inside a transaction that is
+rolled back, then compares the old per-attendee loop with the set-based
+dispatcher in community/notifications.py
+"""
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from community.models import Event
+from community.notifications import dispatch_event_notifications
+from users.models import Notification, ScheduledNotification, User
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _legacy_starting(now):
+    """The previous implementation of the "event starting" phase"""
+    for event in Event.objects.filter(start_datetime__gte=now, start_datetime__lte=now + timedelta(hours=1)):
+        for attendee in event.attendees.all():
+            existing = Notification.objects.filter(
+                user=attendee,
+                notification_type='event_starting',
+                action_url=f'/events/{event.id}/',
+                created_at__gte=now - timedelta(hours=2)
+            ).exists()
+            if not existing:
+                Notification.objects.create(
+                    user=attendee,
+                    notification_type='event_starting',
+                    title=f'Event "{event.title}" is starting soon!',
+                    message=f'{event.title} will start in about an hour at {event.location}. Get ready!',
+                    action_url=f'/events/{event.id}/'
+                )
+
+
+class Command(BaseCommand):
+    help = 'Compare per-attendee and set-based event notification dispatch (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attendees', type=int, default=10000, help='Attendees to seed (default: 10000)')
+        parser.add_argument('--skip-legacy', action='store_true', help='Only time the set-based dispatcher')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options['attendees'], options['skip_legacy'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _time(self, label, fn):
+        # Counted with an execute wrapper: CaptureQueriesContext keeps only
+        # the last 9000 queries, which the legacy loop exceeds at this size
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+        self.stdout.write(f'{label:<34}{queries:>10}{elapsed:>12.2f}s')
+
+    def _run(self, n, skip_legacy):
+        now = timezone.now()
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            User(username=f'bench_evt_{i}', email=f'bench_evt_{i}@example.invalid', password=password)
+            for i in range(n)
+        )
+        organizer = users[0]
+
+        def make_event(title):
+            event = Event.objects.create(
+                title=title, description='Benchmark', event_type='meetup', location='Park', address='Park',
+                start_datetime=now + timedelta(minutes=30), end_datetime=now + timedelta(hours=3),
+                organizer=organizer,
+            )
+            Event.attendees.through.objects.bulk_create(
+                Event.attendees.through(event_id=event.id, user_id=u.id) for u in users
+            )
+            return event
+
+        ScheduledNotification.objects.bulk_create(
+            ScheduledNotification(
+                user=u, notification_type='event_starting', title='Reminder', message='Soon',
+                action_url='/events/0/', send_at=now - timedelta(minutes=1),
+            )
+            for u in users
+        )
+
+        self.stdout.write(f'{n} attendees\n')
+        self.stdout.write(f'{"phase":<34}{"queries":>10}{"time":>13}')
+        if not skip_legacy:
+            make_event('Legacy benchmark')
+            self._time('legacy loop (starting phase)', lambda: _legacy_starting(now))
+            Event.objects.all().delete()
+            Notification.objects.filter(user__in=users).delete()
+
+        make_event('Set-based benchmark')
+        self._time('set-based dispatch (all phases)', lambda: dispatch_event_notifications(now))
+        self._time('second run (idempotent, no-op)', lambda: dispatch_event_notifications(now))
+        sent = Notification.objects.filter(user__in=users).count()
+        self.stdout.write(self.style.SUCCESS(f'{sent} notifications created (expected {2 * n})'))
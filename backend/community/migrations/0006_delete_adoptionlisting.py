@@ -7,6 +7,8 @@ class Migration(migrations.Migration):
 
     dependencies = [
         ('community', '0005_remove_conversation_message'),
+        # The listings are copied into store before the old table goes
+        ('store', '0003_migrate_adoption_data'),
     ]
 
     operations = [
@@ -132,6 +132,10 @@ class GroupMessage(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Keyset pagination of a group's chat (see community/pagination.py)
+            models.Index(fields=['group', 'created_at', 'id'], name='community_gmsg_keyset_idx'),
+        ]
     
     def __str__(self):
         return f"Message from {self.sender.username} in {self.group.name}"
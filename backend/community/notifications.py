@@ -0,0 +1,202 @@
+"""
+Set-based dispatcher for event notifications.
+
+Each phase resolves its recipients with one query, drops recipients that were
+already notified with an anti-join (NOT EXISTS) against Notification, and
+writes the rest with a single bulk_create. Phases run in their own
+transaction with the driving rows locked, so overlapping runs (cron + manual,
+two workers) skip each other's rows instead of double-sending.
+
+Due ScheduledNotification rows are drained through the claim/complete queue
+in users/notification_queue.py, which adds batching, leases and retries.
+"""
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import CharField, Exists, F, OuterRef, Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+
+from users import notification_queue
+from users.models import Notification, ScheduledNotification
+from users.notifications import notify_bulk_created
+
+from .models import Event
+
+# A notification of the same type/url inside this window counts as already sent
+DEDUPE_WINDOW = timedelta(hours=2)
+
+
+def _lock_for_dispatch():
+    """
+    SQLite ignores SELECT ... FOR UPDATE; take its database write lock up
+    front instead so concurrent dispatchers serialize rather than both
+    reading the same candidates.
+    """
+    if connection.vendor == 'sqlite':
+        ScheduledNotification.objects.filter(pk=-1).update(processed=F('processed'))
+
+
+def _locked(queryset):
+    if connection.features.has_select_for_update_skip_locked:
+        return queryset.select_for_update(skip_locked=True)
+    if connection.features.has_select_for_update:
+        return queryset.select_for_update()
+    return queryset
+
+
+def _already_notified(notification_type, since):
+    return Exists(
+        Notification.objects.filter(
+            user_id=OuterRef('user_id'),
+            notification_type=notification_type,
+            action_url=OuterRef('action_url'),
+            created_at__gte=since,
+        )
+    )
+
+
+def _event_recipients(event_ids, notification_type, since):
+    """(user_id, event_id, title, location) for attendees not yet notified"""
+    Attendance = Event.attendees.through
+    return (
+        Attendance.objects.filter(event_id__in=event_ids)
+        .annotate(action_url=Concat(
+            Value('/events/'), Cast('event_id', CharField()), Value('/'),
+            output_field=CharField(),
+        ))
+        .filter(~_already_notified(notification_type, since))
+        .values_list('user_id', 'event_id', 'event__title', 'event__location')
+    )
+
+
+def has_unsent_starting(now):
+    """
+    Whether an event already inside the "starting soon" window (created or
+    moved there since the last run, or with new attendees) still has
+    attendees to notify
+    """
+    event_ids = Event.objects.filter(
+        start_datetime__gte=now,
+        start_datetime__lte=now + timedelta(hours=1),
+    ).values('id')
+    return _event_recipients(event_ids, 'event_starting', now - DEDUPE_WINDOW).exists()
+
+
+def _send_starting(now):
+    with transaction.atomic():
+        _lock_for_dispatch()
+        event_ids = list(_locked(Event.objects.filter(
+            start_datetime__gte=now,
+            start_datetime__lte=now + timedelta(hours=1),
+        )).values_list('id', flat=True))
+        if not event_ids:
+            return 0
+        notifications = [
+            Notification(
+                user_id=user_id,
+                notification_type='event_starting',
+                title=f'Event "{title}" is starting soon!',
+                message=f'{title} will start in about an hour at {location}. Get ready!',
+                action_url=f'/events/{event_id}/',
+            )
+            for user_id, event_id, title, location in _event_recipients(event_ids, 'event_starting', now - DEDUPE_WINDOW)
+        ]
+        created = Notification.objects.bulk_create(notifications)
+    notify_bulk_created(created)
+    return len(created)
+
+
+def _send_ended(now, delete_events=True):
+    with transaction.atomic():
+        _lock_for_dispatch()
+        events = _locked(Event.objects.filter(
+            end_datetime__gte=now - timedelta(hours=1),
+            end_datetime__lte=now,
+        ))
+        event_ids = list(events.values_list('id', flat=True))
+        if not event_ids:
+            return 0, 0
+        notifications = [
+            Notification(
+                user_id=user_id,
+                notification_type='event_ended',
+                title=f'Thanks for attending "{title}"!',
+                message=f'We hope you enjoyed {title}. Share your experience with the community!',
+                action_url=f'/events/{event_id}/',
+            )
+            for user_id, event_id, title, _ in _event_recipients(event_ids, 'event_ended', now - DEDUPE_WINDOW)
+        ]
+        created = Notification.objects.bulk_create(notifications)
+        deleted = 0
+        if delete_events:
+            # Ended events are removed once their attendees have been thanked
+            deleted = Event.objects.filter(id__in=event_ids).delete()[1].get(Event._meta.label, 0)
+    notify_bulk_created(created)
+    return len(created), deleted
+
+
+def _recently_sent(items, since):
+    """(user_id, type, action_url) keys among ``items`` already notified since ``since``"""
+    return set(Notification.objects.filter(
+        user_id__in={item.user_id for item in items},
+        notification_type__in={item.notification_type for item in items},
+        created_at__gte=since,
+    ).values_list('user_id', 'notification_type', 'action_url'))
+
+
+def _send_scheduled_batch(items, now):
+    sent = _recently_sent(items, now - DEDUPE_WINDOW)
+    notifications = []
+    for item in items:
+        key = (item.user_id, item.notification_type, item.action_url)
+        # Skip if sent recently, or duplicated within this batch
+        if key in sent:
+            continue
+        sent.add(key)
+        notifications.append(Notification(
+            user_id=item.user_id,
+            notification_type=item.notification_type,
+            title=item.title,
+            message=item.message,
+            action_url=item.action_url,
+        ))
+    with transaction.atomic():
+        created = Notification.objects.bulk_create(notifications)
+        notification_queue.complete(items)
+    return created
+
+
+def _send_scheduled(now):
+    """Drain due ScheduledNotification rows batch by batch"""
+    sent = processed = 0
+    while True:
+        items = notification_queue.claim_due(now=now)
+        if not items:
+            break
+        try:
+            created = _send_scheduled_batch(items, now)
+        except Exception as e:
+            # Claimed rows stay leased until their retry time, so the loop
+            # moves on to the next batch
+            notification_queue.fail(items, e)
+            continue
+        notify_bulk_created(created)
+        sent += len(created)
+        processed += len(items)
+    return sent, processed
+
+
+def dispatch_event_notifications(now=None, delete_ended_events=True):
+    """Run every phase once and return what was sent"""
+    now = now or timezone.now()
+    starting = _send_starting(now)
+    ended, deleted = _send_ended(now, delete_ended_events)
+    scheduled, processed = _send_scheduled(now)
+    return {
+        'event_starting': starting,
+        'event_ended': ended,
+        'events_deleted': deleted,
+        'scheduled_sent': scheduled,
+        'scheduled_processed': processed,
+    }
@@ -0,0 +1,51 @@
+"""
+Keyset (cursor) pagination helpers for group chat messages.
+
+Messages are ordered by (created_at, id); a cursor encodes that pair for one
+message, so paging never needs OFFSET and new messages don't shift pages.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(message):
+    raw = f'{message.created_at.isoformat()}|{message.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    try:
+        padded = value + '=' * (-len(value) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor('Invalid cursor') from exc
+
+
+def paginate_messages(queryset, *, before=None, after=None, limit=50):
+    """
+    Return (messages oldest-first, has_more) for one page.
+
+    - no cursor: the newest `limit` messages; has_more means older ones exist
+    - before: the `limit` messages immediately older than the cursor
+    - after: the `limit` messages immediately newer than the cursor;
+      has_more means the client should fetch again to catch up
+    """
+    if after is not None:
+        created_at, pk = decode_cursor(after)
+        qs = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+        page = list(qs.order_by('created_at', 'id')[:limit + 1])
+        return page[:limit], len(page) > limit
+
+    if before is not None:
+        created_at, pk = decode_cursor(before)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    page = list(queryset.order_by('-created_at', '-id')[:limit + 1])
+    has_more = len(page) > limit
+    return page[:limit][::-1], has_more
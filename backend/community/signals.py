@@ -0,0 +1,23 @@
+"""
+Signal receivers for the community app
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from pawjeevan_backend.realtime import group_topic, has_listeners, publish_on_commit
+from pawjeevan_backend.response_cache import invalidate_on_change
+
+from .models import Comment, GroupMessage, Post
+
+# Anonymous posts feed cached by pawjeevan_backend.response_cache
+invalidate_on_change(Post, Comment)
+
+
+@receiver(post_save, sender=GroupMessage)
+def push_new_group_message(sender, instance, created, **kwargs):
+    """Deliver new group messages to connected SSE clients"""
+    if created and has_listeners(group_topic(instance.group_id)):
+        from .serializers import GroupMessageSerializer
+        data = dict(GroupMessageSerializer(instance).data)
+        data['group_id'] = instance.group_id
+        publish_on_commit(group_topic(instance.group_id), 'group_message', data)
@@ -1,3 +1,75 @@
+from datetime import timedelta
+
+from django.db import transaction
 from django.test import TestCase
+from django.utils import timezone
+
+from users.models import Notification, User
+
+from .management.commands.benchmark_event_notifications import _legacy_starting
+from .models import Event
+from .notifications import dispatch_event_notifications
+
+
+class EventNotificationParityTests(TestCase):
+    """The set-based dispatcher sends what the old per-attendee loop sent"""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='x')
+            for i in range(4)
+        ]
+        u1, u2, u3, u4 = self.users
+        self.park = self.make_event('Park walk', timedelta(minutes=30), [u1, u2, u3])
+        self.beach = self.make_event('Beach day', timedelta(minutes=45), [u2, u4])
+        self.make_event('Later', timedelta(hours=2), [u1])  # not starting soon yet
+
+        # u1 was told about the park walk an hour ago; u3's reminder is too
+        # old to count; u4 only has a notification of another type
+        self.notify(u1, 'event_starting', self.park, ago=timedelta(hours=1))
+        self.notify(u3, 'event_starting', self.park, ago=timedelta(hours=3))
+        self.notify(u4, 'event_ended', self.beach, ago=timedelta(minutes=10))
+        self.baseline = Notification.objects.order_by('-pk').values_list('pk', flat=True).first()
+
+    def make_event(self, title, starts_in, attendees):
+        event = Event.objects.create(
+            title=title, description='', event_type='meetup', location='Park', address='',
+            start_datetime=self.now + starts_in, end_datetime=self.now + starts_in + timedelta(hours=2),
+            organizer=self.users[0],
+        )
+        event.attendees.add(*attendees)
+        return event
+
+    def notify(self, user, notification_type, event, ago):
+        notification = Notification.objects.create(
+            user=user, notification_type=notification_type, title='Earlier', message='',
+            action_url=f'/events/{event.id}/',
+        )
+        Notification.objects.filter(pk=notification.pk).update(created_at=self.now - ago)
+
+    def sent(self):
+        return sorted(
+            Notification.objects.filter(pk__gt=self.baseline)
+            .values_list('user_id', 'notification_type', 'title', 'message', 'action_url')
+        )
+
+    def test_same_recipients_and_dedupe_as_the_per_attendee_loop(self):
+        with transaction.atomic():
+            _legacy_starting(self.now)
+            expected = self.sent()
+            transaction.set_rollback(True)
+
+        dispatch_event_notifications(self.now, delete_ended_events=False)
+        self.assertEqual(self.sent(), expected)
+
+        u1, u2, u3, u4 = (user.pk for user in self.users)
+        self.assertEqual(
+            sorted((user_id, url) for user_id, _, _, _, url in expected),
+            sorted([(u2, f'/events/{self.park.id}/'), (u3, f'/events/{self.park.id}/'),
+                    (u2, f'/events/{self.beach.id}/'), (u4, f'/events/{self.beach.id}/')]),
+        )
 
-# Create your tests here.
+        # A second run sends nothing, as the old loop's dedupe check ensured
+        dispatch_event_notifications(self.now, delete_ended_events=False)
+        self.assertEqual(self.sent(), expected)
@@ -20,9 +20,12 @@ from .serializers import (
 from users.models import User, Notification
 from users.models import ScheduledNotification
 from users.serializers import UserSerializer
+from pawjeevan_backend.conditional import ConditionalGetMixin
+from pawjeevan_backend.db_router import ReplicaReadMixin
+from pawjeevan_backend.response_cache import cache_anonymous_response
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Post.objects.all().order_by('-created_at')
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -79,6 +82,10 @@ class PostViewSet(viewsets.ModelViewSet):
             
         return qs
 
+    @cache_anonymous_response(Post, Comment, User)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, is_public=True)
 
@@ -129,7 +136,7 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         if user_to_follow == current_user:
             return Response({'error': 'You cannot follow yourself'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if current_user in user_to_follow.followers.all():
+        if user_to_follow.followers.filter(pk=current_user.pk).exists():
             user_to_follow.followers.remove(current_user)
             return Response({'status': 'unfollowed'})
         else:
@@ -181,7 +188,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         return Response({'status': 'liked', 'likes_count': comment.likes.count()})
 
 
-class GroupViewSet(viewsets.ModelViewSet):
+class GroupViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Group.objects.filter(is_active=True).order_by('-created_at')
     serializer_class = GroupSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -189,6 +196,7 @@ class GroupViewSet(viewsets.ModelViewSet):
     filterset_fields = ['group_type']
     search_fields = ['name', 'description']
     lookup_field = 'slug'
+    conditional_related = ('creator', 'members', 'moderators')
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
@@ -281,9 +289,31 @@ class GroupViewSet(viewsets.ModelViewSet):
             return Response({'error': 'You must be a member to access group messages'}, status=403)
         
         if request.method == 'GET':
-            messages = GroupMessage.objects.filter(group=group).order_by('created_at')
+            # Keyset pagination over (created_at, id):
+            #   ?after=<cursor>  messages newer than the client's last one
+            #   ?before=<cursor> older history (scrolling up)
+            #   neither          the newest page
+            from .pagination import InvalidCursor, encode_cursor, paginate_messages
+
+            try:
+                limit = min(max(int(request.query_params.get('limit', 50)), 1), 200)
+                messages, has_more = paginate_messages(
+                    GroupMessage.objects.filter(group=group).select_related('sender'),
+                    before=request.query_params.get('before') or None,
+                    after=request.query_params.get('after') or None,
+                    limit=limit,
+                )
+            except (InvalidCursor, ValueError):
+                return Response({'error': 'Invalid cursor or limit'}, status=400)
+
             serializer = GroupMessageSerializer(messages, many=True, context={'request': request})
-            return Response(serializer.data)
+            return Response({
+                'results': serializer.data,
+                # Pass `before` to load older messages, `after` to poll for newer ones
+                'before': encode_cursor(messages[0]) if messages else request.query_params.get('before'),
+                'after': encode_cursor(messages[-1]) if messages else request.query_params.get('after'),
+                'has_more': has_more,
+            })
         
         elif request.method == 'POST':
             serializer = GroupMessageSerializer(data=request.data, context={'request': request})
@@ -341,7 +371,7 @@ class GroupPostViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Event.objects.all().order_by('start_datetime')
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -0,0 +1,157 @@
+"""
+Conditional GET for DRF list and retrieve actions.
+
+ConditionalGetMixin answers If-None-Match / If-Modified-Since with 304 Not
+Modified before anything is serialized. The validators come from one
+aggregate query instead of the response body:
+
+- the rows behind the response (the filtered list queryset, or the one
+  object): how many there are and their latest updated_at, and
+- the same for each relation in ``conditional_related`` whose rows the
+  serializer includes: nested images, reviews, the category... Join tables
+  have no updated_at; their highest id stands in (join rows are only ever
+  added or removed).
+
+These are hashed with the view, URL, query string, host, media type and the
+user (serializers fill in is_member, is_liked...) into a strong ETag. An
+edit moves updated_at and a deletion changes a count, so the ETag changes
+with the data.
+
+Last-Modified is only sent where it is exact: for a single object with
+nothing to-many in its representation. Elsewhere a deletion would leave
+every timestamp as it was.
+
+Writes through queryset.update() skip auto_now; they must set updated_at
+themselves for clients to see them.
+"""
+import hashlib
+from urllib.parse import urlencode
+
+from django.db.models import Count, Max, Subquery, Value
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+UPDATED_FIELD = 'updated_at'
+
+
+def _changed_field(model):
+    names = {field.name for field in model._meta.concrete_fields}
+    return UPDATED_FIELD if UPDATED_FIELD in names else 'pk'
+
+
+def _state_aggregates(queryset):
+    """Aggregates giving (rows, latest updated_at or highest id) of a queryset"""
+    return Count('pk'), Max(_changed_field(queryset.model))
+
+
+def _scalar(queryset, aggregate):
+    """One aggregate over ``queryset`` as a subquery expression"""
+    return Subquery(queryset.order_by().values(_all=Value(1)).annotate(value=aggregate).values('value'))
+
+
+def _related_rows(model, name, pks):
+    """Queryset of the rows ``name`` (a field or reverse relation) points at from ``pks``"""
+    field = model._meta.get_field(name)
+    if field.many_to_many:
+        if field.auto_created:  # reverse side of a many-to-many
+            through = field.through
+            source = field.field.m2m_reverse_field_name()
+        else:
+            through = field.remote_field.through
+            source = field.m2m_field_name()
+        return through._default_manager.filter(**{f'{source}__in': pks})
+    if field.one_to_many or (field.one_to_one and field.auto_created):
+        return field.related_model._default_manager.filter(**{f'{field.field.name}__in': pks})
+    # Forward foreign key / one-to-one
+    return field.related_model._default_manager.filter(
+        pk__in=model._default_manager.filter(pk__in=pks).values(field.attname)
+    )
+
+
+def _is_to_many(model, name):
+    field = model._meta.get_field(name)
+    return field.many_to_many or field.one_to_many
+
+
+class ConditionalGetMixin:
+    """
+    ETag (and where exact, Last-Modified) validators for list and retrieve.
+    ``conditional_related`` names the relations whose rows appear in the
+    representation.
+    """
+    conditional_related = ()
+
+    def get_conditional_extra(self):
+        """Anything else the representation depends on (e.g. today's date)"""
+        return ()
+
+    def _states(self, queryset):
+        """[(rows, latest change)] of ``queryset`` and each related set, in one query"""
+        model = queryset.model
+        pks = queryset.order_by().values('pk')
+        aggregates = dict(zip(('rows', 'last'), _state_aggregates(queryset)))
+        for i, name in enumerate(self.conditional_related):
+            related = _related_rows(model, name, pks)
+            # Related rows only exist when the outer set isn't empty, so Max()
+            # over the outer rows loses nothing
+            for key, aggregate in zip(('rows', 'last'), _state_aggregates(related)):
+                aggregates[f'{key}_{i}'] = Max(_scalar(related, aggregate))
+        values = queryset.order_by().aggregate(**aggregates)
+        suffixes = [''] + [f'_{i}' for i in range(len(self.conditional_related))]
+        return [(values[f'rows{suffix}'] or 0, values[f'last{suffix}']) for suffix in suffixes]
+
+    def _validators(self, request, queryset, instance=None):
+        model = queryset.model
+        if instance is not None:
+            queryset = queryset.filter(pk=instance.pk)
+        states = self._states(queryset)
+
+        user = getattr(request, 'user', None)
+        parts = [
+            type(self).__qualname__, self.action or '', urlencode(sorted(self.kwargs.items())),
+            urlencode([(k, v) for k, values in sorted(request.query_params.lists()) for v in values]),
+            request.get_host(), request.accepted_media_type or '',
+            user.pk if user is not None and user.is_authenticated else '',
+            *states, *self.get_conditional_extra(),
+        ]
+        etag = '"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()
+
+        last_modified = None
+        exact = instance is not None and not any(_is_to_many(model, name) for name in self.conditional_related)
+        if exact and all(_changed_field(m) == UPDATED_FIELD for m in self._related_models(model)):
+            stamps = [last for _, last in states]
+            if all(stamps):
+                last_modified = int(max(stamps).timestamp())
+        return etag, last_modified
+
+    def _related_models(self, model):
+        yield model
+        for name in self.conditional_related:
+            yield model._meta.get_field(name).related_model
+
+    def _conditional(self, request, queryset, instance, render):
+        if request.method not in ('GET', 'HEAD'):
+            return render()
+        etag, last_modified = self._validators(request, queryset, instance)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render()
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        def render():
+            return super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        return self._conditional(request, self.filter_queryset(self.get_queryset()), None, render)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        def render():
+            return Response(self.get_serializer(instance).data)
+        return self._conditional(request, self.get_queryset(), instance, render)
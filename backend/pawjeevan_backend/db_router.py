@@ -0,0 +1,265 @@
+"""
+Read replicas for the read-heavy public endpoints.
+
+ReplicaRouter is always installed but only routes reads of views that opt
+in with ReplicaReadMixin (the product catalogue, the posts feed, events and
+adoption listings). Everything else, every write and every migration goes to
+"default" (the primary), so with no DATABASE_REPLICAS configured nothing
+changes.
+
+A request that opts in picks one replica and sticks to it. Reads fall back
+to the primary when:
+
+- the request isn't GET/HEAD/OPTIONS, or it has written anything itself,
+- the user wrote something in the last DB_REPLICA_PIN_SECONDS
+  (ReplicaPinMiddleware records that in the cache after every successful
+  unsafe request), so people see their own new post or review, or
+- every replica is more than DB_REPLICA_MAX_LAG seconds behind, down, or
+  of unknown lag because the primary's heartbeat is missing or stale, or
+- the response is going into the anonymous response cache (a stale copy
+  would be served until the next invalidation).
+
+Lag is measured with admin_panel.ReplicationHeartbeat: the scheduler
+updates the row on the primary every SCHEDULER_REPLICA_HEARTBEAT_SECONDS and
+each process compares the primary's value with the replica's at most every
+DB_REPLICA_LAG_CHECK_SECONDS. The result is exported as the
+db_replica_lag_seconds gauge at /metrics; it is only as precise as the
+heartbeat interval.
+"""
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.utils import timezone
+from rest_framework.permissions import SAFE_METHODS
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def replicas():
+    return list(_setting('DATABASE_REPLICAS', []))
+
+
+class _RequestState:
+    """Replica chosen for the current request (None: use the primary)"""
+
+    def __init__(self, replica=None):
+        self.replica = replica
+
+
+_state = ContextVar('db_replica_state', default=None)
+
+
+# ---------------------------------------------------------------------------
+# Lag
+# ---------------------------------------------------------------------------
+
+def write_heartbeat():
+    from admin_panel.models import ReplicationHeartbeat
+
+    ReplicationHeartbeat.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+        pk=1, defaults={'beat_at': timezone.now()},
+    )
+
+
+def _beat(alias):
+    from admin_panel.models import ReplicationHeartbeat
+
+    return ReplicationHeartbeat.objects.using(alias).filter(pk=1).values_list('beat_at', flat=True).first()
+
+
+def measure_lag(alias):
+    """
+    Seconds the replica's heartbeat is behind the primary's; None (unknown)
+    when the replica can't be queried or has no heartbeat row yet, or when
+    the primary's heartbeat is missing or older than
+    DB_REPLICA_HEARTBEAT_STALE_INTERVALS heartbeat intervals, i.e. the
+    scheduler isn't writing it and lag can't be told apart from 0
+    """
+    try:
+        replica_beat = _beat(alias)
+    except DatabaseError:
+        logger.warning('Replica %s is unreachable', alias, exc_info=True)
+        return None
+    primary_beat = _beat(DEFAULT_DB_ALIAS)
+    if primary_beat is None:
+        logger.warning('No replication heartbeat on the primary, not reading from %s', alias)
+        return None
+    stale_after = (_setting('SCHEDULER_REPLICA_HEARTBEAT_SECONDS', 5)
+                   * _setting('DB_REPLICA_HEARTBEAT_STALE_INTERVALS', 3))
+    if (timezone.now() - primary_beat).total_seconds() > stale_after:
+        logger.warning('Replication heartbeat on the primary is stale, not reading from %s', alias)
+        return None
+    if replica_beat is None:
+        # Replication never delivered the row: nothing says how far behind it is
+        logger.warning('No replication heartbeat on %s yet, not reading from it', alias)
+        return None
+    return max(0.0, (primary_beat - replica_beat).total_seconds())
+
+
+class LagMonitor:
+    """Per-process cache of replica lag, refreshed on use"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}  # alias: (monotonic time, lag)
+
+    def lag(self, alias):
+        interval = _setting('DB_REPLICA_LAG_CHECK_SECONDS', 5)
+        with self._lock:
+            checked = self._checked.get(alias)
+            if checked and time.monotonic() - checked[0] < interval:
+                return checked[1]
+            # Other threads keep using the previous value while this one checks
+            self._checked[alias] = (time.monotonic(), checked[1] if checked else None)
+        lag = measure_lag(alias)
+        with self._lock:
+            self._checked[alias] = (time.monotonic(), lag)
+        if lag is not None:
+            metrics.set_gauge('db_replica_lag_seconds', lag, replica=alias)
+        return lag
+
+    def healthy(self, alias):
+        lag = self.lag(alias)
+        return lag is not None and lag <= _setting('DB_REPLICA_MAX_LAG', 10)
+
+    def reset(self):
+        with self._lock:
+            self._checked = {}
+
+
+lag_monitor = LagMonitor()
+
+
+# ---------------------------------------------------------------------------
+# Read-your-writes pinning
+# ---------------------------------------------------------------------------
+
+def _pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def pin_to_primary(user):
+    try:
+        cache.set(_pin_key(user.pk), 1, _setting('DB_REPLICA_PIN_SECONDS', 10))
+    except Exception:
+        logger.warning('Could not pin user %s to the primary', user.pk, exc_info=True)
+
+
+def is_pinned(user):
+    if not getattr(user, 'is_authenticated', False):
+        return False
+    try:
+        return bool(cache.get(_pin_key(user.pk)))
+    except Exception:
+        # Can't tell whether they just wrote something; play safe
+        return True
+
+
+class ReplicaPinMiddleware:
+    """Pins users to the primary after a successful POST/PUT/PATCH/DELETE"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _should_pin(self, request, response):
+        # DRF copies the authenticated (JWT) user onto the Django request
+        user = getattr(request, 'user', None)
+        return (
+            replicas()
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and getattr(user, 'is_authenticated', False)
+        )
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self._should_pin(request, response):
+            pin_to_primary(request.user)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self._should_pin(request, response):
+            await sync_to_async(pin_to_primary)(request.user)
+        return response
+
+
+# ---------------------------------------------------------------------------
+# Routing
+# ---------------------------------------------------------------------------
+
+def choose_replica():
+    candidates = [alias for alias in replicas() if lag_monitor.healthy(alias)]
+    return random.choice(candidates) if candidates else None
+
+
+class ReplicaReadMixin:
+    """
+    ViewSet mixin: safe requests from users without recent writes read from
+    a replica. Authentication runs against the primary before the choice.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _state.set(_RequestState())
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _state.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and replicas() and not is_pinned(request.user):
+            _state.get().replica = choose_replica()
+
+
+def read_from_primary():
+    """Send the rest of the current request's reads to the primary"""
+    state = _state.get()
+    if state is not None:
+        state.replica = None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and state.replica:
+            return state.replica
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # Read our own write for the rest of the request
+            state.replica = None
+        # Also for instances loaded from a replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas():
+            return False
+        return None
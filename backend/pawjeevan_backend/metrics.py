@@ -0,0 +1,314 @@
+"""
+In-process latency histograms exposed in Prometheus text format.
+
+MetricsMiddleware observes every request into http_request_duration_seconds
+labelled by URL route (the pattern, not the concrete path, so ids don't
+explode the label set), method and status class. AI inference, Ollama calls
+and email sends record their own histograms via observe()/timed(); values
+like replica lag are gauges (set_gauge()), where the most recently set
+value across processes wins.
+
+Each process keeps its histograms in a dict guarded by a lock; an observation
+is a bisect and three additions. With METRICS_MULTIPROC_DIR set, every
+process also writes a snapshot of its histograms to its own JSON file in
+that directory (at most every METRICS_FLUSH_SECONDS and at exit), and the
+/metrics endpoint sums all snapshots, so a scrape hitting any gunicorn
+worker sees the whole server. Files of exited workers are kept so counters
+never go backwards; clear the directory when the server is (re)started,
+e.g. in the gunicorn on_starting hook.
+"""
+import atexit
+import json
+import os
+import logging
+import re
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+HELP = {
+    'http_request_duration_seconds': 'Time spent handling HTTP requests',
+    'ai_inference_duration_seconds': 'Breed detection model inference time',
+    'ollama_request_duration_seconds': 'Ollama API call time',
+    'email_send_duration_seconds': 'Time spent sending email',
+    'db_replica_lag_seconds': 'Replica heartbeat behind the primary (resolution: heartbeat interval)',
+}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Registry:
+    """
+    Metrics of this process: histograms as {(name, labels): [bucket
+    counts..., sum, count]} and gauges as {(name, labels): [value, set at]}
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one writer of this process's file at a time
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._values = {}
+        self._gauges = {}
+        self._path = None
+        self._last_flush = time.monotonic()
+
+    def observe(self, name, seconds, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked (gunicorn preload): the parent's counts belong to the parent
+                self._reset()
+            value = self._values.get(key)
+            if value is None:
+                value = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            value[bisect_left(self.buckets, seconds)] += 1
+            value[-2] += seconds
+            value[-1] += 1
+            flush_due = time.monotonic() - self._last_flush >= _setting('METRICS_FLUSH_SECONDS', 5)
+        if flush_due:
+            self.flush(if_due=True)
+
+    def set_gauge(self, name, value, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            self._gauges[key] = [value, time.time()]
+
+    def snapshot(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            return [[name, list(labels), list(value)] for (name, labels), value in self._values.items()]
+
+    def gauge_snapshot(self):
+        with self._lock:
+            return [[name, list(labels), list(value)] for (name, labels), value in self._gauges.items()]
+
+    def _file(self, directory):
+        if self._path is None or self._path.parent != directory:
+            self._path = directory / f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+        return self._path
+
+    def flush(self, if_due=False):
+        """
+        Write this process's snapshot to METRICS_MULTIPROC_DIR (if configured).
+        With ``if_due``, skip it when another thread flushed within
+        METRICS_FLUSH_SECONDS.
+        """
+        with self._flush_lock:
+            if if_due and time.monotonic() - self._last_flush < _setting('METRICS_FLUSH_SECONDS', 5):
+                return None
+            self._last_flush = time.monotonic()
+            directory = _setting('METRICS_MULTIPROC_DIR', '')
+            if not directory:
+                return None
+            directory = Path(directory)
+            directory.mkdir(parents=True, exist_ok=True)
+            data = {'buckets': self.buckets, 'metrics': self.snapshot(), 'gauges': self.gauge_snapshot()}
+            path = self._file(directory)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=f'{path.stem}-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(json.dumps(data))
+                os.replace(tmp, path)  # readers never see a half-written file
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+            return path
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+            self._gauges = {}
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+
+def observe(name, seconds, **labels):
+    if _setting('METRICS_ENABLED', True):
+        try:
+            registry.observe(name, seconds, labels)
+        except OSError:
+            # A full disk or missing directory must not fail the request
+            logger.warning('Could not write metrics', exc_info=True)
+
+
+def set_gauge(name, value, **labels):
+    if _setting('METRICS_ENABLED', True):
+        registry.set_gauge(name, value, labels)
+
+
+@contextmanager
+def timed(name, **labels):
+    """Observe the duration of the with-block (or decorated function)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+# ---------------------------------------------------------------------------
+# Collection and exposition
+# ---------------------------------------------------------------------------
+
+def collect():
+    """
+    (histograms, gauges) over every process's snapshot: histograms summed,
+    gauges taken from whichever process set them last
+    """
+    totals = {}
+    gauges = {}
+
+    def add(metrics, buckets):
+        if tuple(buckets) != registry.buckets:
+            return  # written by a build with other buckets; can't be merged
+        for name, labels, values in metrics:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            current = totals.get(key)
+            if current is None:
+                totals[key] = list(values)
+            else:
+                for i, v in enumerate(values):
+                    current[i] += v
+
+    def add_gauges(metrics):
+        for name, labels, (value, set_at) in metrics:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            if key not in gauges or gauges[key][1] < set_at:
+                gauges[key] = (value, set_at)
+
+    directory = _setting('METRICS_MULTIPROC_DIR', '')
+    if directory:
+        own = registry.flush()
+        for path in Path(directory).glob('*.json'):
+            if path == own:
+                continue
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # removed or replaced while we were reading it
+            add(data.get('metrics', []), data.get('buckets', ()))
+            add_gauges(data.get('gauges', []))
+    add(registry.snapshot(), registry.buckets)
+    add_gauges(registry.gauge_snapshot())
+    return totals, {key: value for key, (value, _) in gauges.items()}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(collected=None):
+    """Prometheus text exposition format"""
+    totals, gauges = collect() if collected is None else collected
+    by_name = {}
+    for (name, labels), values in sorted(totals.items()):
+        by_name.setdefault(name, []).append((labels, values))
+
+    bounds = [*(repr(float(b)) for b in registry.buckets), '+Inf']
+    lines = []
+    for name, series in by_name.items():
+        lines.append(f'# HELP {name} {HELP.get(name, name)}')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(bounds, values[:-2]):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(values[-2])}')
+            lines.append(f'{name}_count{_labels(labels)} {values[-1]}')
+
+    gauges_by_name = {}
+    for (name, labels), value in sorted(gauges.items()):
+        gauges_by_name.setdefault(name, []).append((labels, value))
+    for name, series in gauges_by_name.items():
+        lines.append(f'# HELP {name} {HELP.get(name, name)}')
+        lines.append(f'# TYPE {name} gauge')
+        for labels, value in series:
+            lines.append(f'{name}{_labels(labels)} {_number(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+# ---------------------------------------------------------------------------
+# Request instrumentation
+# ---------------------------------------------------------------------------
+
+_ANCHORS = re.compile(r'(?:^|(?<=/))\^|\$(?=/|$)')
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unmatched>'
+    # DRF router patterns are regexes ("^products/(?P<pk>[^/.]+)/$"); drop
+    # their anchors
+    return '/' + _ANCHORS.sub('', match.route)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _observe(self, request, response, start):
+        observe(
+            'http_request_duration_seconds',
+            time.perf_counter() - start,
+            route=_route(request),
+            method=request.method,
+            status=f'{response.status_code // 100}xx',
+        )
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, start)
+        return response
@@ -0,0 +1,192 @@
+"""
+Per-request SQL profiling.
+
+QueryProfilingMiddleware wraps every database call made while a request is
+handled (connection.execute_wrapper), and records the query count, total DB
+time, the slowest statements and how often the most repeated statement ran
+(the N+1 signature: one SELECT per serialized object). Each response gets a
+Server-Timing header, which browser dev tools show next to the request.
+
+Requests over PROFILING_SLOW_REQUEST_MS or PROFILING_SLOW_QUERY_COUNT are
+logged as one JSON line on the "pawjeevan.profiling" logger and, for a
+PROFILING_SAMPLE_RATE fraction of them, stored as SlowRequestLog rows
+(browsable in Django admin). The scheduler deletes rows older than
+PROFILING_LOG_RETENTION_DAYS (prune_slow_request_logs).
+
+The per-query cost is two perf_counter() calls and a dict update, so it is
+meant to stay on in production. Async views (the SSE endpoint) are timed
+but not query-profiled: their queries run on worker threads.
+"""
+import heapq
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+from datetime import timedelta
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger("pawjeevan.profiling")
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class QueryCollector:
+    """execute_wrapper callable accumulating stats for one request"""
+
+    def __init__(self, top_n):
+        self.top_n = top_n
+        self.count = 0
+        self.total = 0.0
+        self.slowest = []  # min-heap of (duration, seq, sql)
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.total += elapsed
+            # sql still has placeholders, so repeats of one statement with
+            # different ids collapse into one key
+            self.statements[sql] += 1
+            entry = (elapsed, self.count, sql)
+            if len(self.slowest) < self.top_n:
+                heapq.heappush(self.slowest, entry)
+            elif elapsed > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+    def max_repeated(self):
+        return max(self.statements.values(), default=0)
+
+    def slowest_queries(self):
+        return [
+            {"sql": sql[:1000], "ms": round(elapsed * 1000, 2)}
+            for elapsed, _, sql in sorted(self.slowest, reverse=True)
+        ]
+
+
+def view_names(request):
+    """(view, action) for the resolved view: DRF class name and viewset action"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "", ""
+    func = match.func
+    cls = getattr(func, "cls", None)
+    view = f"{cls.__module__}.{cls.__name__}" if cls else match.view_name or getattr(func, "__name__", "")
+    actions = getattr(func, "actions", None) or {}
+    return view, actions.get(request.method.lower(), "")
+
+
+def _server_timing(total, collector):
+    parts = [f'app;dur={total * 1000:.1f}']
+    if collector is not None:
+        parts.append(f'db;dur={collector.total * 1000:.1f};desc="{collector.count} queries"')
+    return ", ".join(parts)
+
+
+class QueryProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = _setting("PROFILING_ENABLED", True)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        collector = QueryCollector(_setting("PROFILING_TOP_QUERIES", 5))
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(collector))
+            response = self.get_response(request)
+        self._finish(request, response, time.perf_counter() - start, collector)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        if self.enabled:
+            response["Server-Timing"] = _server_timing(time.perf_counter() - start, None)
+        return response
+
+    def _finish(self, request, response, duration, collector):
+        response["Server-Timing"] = _server_timing(duration, collector)
+
+        slow_ms = _setting("PROFILING_SLOW_REQUEST_MS", 500)
+        slow_queries = _setting("PROFILING_SLOW_QUERY_COUNT", 50)
+        is_slow = duration * 1000 >= slow_ms or collector.count >= slow_queries
+        if not is_slow and not logger.isEnabledFor(logging.DEBUG):
+            return
+
+        view, action = view_names(request)
+        user = getattr(request, "user", None)
+        record = {
+            "method": request.method,
+            "path": request.path[:500],
+            "view": view,
+            "action": action,
+            "status": response.status_code,
+            "user_id": user.pk if user is not None and user.is_authenticated else None,
+            "duration_ms": round(duration * 1000, 2),
+            "db_time_ms": round(collector.total * 1000, 2),
+            "queries": collector.count,
+            "max_repeated_query": collector.max_repeated(),
+        }
+        if not is_slow:
+            logger.debug(json.dumps(record))
+            return
+
+        record["slowest_queries"] = collector.slowest_queries()
+        logger.warning(json.dumps(record))
+        if random.random() < _setting("PROFILING_SAMPLE_RATE", 0.1):
+            self._store(record)
+
+    def _store(self, record):
+        from admin_panel.models import SlowRequestLog
+
+        try:
+            SlowRequestLog.objects.create(
+                method=record["method"],
+                path=record["path"],
+                view_name=record["view"][:200],
+                action=record["action"][:100],
+                status_code=record["status"],
+                user_id=record["user_id"],
+                duration_ms=record["duration_ms"],
+                db_time_ms=record["db_time_ms"],
+                query_count=record["queries"],
+                max_repeated_query=record["max_repeated_query"],
+                slowest_queries=record["slowest_queries"],
+            )
+        except Exception:
+            # Profiling must never break the request
+            logger.exception("Could not store slow request log")
+
+
+def prune_slow_request_logs(now=None):
+    """Delete SlowRequestLog rows older than PROFILING_LOG_RETENTION_DAYS; returns how many"""
+    from admin_panel.models import SlowRequestLog
+
+    cutoff = (now or timezone.now()) - timedelta(days=_setting("PROFILING_LOG_RETENTION_DAYS", 7))
+    deleted, _ = SlowRequestLog.objects.filter(created_at__lt=cutoff).delete()
+    if deleted:
+        logger.info("Pruned %d slow request logs", deleted)
+    return deleted
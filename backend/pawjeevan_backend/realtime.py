@@ -0,0 +1,421 @@
+"""
+Event bus and Server-Sent Events endpoint.
+
+Notification and GroupMessage rows are published to topics ("user:<id>",
+"group:<id>") once their transaction commits; connected clients receive them
+over a long-lived SSE response served by the ASGI app instead of polling.
+
+Events are created in every kind of process (WSGI/ASGI workers,
+run_scheduler, management commands), so publish_on_commit() sends them
+through a channel all processes share, chosen by REALTIME_CHANNEL:
+
+- "redis": Redis pub/sub on REDIS_URL,
+- "database": rows in admin_panel.RealtimeEvent, polled every
+  REALTIME_POLL_SECONDS and kept for REALTIME_EVENT_RETENTION seconds. It
+  can't tell whether anyone listens, so every event is written, SSE clients
+  or not; opt in for several processes without Redis,
+- "local": the bus of the publishing process only (a single process);
+  events for topics nobody in the process listens to are dropped unsent,
+- "auto" (default): "redis" when REDIS_URL is set, else "local".
+
+A process serving /api/events/ starts listening on the channel with its
+first client and hands each event to its in-process bus, which fans it out
+to the connected clients. Clients that reconnect should catch up with the
+REST endpoints (notifications/delta/, groups/<slug>/messages/) and then keep
+listening.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One connected client and the bounded queue its stream reads from."""
+
+    def __init__(self, topics, loop, max_queue):
+        self.topics = frozenset(topics)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def put(self, event):
+        """Enqueue an event; must run on the subscriber's loop"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: tell it to resync over REST rather than
+            # buffering without bound
+            self.overflowed = True
+
+
+def _fan_out(subs, event):
+    for sub in subs:
+        sub.put(event)
+
+
+class EventBus:
+    """
+    Topic -> subscribers fan-out to the clients connected to this process,
+    safe to publish from sync worker threads.
+    """
+
+    def __init__(self):
+        self._topics = defaultdict(set)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, topics, loop=None, max_queue=None):
+        sub = Subscription(
+            topics,
+            loop or asyncio.get_running_loop(),
+            max_queue or getattr(settings, "REALTIME_MAX_QUEUE", 100),
+        )
+        with self._lock:
+            for topic in sub.topics:
+                self._topics[topic].add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            for topic in sub.topics:
+                subs = self._topics.get(topic)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._topics[topic]
+
+    def has_subscribers(self, topic):
+        return bool(self._topics.get(topic))
+
+    def publish(self, topic, event_type, data):
+        event = {"id": next(self._ids), "event": event_type, "data": data}
+        with self._lock:
+            subs = list(self._topics.get(topic, ()))
+        self.published += 1
+
+        # One thread-safe wake-up per event loop rather than per subscriber
+        by_loop = defaultdict(list)
+        for sub in subs:
+            by_loop[sub.loop].append(sub)
+        for loop, loop_subs in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_fan_out, loop_subs, event)
+            except RuntimeError:
+                # Loop already closed; its subscribers unsubscribe themselves
+                continue
+            self.delivered += len(loop_subs)
+        return len(subs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "topics": len(self._topics),
+                "subscriptions": len({s for subs in self._topics.values() for s in subs}),
+                "published": self.published,
+                "delivered": self.delivered,
+            }
+
+
+bus = EventBus()
+
+
+def user_topic(user_id):
+    return f"user:{user_id}"
+
+
+def group_topic(group_id):
+    return f"group:{group_id}"
+
+
+# ---------------------------------------------------------------------------
+# Channels between processes
+# ---------------------------------------------------------------------------
+
+class LocalChannel:
+    """Straight to this process's bus"""
+    shared = False
+
+    def send(self, events):
+        for topic, event_type, data in events:
+            bus.publish(topic, event_type, data)
+
+    def listen(self):
+        pass
+
+
+class _Listener:
+    """Runs ``loop`` on a daemon thread, once per channel, restarting it after errors"""
+
+    def __init__(self, name, loop):
+        self._name = name
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self._loop()
+            except Exception:
+                logger.warning('Realtime listener %s failed; restarting', self._name, exc_info=True)
+                time.sleep(1)
+
+
+class RedisChannel:
+    """Redis pub/sub: every listening process receives every event"""
+    shared = True
+
+    def __init__(self, url, name='pawjeevan:events'):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.name = name
+        self._listener = _Listener('realtime-redis', self._receive)
+
+    def send(self, events):
+        with self.client.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.publish(self.name, json.dumps(event, default=str))
+            pipe.execute()
+
+    def listen(self):
+        self._listener.start()
+
+    def _receive(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(self.name)
+            for message in pubsub.listen():
+                if message['type'] == 'message':
+                    bus.publish(*json.loads(message['data']))
+        finally:
+            pubsub.close()
+
+
+class DatabaseChannel:
+    """
+    Events as admin_panel.RealtimeEvent rows that listening processes poll.
+    Needs nothing but the database, at the cost of a delay of up to
+    REALTIME_POLL_SECONDS.
+    """
+    shared = True
+    _POLL_WINDOW = 10  # seconds; longer than any transaction takes to commit
+
+    def __init__(self):
+        self._listener = _Listener('realtime-db', self._poll)
+        self._pruned = 0.0
+        self._since = None  # first event to deliver: from when we started listening
+
+    def send(self, events):
+        from admin_panel.models import RealtimeEvent
+
+        RealtimeEvent.objects.bulk_create([
+            RealtimeEvent(topic=topic, event_type=event_type, data=json.loads(json.dumps(data, default=str)))
+            for topic, event_type, data in events
+        ])
+        self._prune()
+
+    def _prune(self):
+        """Delete expired rows, at most once per retention period per process"""
+        from admin_panel.models import RealtimeEvent
+
+        retention = getattr(settings, 'REALTIME_EVENT_RETENTION', 300)
+        if time.monotonic() - self._pruned < retention:
+            return
+        self._pruned = time.monotonic()
+        RealtimeEvent.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=retention)).delete()
+
+    def listen(self):
+        if self._since is None:
+            self._since = timezone.now()
+        self._listener.start()
+
+    def _poll(self):
+        from admin_panel.models import RealtimeEvent
+
+        # Ids can commit out of order, so rather than "id > last seen" each
+        # poll reads the last _POLL_WINDOW seconds and skips what it delivered
+        delivered = {}  # id: created_at
+        while True:
+            time.sleep(getattr(settings, 'REALTIME_POLL_SECONDS', 1))
+            start = max(self._since, timezone.now() - timedelta(seconds=self._POLL_WINDOW))
+            try:
+                events = list(
+                    RealtimeEvent.objects.filter(created_at__gte=start).order_by('id')
+                    .values_list('id', 'created_at', 'topic', 'event_type', 'data')
+                )
+            finally:
+                close_old_connections()
+            for event_id, created_at, topic, event_type, data in events:
+                if event_id not in delivered:
+                    delivered[event_id] = created_at
+                    bus.publish(topic, event_type, data)
+            delivered = {i: at for i, at in delivered.items() if at >= start}
+
+
+_channels = {}
+_channels_lock = threading.Lock()
+
+
+def get_channel():
+    """The channel configured by REALTIME_CHANNEL (one instance per configuration)"""
+    name = getattr(settings, 'REALTIME_CHANNEL', 'auto')
+    url = getattr(settings, 'REDIS_URL', '')
+    if name == 'auto':
+        name = 'redis' if url else 'local'
+    key = (name, url if name == 'redis' else '')
+    with _channels_lock:
+        channel = _channels.get(key)
+        if channel is None:
+            if name == 'redis':
+                channel = RedisChannel(url)
+            elif name == 'database':
+                channel = DatabaseChannel()
+            elif name == 'local':
+                channel = LocalChannel()
+            else:
+                raise ValueError(f"Unknown REALTIME_CHANNEL '{name}'")
+            _channels[key] = channel
+    return channel
+
+
+def has_listeners(topic):
+    """
+    Whether publishing to ``topic`` can reach anyone. Only known for the
+    local channel; clients of other processes may be listening otherwise.
+    """
+    channel = get_channel()
+    return channel.shared or bus.has_subscribers(topic)
+
+
+def _send(events):
+    try:
+        get_channel().send(events)
+    except Exception:
+        # The rows are saved; clients will see them when they next sync over REST
+        logger.warning('Could not publish %d realtime events', len(events), exc_info=True)
+
+
+def publish_on_commit(topic, event_type, data):
+    """Publish once the current transaction commits (immediately in autocommit)"""
+    publish_many_on_commit([(topic, event_type, data)])
+
+
+def publish_many_on_commit(events):
+    """publish_on_commit() for a batch of (topic, event_type, data)"""
+    events = list(events)
+    if events:
+        transaction.on_commit(lambda: _send(events))
+
+
+# ---------------------------------------------------------------------------
+# SSE endpoint
+# ---------------------------------------------------------------------------
+
+def _format_event(event):
+    payload = json.dumps(event["data"], default=str)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {payload}\n\n"
+
+
+def _authenticate(request):
+    """
+    Resolve the user from the Authorization header or, for EventSource
+    clients that can't set headers, a ?token=<access token> query param.
+    """
+    from users.authentication import CachedJWTAuthentication
+
+    auth = CachedJWTAuthentication()
+    try:
+        result = auth.authenticate(request)
+        if result is None and request.GET.get("token"):
+            validated = auth.get_validated_token(request.GET["token"])
+            result = (auth.get_user(validated), validated)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+    return result[0] if result else None
+
+
+def _resolve_topics(request):
+    """Topics for the authenticated user (own notifications + joined groups)"""
+    from community.models import Group
+
+    user = _authenticate(request)
+    if user is None:
+        return None
+    group_ids = Group.objects.filter(members=user).values_list("id", flat=True)
+    return [user_topic(user.id)] + [group_topic(gid) for gid in group_ids]
+
+
+async def _stream(sub, heartbeat):
+    getter = None
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            # A pending get() survives heartbeats, so no event is lost between them
+            getter = getter or asyncio.ensure_future(sub.queue.get())
+            done, _ = await asyncio.wait({getter}, timeout=heartbeat)
+            if not done:
+                # SSE comment line keeps proxies from closing idle connections
+                yield ": ping\n\n"
+                continue
+            event, getter = getter.result(), None
+            yield _format_event(event)
+            if sub.overflowed:
+                yield _format_event({"id": event["id"], "event": "resync", "data": {}})
+                break
+    finally:
+        if getter is not None:
+            getter.cancel()
+        bus.unsubscribe(sub)
+
+
+async def event_stream_view(request):
+    """
+    GET /api/events/ (text/event-stream)
+    Events: "notification" (NotificationSerializer data) and "group_message"
+    (GroupMessageSerializer data plus group_id). A "resync" event means the
+    client fell behind and should refetch over REST before reconnecting.
+    """
+    if request.method != "GET":
+        return HttpResponse(status=405)
+
+    # One hop to the sync thread for both auth and the membership lookup
+    topics = await sync_to_async(_resolve_topics)(request)
+    if topics is None:
+        return HttpResponse(
+            json.dumps({"detail": "Authentication credentials were not provided."}),
+            status=401,
+            content_type="application/json",
+        )
+
+    get_channel().listen()
+    sub = bus.subscribe(topics)
+    heartbeat = getattr(settings, "REALTIME_HEARTBEAT_SECONDS", 15)
+
+    response = StreamingHttpResponse(_stream(sub, heartbeat), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # disable nginx buffering
+    return response
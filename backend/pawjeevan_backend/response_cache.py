@@ -0,0 +1,266 @@
+"""
+Whole-response cache for anonymous GETs of public, rarely changing lists.
+
+@cache_anonymous_response(*models) on a view method stores the rendered
+response in the default cache and serves later anonymous requests for the
+same URL from it. Authenticated users always get a fresh response (it may
+depend on who they are: is_liked, is_following...).
+
+The key covers the view and action, URL kwargs, the query string with its
+parameters sorted, scheme and host (image URLs are absolute) and the
+negotiated media type, plus a version per model the response is built from.
+The apps' signals.py call invalidate_on_change() for those models so any
+save or delete bumps the model's version, orphaning every cached response
+built from it; for models the responses only use a few fields of (post
+authors), only saves that change those fields do. Writes that bypass
+signals (queryset.update(), F() expressions such as stock decrements) show
+up after RESPONSE_CACHE_SECONDS at the latest.
+
+Versions live in the same cache as the responses. With the default
+local-memory cache each worker has its own copies and versions, so a write
+only invalidates the responses of the worker that handled it; the others
+keep serving theirs for up to RESPONSE_CACHE_SECONDS. A shared cache
+(REDIS_URL) invalidates them everywhere.
+
+Responses are always built from the primary, even in views that read from a
+replica (db_router.ReplicaReadMixin): a lagging replica would otherwise store
+data from before a write under the version that write just bumped.
+
+Hits and misses per view are counted in this process; admins can read them
+at /api/admin/analytics/response-cache/.
+"""
+import functools
+import hashlib
+import logging
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .db_router import read_from_primary
+
+logger = logging.getLogger(__name__)
+
+
+def _ttl():
+    return getattr(settings, 'RESPONSE_CACHE_SECONDS', 60)
+
+
+class ResponseCacheStats:
+    """Per-view counters of cache hits and misses (this process)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hits = defaultdict(int)
+        self._misses = defaultdict(int)
+        self.errors = 0
+
+    def record(self, name, hit):
+        with self._lock:
+            if hit:
+                self._hits[name] += 1
+            else:
+                self._misses[name] += 1
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            views = {}
+            for name in sorted(set(self._hits) | set(self._misses)):
+                hits, misses = self._hits[name], self._misses[name]
+                views[name] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / (hits + misses), 4)}
+            hits, misses = sum(self._hits.values()), sum(self._misses.values())
+            return {
+                'views': views,
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                'cache_errors': self.errors,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._hits.clear()
+            self._misses.clear()
+            self.errors = 0
+
+
+stats = ResponseCacheStats()
+
+
+def get_response_cache_stats():
+    return stats.snapshot()
+
+
+# ---------------------------------------------------------------------------
+# Versions
+# ---------------------------------------------------------------------------
+
+def _version_key(model):
+    return f'response-version:{model._meta.label_lower}'
+
+
+def _versions(models):
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Seed from the clock so a lost/evicted version never lines up
+            # with responses cached under an earlier one
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(model):
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+    except Exception:
+        logger.warning('Could not invalidate cached %s responses', model._meta.label, exc_info=True)
+
+
+def _bump_sender(sender, **kwargs):
+    bump_version(sender)
+
+
+class _FieldChanges:
+    """Bumps a model's version only on saves that change one of ``fields``"""
+
+    _missing = object()  # deferred, so not saved either
+
+    def __init__(self, model, fields):
+        self.attnames = [model._meta.get_field(name).attname for name in fields]
+
+    def _values(self, instance):
+        values = []
+        for attname in self.attnames:
+            value = instance.__dict__.get(attname, self._missing)
+            # FieldFiles change in place when a new file is saved
+            values.append(value.name if isinstance(value, File) else value)
+        return tuple(values)
+
+    def remember(self, sender, instance, **kwargs):
+        instance._response_cache_values = self._values(instance)
+
+    def saved(self, sender, instance, created, **kwargs):
+        values = self._values(instance)
+        # A new row isn't in any cached response yet
+        if not created and values != getattr(instance, '_response_cache_values', None):
+            bump_version(sender)
+        instance._response_cache_values = values
+
+
+def invalidate_on_change(*models, fields=None):
+    """
+    Bump each model's version whenever a row is saved or deleted. With
+    ``fields``, only saves that change one of them count, and many-to-many
+    changes don't: the cached responses use nothing else of the model.
+    """
+    for model in models:
+        uid = f'response-cache:{model._meta.label_lower}'
+        post_delete.connect(_bump_sender, sender=model, weak=False, dispatch_uid=uid)
+        if fields:
+            changes = _FieldChanges(model, fields)
+            post_init.connect(changes.remember, sender=model, weak=False, dispatch_uid=uid)
+            post_save.connect(changes.saved, sender=model, weak=False, dispatch_uid=uid)
+            continue
+        post_save.connect(_bump_sender, sender=model, weak=False, dispatch_uid=uid)
+        for field in model._meta.local_many_to_many:
+            m2m_changed.connect(
+                functools.partial(_bump_m2m, owner=model), sender=field.remote_field.through,
+                weak=False, dispatch_uid=f'{uid}:{field.name}',
+            )
+
+
+def _bump_m2m(sender, action, owner, **kwargs):
+    # kwargs['model'] is the other side of the relation, which may not be cached
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version(owner)
+
+
+# ---------------------------------------------------------------------------
+# Responses
+# ---------------------------------------------------------------------------
+
+def _cache_key(view, request, kwargs, models):
+    query = urlencode([(name, value) for name, values in sorted(request.query_params.lists()) for value in values])
+    parts = [
+        type(view).__qualname__, view.action or '', urlencode(sorted(kwargs.items())), query,
+        request.scheme, request.get_host(), request.accepted_media_type or '',
+        *map(str, _versions(models)),
+    ]
+    digest = hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+    return f'response:{type(view).__name__}:{digest}'
+
+
+def _store(key):
+    def callback(response):
+        data = (response.status_code, response.content, list(response.items()))
+        try:
+            cache.set(key, data, _ttl())
+        except Exception:
+            stats.record_error()
+            logger.warning('Could not cache response %s', key, exc_info=True)
+    return callback
+
+
+def _replay(data):
+    status, content, headers = data
+    response = HttpResponse(content, status=status)
+    for name, value in headers:
+        response[name] = value
+    return response
+
+
+def cache_anonymous_response(*models):
+    """
+    Cache a viewset method's 200 responses to anonymous GETs until one of
+    ``models`` changes (see invalidate_on_change) or RESPONSE_CACHE_SECONDS
+    pass.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or request.user.is_authenticated or not _ttl():
+                return func(view, request, *args, **kwargs)
+
+            name = f'{view.basename}-{view.action}' if getattr(view, 'basename', None) else type(view).__name__
+            try:
+                key = _cache_key(view, request, kwargs, models)
+                cached = cache.get(key)
+            except Exception:
+                stats.record_error()
+                logger.warning('Response cache unavailable', exc_info=True)
+                return func(view, request, *args, **kwargs)
+
+            stats.record(name, hit=cached is not None)
+            if cached is not None:
+                response = _replay(cached)
+                # Validators stored with the response (ConditionalGetMixin) still apply
+                return get_conditional_response(
+                    request, etag=response.get('ETag'),
+                    last_modified=parse_http_date_safe(response.get('Last-Modified', '')), response=response,
+                )
+            read_from_primary()
+            response = func(view, request, *args, **kwargs)
+            if response.status_code == 200 and isinstance(response, SimpleTemplateResponse):
+                # Stored once DRF has rendered it, with the negotiated renderer
+                response.add_post_render_callback(_store(key))
+            return response
+        return wrapper
+    return decorator
@@ -1,7 +1,8 @@
 import os
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import Csv, config
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -35,11 +36,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "pawjeevan_backend.metrics.MetricsMiddleware",
+    "pawjeevan_backend.profiling.QueryProfilingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "pawjeevan_backend.db_router.ReplicaPinMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -70,12 +74,91 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "pawjeevan_backend.wsgi.application"
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# DB_PROFILE picks the database backend:
+#   sqlite   - single file, tuned for concurrent writers: WAL journal (readers
+#              never block the writer), IMMEDIATE transactions (a writer takes
+#              the lock at BEGIN, so it waits on busy_timeout instead of
+#              failing with "database is locked" on lock upgrade),
+#              synchronous=NORMAL (safe in WAL mode) and memory-mapped reads
+#   postgres - PostgreSQL via psycopg 3, with a connection pool (DB_POOL) or
+#              persistent connections (DB_CONN_MAX_AGE)
+# bench/db_writes.py measures write throughput under either profile.
+DB_PROFILE = config('DB_PROFILE', default='sqlite')
+
+if DB_PROFILE == 'postgres':
+    DB_POOL = config('DB_POOL', default=True, cast=bool)
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": config('DB_NAME', default='pawjeevan'),
+            "USER": config('DB_USER', default='pawjeevan'),
+            "PASSWORD": config('DB_PASSWORD', default=''),
+            "HOST": config('DB_HOST', default='localhost'),
+            "PORT": config('DB_PORT', default='5432'),
+            # Pooled connections are returned to the pool after each request,
+            # so they must not also be kept open by CONN_MAX_AGE
+            "CONN_MAX_AGE": 0 if DB_POOL else config('DB_CONN_MAX_AGE', cast=int, default=60),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "pool": {
+                    "min_size": config('DB_POOL_MIN_SIZE', cast=int, default=2),
+                    "max_size": config('DB_POOL_MAX_SIZE', cast=int, default=10),
+                    "timeout": config('DB_POOL_TIMEOUT', cast=int, default=10),
+                },
+            } if DB_POOL else {},
+        }
     }
-}
+elif DB_PROFILE == 'sqlite':
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": config('SQLITE_PATH', default=str(BASE_DIR / "db.sqlite3")),
+            # Keeps the PRAGMAs below from running on every request
+            "CONN_MAX_AGE": config('DB_CONN_MAX_AGE', cast=int, default=60),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "transaction_mode": "IMMEDIATE",
+                # Seconds a writer waits for the lock (sqlite3 busy_timeout)
+                "timeout": config('SQLITE_BUSY_TIMEOUT', cast=int, default=20),
+                "init_command": (
+                    "PRAGMA journal_mode=WAL;"
+                    "PRAGMA synchronous=NORMAL;"
+                    f"PRAGMA mmap_size={config('SQLITE_MMAP_SIZE', cast=int, default=134217728)};"
+                    "PRAGMA cache_size=-20000;"
+                    "PRAGMA temp_store=MEMORY;"
+                ),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"DB_PROFILE must be 'sqlite' or 'postgres', not {DB_PROFILE!r}")
+
+# Read replicas for the catalogue, feed, events and adoption listings
+# (pawjeevan_backend/db_router.py). DB_REPLICAS is a comma separated list of
+# replica hosts ("host" or "host:port"; same name and credentials as the
+# primary) for postgres, or of replica database files (e.g. kept up to date
+# by LiteFS) for sqlite. They become the aliases replica_1, replica_2, ...
+DB_REPLICAS = config('DB_REPLICAS', default='', cast=Csv())
+DATABASE_REPLICAS = []
+for _number, _location in enumerate(DB_REPLICAS, start=1):
+    _replica = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+    if DB_PROFILE == 'postgres':
+        _host, _, _port = _location.partition(':')
+        _replica.update(HOST=_host, PORT=_port or _replica["PORT"])
+    else:
+        _replica["NAME"] = _location
+    DATABASES[f"replica_{_number}"] = _replica
+    DATABASE_REPLICAS.append(f"replica_{_number}")
+
+DATABASE_ROUTERS = ["pawjeevan_backend.db_router.ReplicaRouter"]
+# Adds the second test database the replica routing tests read from
+TEST_RUNNER = "pawjeevan_backend.test_runner.TestRunner"
+DB_REPLICA_PIN_SECONDS = config('DB_REPLICA_PIN_SECONDS', cast=int, default=10)  # reads stay on the primary after a write
+DB_REPLICA_MAX_LAG = config('DB_REPLICA_MAX_LAG', cast=float, default=10)  # seconds; laggier replicas are skipped
+DB_REPLICA_LAG_CHECK_SECONDS = config('DB_REPLICA_LAG_CHECK_SECONDS', cast=int, default=5)
+SCHEDULER_REPLICA_HEARTBEAT_SECONDS = config('SCHEDULER_REPLICA_HEARTBEAT_SECONDS', cast=int, default=5)
+# A primary heartbeat this many intervals old means the scheduler stopped; lag is unknown and reads use the primary
+DB_REPLICA_HEARTBEAT_STALE_INTERVALS = config('DB_REPLICA_HEARTBEAT_STALE_INTERVALS', cast=int, default=3)
 
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -101,7 +184,7 @@ AUTH_USER_MODEL = "users.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
@@ -113,6 +196,22 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ),
+    # Proxies in front of the app that append to X-Forwarded-For; the client
+    # IP used for rate limits is the address the outermost one saw. With 0
+    # the header is ignored (REMOTE_ADDR), since clients can forge it
+    "NUM_PROXIES": config("NUM_PROXIES", cast=int, default=0),
+    # Sliding-window limits for the auth endpoints (users/throttling.py),
+    # keyed by client IP and by the email the request is about
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": config("THROTTLE_LOGIN_IP", default="30/min"),
+        "login_email": config("THROTTLE_LOGIN_EMAIL", default="10/min"),
+        "register_ip": config("THROTTLE_REGISTER_IP", default="20/hour"),
+        "register_email": config("THROTTLE_REGISTER_EMAIL", default="5/hour"),
+        "otp_send_ip": config("THROTTLE_OTP_SEND_IP", default="20/hour"),
+        "otp_send_email": config("THROTTLE_OTP_SEND_EMAIL", default="5/hour"),
+        "otp_verify_ip": config("THROTTLE_OTP_VERIFY_IP", default="60/hour"),
+        "otp_verify_email": config("THROTTLE_OTP_VERIFY_EMAIL", default="10/hour"),
+    },
 }
 
 SIMPLE_JWT = {
@@ -122,6 +221,12 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
 }
 
+# Seconds an authenticated user stays cached by CachedJWTAuthentication. It
+# needs a cache shared by all workers (REDIS_URL); with the local-memory cache
+# users are only cached if JWT_USER_CACHE_LOCAL says there is a single process
+JWT_USER_CACHE_TTL = config('JWT_USER_CACHE_TTL', cast=int, default=60)
+JWT_USER_CACHE_LOCAL = config('JWT_USER_CACHE_LOCAL', cast=bool, default=False)
+
 # CORS DEV (relax for dev only)
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -159,4 +264,118 @@ raw_allowed = config('GOOGLE_ALLOWED_CLIENT_IDS', default='')
 if raw_allowed:
     GOOGLE_ALLOWED_CLIENT_IDS = [c.strip() for c in raw_allowed.split(',') if c.strip()]
 else:
-    GOOGLE_ALLOWED_CLIENT_IDS = [GOOGLE_CLIENT_ID] if GOOGLE_CLIENT_ID else []
\ No newline at end of file
+    GOOGLE_ALLOWED_CLIENT_IDS = [GOOGLE_CLIENT_ID] if GOOGLE_CLIENT_ID else []
+
+# AI module: maximum number of images accepted by /api/ai/breed-detection/batch/
+BREED_DETECTION_MAX_BATCH = config('BREED_DETECTION_MAX_BATCH', cast=int, default=10)
+
+# AI module: photo enhancement worker pool and output limits
+PHOTO_ENHANCEMENT_WORKERS = config('PHOTO_ENHANCEMENT_WORKERS', cast=int, default=2)
+PHOTO_ENHANCEMENT_MAX_DIMENSION = config('PHOTO_ENHANCEMENT_MAX_DIMENSION', cast=int, default=2048)
+PHOTO_ENHANCEMENT_MAX_PIXELS = config('PHOTO_ENHANCEMENT_MAX_PIXELS', cast=int, default=40_000_000)  # decoded size limit; JPEGs are downscaled while decoding first
+PHOTO_ENHANCEMENT_JPEG_QUALITY = config('PHOTO_ENHANCEMENT_JPEG_QUALITY', cast=int, default=90)
+PHOTO_ENHANCEMENT_TIMEOUT = config('PHOTO_ENHANCEMENT_TIMEOUT', cast=int, default=600)  # requeue jobs whose worker died
+
+# AI module: in-process cache for low-temperature Ollama replies. Only calls
+# at or below OLLAMA_CACHE_MAX_TEMPERATURE are cached, and both temperatures
+# below default to 0.7, so the cache stays unused until one is lowered
+OLLAMA_CACHE_MAX_ENTRIES = config('OLLAMA_CACHE_MAX_ENTRIES', cast=int, default=256)
+OLLAMA_CACHE_TTL = config('OLLAMA_CACHE_TTL', cast=int, default=3600)  # seconds
+OLLAMA_CACHE_MAX_TEMPERATURE = config('OLLAMA_CACHE_MAX_TEMPERATURE', cast=float, default=0.3)
+# Sampling temperatures of text-only disease analysis and of a chat session's
+# first question. Set them to OLLAMA_CACHE_MAX_TEMPERATURE or lower to cache
+# their replies, at the price of less varied answers
+OLLAMA_TEXT_ANALYSIS_TEMPERATURE = config('OLLAMA_TEXT_ANALYSIS_TEMPERATURE', cast=float, default=0.7)
+OLLAMA_FIRST_QUESTION_TEMPERATURE = config('OLLAMA_FIRST_QUESTION_TEMPERATURE', cast=float, default=0.7)
+
+# Seconds a user's cached unread-notification count is kept before recounting
+NOTIFICATION_COUNT_CACHE_TTL = config('NOTIFICATION_COUNT_CACHE_TTL', cast=int, default=300)
+# Like JWT_USER_CACHE_LOCAL: without a shared cache (REDIS_URL) counts are
+# only cached if there is a single process
+NOTIFICATION_COUNT_CACHE_LOCAL = config('NOTIFICATION_COUNT_CACHE_LOCAL', cast=bool, default=False)
+
+# Realtime push channel (/api/events/, see pawjeevan_backend/realtime.py)
+REALTIME_HEARTBEAT_SECONDS = config('REALTIME_HEARTBEAT_SECONDS', cast=int, default=15)
+REALTIME_MAX_QUEUE = config('REALTIME_MAX_QUEUE', cast=int, default=100)  # events buffered per client
+# How events reach the process serving the client: auto (redis with
+# REDIS_URL, else local), redis, database (several processes without Redis;
+# writes a row per event whether or not anyone listens) or local (single process only)
+REALTIME_CHANNEL = config('REALTIME_CHANNEL', default='auto')
+REALTIME_POLL_SECONDS = config('REALTIME_POLL_SECONDS', cast=float, default=1)  # database channel
+REALTIME_EVENT_RETENTION = config('REALTIME_EVENT_RETENTION', cast=int, default=300)  # database channel, seconds
+
+# Long-running scheduler (python manage.py run_scheduler, see admin_panel/scheduler.py)
+SCHEDULER_POLL_SECONDS = config('SCHEDULER_POLL_SECONDS', cast=int, default=30)  # max delay for rows added elsewhere
+SCHEDULER_LEASE_SECONDS = config('SCHEDULER_LEASE_SECONDS', cast=int, default=60)
+SCHEDULER_REGISTRATION_CLEANUP_SECONDS = config('SCHEDULER_REGISTRATION_CLEANUP_SECONDS', cast=int, default=15 * 60)
+SCHEDULER_TOKEN_CLEANUP_SECONDS = config('SCHEDULER_TOKEN_CLEANUP_SECONDS', cast=int, default=6 * 60 * 60)
+SCHEDULER_STATS_ROLLUP_SECONDS = config('SCHEDULER_STATS_ROLLUP_SECONDS', cast=int, default=10 * 60)
+SCHEDULER_PROFILING_PRUNE_SECONDS = config('SCHEDULER_PROFILING_PRUNE_SECONDS', cast=int, default=60 * 60)
+
+# ScheduledNotification work queue (users/notification_queue.py)
+SCHEDULED_NOTIFICATION_BATCH_SIZE = config('SCHEDULED_NOTIFICATION_BATCH_SIZE', cast=int, default=500)
+SCHEDULED_NOTIFICATION_LEASE_SECONDS = config('SCHEDULED_NOTIFICATION_LEASE_SECONDS', cast=int, default=300)
+SCHEDULED_NOTIFICATION_MAX_ATTEMPTS = config('SCHEDULED_NOTIFICATION_MAX_ATTEMPTS', cast=int, default=5)
+SCHEDULED_NOTIFICATION_RETRY_SECONDS = config('SCHEDULED_NOTIFICATION_RETRY_SECONDS', cast=int, default=60)  # doubles per attempt
+
+# Shared cache: cached JWT users, unread counters, rate limits, read replica
+# pins and anonymous responses. Local memory (one per process) unless
+# REDIS_URL points at Redis or a compatible server (Valkey, KeyDB...), e.g.
+# redis://localhost:6379/0, which every worker then shares
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "pawjeevan",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "pawjeevan",
+            "OPTIONS": {"MAX_ENTRIES": config('LOCMEM_CACHE_MAX_ENTRIES', cast=int, default=10000)},
+        }
+    }
+
+# Anonymous GETs of categories, brands, featured products and the posts feed
+# are served from the cache (pawjeevan_backend/response_cache.py) until the
+# data changes, or for at most this long; 0 disables it
+RESPONSE_CACHE_SECONDS = config('RESPONSE_CACHE_SECONDS', cast=int, default=60)
+
+# Cache alias holding rate-limit counters; falls back to a per-process
+# local-memory cache if it is unreachable
+THROTTLE_CACHE_ALIAS = config('THROTTLE_CACHE_ALIAS', default='default')
+
+# Google sign-in: signing certificates endpoint (override to point tests at a
+# local stand-in) and how long to keep certs whose response has no max-age
+GOOGLE_CERTS_URL = config('GOOGLE_CERTS_URL', default='https://www.googleapis.com/oauth2/v1/certs')
+GOOGLE_CERTS_DEFAULT_TTL = config('GOOGLE_CERTS_DEFAULT_TTL', cast=int, default=300)
+# A token signed with an unknown key refetches the certs at most this often
+# (seconds); in between such tokens are rejected without a request to Google
+GOOGLE_CERTS_MIN_REFRESH_SECONDS = config('GOOGLE_CERTS_MIN_REFRESH_SECONDS', cast=int, default=60)
+
+# Admin dashboard: today's DailyStats row is re-rolled on read when older than this
+DAILY_STATS_MAX_AGE = config('DAILY_STATS_MAX_AGE', cast=int, default=900)  # seconds
+
+# Admin sales/user analytics responses may be cached by the client this long
+SALES_ANALYTICS_CACHE_SECONDS = config('SALES_ANALYTICS_CACHE_SECONDS', cast=int, default=300)
+
+# Per-request SQL profiling (pawjeevan_backend/profiling.py): Server-Timing
+# headers on every response; slow requests are logged and sampled into
+# admin_panel.SlowRequestLog
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=True, cast=bool)
+PROFILING_SLOW_REQUEST_MS = config('PROFILING_SLOW_REQUEST_MS', cast=int, default=500)
+PROFILING_SLOW_QUERY_COUNT = config('PROFILING_SLOW_QUERY_COUNT', cast=int, default=50)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', cast=float, default=0.1)  # fraction of slow requests stored
+PROFILING_LOG_RETENTION_DAYS = config('PROFILING_LOG_RETENTION_DAYS', cast=int, default=7)  # pruned by the scheduler
+PROFILING_TOP_QUERIES = config('PROFILING_TOP_QUERIES', cast=int, default=5)
+
+# Latency histograms served at /metrics (pawjeevan_backend/metrics.py). Under
+# gunicorn point METRICS_MULTIPROC_DIR at a directory shared by the workers
+# (emptied on server start) so every scrape sees all of them
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_MULTIPROC_DIR = config('METRICS_MULTIPROC_DIR', default='')
+METRICS_FLUSH_SECONDS = config('METRICS_FLUSH_SECONDS', cast=int, default=5)
@@ -0,0 +1,34 @@
+"""
+Test runner for `manage.py test` (TEST_RUNNER).
+
+The read replica routing tests (pawjeevan_backend/tests.py) need a second
+database to play the replica. It only exists for test runs, so it is added
+to the connections here instead of to settings.DATABASES, and only created
+when the tests being run use it. Other runners can call
+add_replica_test_database() before the tests are collected; without it
+those tests are skipped.
+"""
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.runner import DiscoverRunner
+
+REPLICA_TEST_ALIAS = 'replica_test'
+
+
+def add_replica_test_database():
+    default = connections.settings[DEFAULT_DB_ALIAS]
+    sqlite = default['ENGINE'].endswith('sqlite3')
+    connections.settings.setdefault(REPLICA_TEST_ALIAS, {
+        **default,
+        'TEST': {
+            **default['TEST'],
+            # In-memory for SQLite; its own database next to the primary's otherwise
+            'NAME': None if sqlite else f"test_{default['NAME']}_replica",
+            'MIRROR': None,
+        },
+    })
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        add_replica_test_database()
@@ -0,0 +1,807 @@
+"""
+Read replica routing (pawjeevan_backend/db_router.py) against two test
+databases: the usual one as the primary and a second one as the replica.
+Rows are written to one or the other on purpose so a response shows which
+database served it.
+
+The anonymous response cache (pawjeevan_backend/response_cache.py) runs on
+the default local-memory cache and on Redis, played by a stand-in server
+that speaks just enough of the protocol for Django's RedisCache.
+
+Conditional GETs (pawjeevan_backend/conditional.py) go through the real
+list and retrieve endpoints they are enabled on.
+
+The SSE endpoint (pawjeevan_backend/realtime.py) is read through the ASGI
+stack with each channel: local, database (rows written as another process
+would) and Redis pub/sub on the stand-in server.
+
+Metrics (pawjeevan_backend/metrics.py) are rendered from this process's
+registry and, with METRICS_MULTIPROC_DIR, from other processes' snapshot
+files written into a temporary directory.
+
+Query profiling (pawjeevan_backend/profiling.py) is checked through the
+Server-Timing header, its slow-request log lines and SlowRequestLog rows.
+"""
+import asyncio
+import json
+import os
+import socketserver
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+from importlib.util import find_spec
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from admin_panel.models import RealtimeEvent, ReplicationHeartbeat, SlowRequestLog
+from community.models import Comment, Group, Post
+from store.models import Brand, Category, Product, Review
+from users.models import Notification, PetProfile, User
+
+from . import metrics, realtime, response_cache
+from .profiling import prune_slow_request_logs
+from .db_router import lag_monitor
+from .test_runner import REPLICA_TEST_ALIAS as REPLICA
+
+HAS_REPLICA = REPLICA in connections
+
+
+@unittest.skipUnless(HAS_REPLICA, 'no replica_test database (run with pawjeevan_backend.test_runner)')
+@override_settings(DATABASE_REPLICAS=[REPLICA], DB_REPLICA_MAX_LAG=10, RESPONSE_CACHE_SECONDS=0)
+class ReplicaRoutingTests(TestCase):
+    databases = {DEFAULT_DB_ALIAS, REPLICA} if HAS_REPLICA else {DEFAULT_DB_ALIAS}
+
+    @classmethod
+    def setUpTestData(cls):
+        # The same user on both sides, as replication would leave it
+        for alias in (DEFAULT_DB_ALIAS, REPLICA):
+            User.objects.db_manager(alias).create_user(pk=1, username='reader', email='reader@example.com', password='x')
+        cls.user = User.objects.get(pk=1)
+        cls.primary_post = Post.objects.create(author_id=1, content='only on the primary')
+        cls.replica_post = Post.objects.using(REPLICA).create(author_id=1, content='only on the replica')
+
+    def setUp(self):
+        cache.clear()
+        lag_monitor.reset()
+        self.client = APIClient()
+        self.beat(primary_age=0, replica_age=0)
+
+    def beat(self, primary_age, replica_age):
+        """Heartbeats as the scheduler and replication would leave them, `age` seconds old"""
+        now = timezone.now()
+        for alias, age in ((DEFAULT_DB_ALIAS, primary_age), (REPLICA, replica_age)):
+            ReplicationHeartbeat.objects.using(alias).update_or_create(
+                pk=1, defaults={'beat_at': now - timedelta(seconds=age)},
+            )
+
+    def feed(self):
+        response = self.client.get('/api/community/posts/')
+        self.assertEqual(response.status_code, 200)
+        return {post['content'] for post in response.json()['results']}
+
+    def test_safe_reads_use_the_replica(self):
+        self.assertEqual(self.feed(), {'only on the replica'})
+
+    def test_no_replicas_configured(self):
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.feed(), {'only on the primary'})
+
+    def test_views_that_do_not_opt_in_use_the_primary(self):
+        Comment.objects.create(post=self.primary_post, author_id=1, content='primary comment')
+        response = self.client.get('/api/community/comments/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c['content'] for c in response.data['results']], ['primary comment'])
+
+    def test_unsafe_requests_use_the_primary(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(f'/api/community/posts/{self.primary_post.pk}/like/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.primary_post.likes.filter(pk=1).exists())
+
+    def test_user_is_pinned_to_the_primary_after_a_write(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/api/community/posts/', {'content': 'just posted'})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('just posted', self.feed())
+
+        # Others still read the replica
+        self.assertEqual(APIClient().get('/api/community/posts/').data['count'], 1)
+
+        cache.clear()  # the pin expired
+        self.assertEqual(self.feed(), {'only on the replica'})
+
+    def test_failed_writes_do_not_pin(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/api/community/posts/', {})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.feed(), {'only on the replica'})
+
+    def test_lagging_replica_is_skipped_and_reported(self):
+        self.beat(primary_age=0, replica_age=30)
+
+        self.assertEqual(self.feed(), {'only on the primary'})
+        _, gauges = metrics.collect()
+        self.assertAlmostEqual(gauges[('db_replica_lag_seconds', (('replica', REPLICA),))], 30, places=0)
+
+    def test_replica_within_max_lag_is_used(self):
+        self.beat(primary_age=0, replica_age=3)
+
+        self.assertEqual(self.feed(), {'only on the replica'})
+
+    def test_missing_replica_heartbeat_means_unknown_lag(self):
+        # Replication never delivered the row
+        ReplicationHeartbeat.objects.using(REPLICA).all().delete()
+
+        with self.assertLogs('pawjeevan_backend.db_router', 'WARNING'):
+            self.assertEqual(self.feed(), {'only on the primary'})
+
+    def test_missing_primary_heartbeat_means_unknown_lag(self):
+        ReplicationHeartbeat.objects.all().delete()
+
+        with self.assertLogs('pawjeevan_backend.db_router', 'WARNING'):
+            self.assertEqual(self.feed(), {'only on the primary'})
+
+    def test_stale_primary_heartbeat_means_unknown_lag(self):
+        # The scheduler stopped: both sides agree, but on a value from long ago
+        self.beat(primary_age=60, replica_age=60)
+
+        with self.assertLogs('pawjeevan_backend.db_router', 'WARNING'):
+            self.assertEqual(self.feed(), {'only on the primary'})
+
+    def test_cached_responses_are_built_from_the_primary(self):
+        with override_settings(RESPONSE_CACHE_SECONDS=60):
+            self.assertEqual(self.feed(), {'only on the primary'})
+            self.assertEqual(self.feed(), {'only on the primary'})  # the cached copy
+
+    def test_replicas_are_never_migrated(self):
+        self.assertFalse(router.allow_migrate(REPLICA, 'community', model_name='post'))
+        self.assertTrue(router.allow_migrate(DEFAULT_DB_ALIAS, 'community', model_name='post'))
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer', email='writer@example.com', password='x')
+        cls.category = Category.objects.create(name='Test toys', slug='test-toys')
+        cls.post = Post.objects.create(author=cls.user, content='hello')
+
+    def setUp(self):
+        cache.clear()
+        response_cache.stats.reset()
+        self.client = APIClient()
+
+    def get(self, url, client=None):
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+            response = (client or self.client).get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def category_names(self, url='/api/store/categories/'):
+        data, _ = self.get(url)
+        return {c['name'] for c in data['results']}
+
+    def test_repeated_anonymous_request_runs_no_queries(self):
+        first, queries = self.get('/api/store/categories/')
+        self.assertGreater(queries, 0)
+        second, queries = self.get('/api/store/categories/')
+        self.assertEqual(queries, 0)
+        self.assertEqual(first, second)
+        self.assertEqual(response_cache.get_response_cache_stats()['views']['category-list'],
+                         {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_query_string_is_normalized(self):
+        self.get('/api/store/brands/?page=1&ordering=name')
+        _, queries = self.get('/api/store/brands/?ordering=name&page=1')
+        self.assertEqual(queries, 0)
+        _, queries = self.get('/api/store/brands/?ordering=-name&page=1')
+        self.assertGreater(queries, 0)
+
+    def test_save_and_delete_invalidate(self):
+        self.assertIn('Test toys', self.category_names())
+        self.category.name = 'Renamed toys'
+        self.category.save()
+        self.assertIn('Renamed toys', self.category_names())
+        self.category.delete()
+        self.assertNotIn('Renamed toys', self.category_names())
+
+    def test_featured_products_follow_category_changes(self):
+        Product.objects.create(
+            name='Ball', slug='ball', description='Squeaky', category=self.category, pet_type='dog',
+            price='3.00', sku='BALL-1', is_featured=True,
+        )
+        url = '/api/store/products/featured/?category__slug__in=test-toys'
+        data, _ = self.get(url)
+        self.assertEqual([p['name'] for p in data], ['Ball'])
+        self.category.slug = 'test-toys-renamed'
+        self.category.save()
+        data, _ = self.get(url)
+        self.assertEqual(data, [])
+
+    def test_m2m_changes_invalidate(self):
+        data, _ = self.get('/api/community/posts/')
+        self.assertEqual(data['results'][0]['likes_count'], 0)
+        self.post.likes.add(self.user)
+        data, _ = self.get('/api/community/posts/')
+        self.assertEqual(data['results'][0]['likes_count'], 1)
+
+    def test_only_author_fields_of_the_feed_invalidate_it(self):
+        self.get('/api/community/posts/')
+        reader = User.objects.create_user(username='reader', email='reader@example.com', password='x')
+        reader.following.add(self.user)
+        user = User.objects.get(pk=self.user.pk)
+        user.bio = 'Dog person'
+        user.save()
+        _, queries = self.get('/api/community/posts/')
+        self.assertEqual(queries, 0)
+
+        user.username = 'renamed'
+        user.save()
+        data, _ = self.get('/api/community/posts/')
+        self.assertEqual(data['results'][0]['author_username'], 'renamed')
+
+        user.avatar = 'avatars/renamed.jpg'
+        user.save()
+        data, _ = self.get('/api/community/posts/')
+        self.assertTrue(data['results'][0]['author_avatar'].endswith('/avatars/renamed.jpg'))
+
+    def test_authenticated_requests_are_not_cached(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.get('/api/community/posts/', client)
+        _, queries = self.get('/api/community/posts/', client)
+        self.assertGreater(queries, 0)
+        self.assertEqual(response_cache.get_response_cache_stats()['hits'], 0)
+
+    @override_settings(RESPONSE_CACHE_SECONDS=0)
+    def test_disabled(self):
+        self.get('/api/store/categories/')
+        _, queries = self.get('/api/store/categories/')
+        self.assertGreater(queries, 0)
+
+    def test_stats_endpoint(self):
+        self.get('/api/store/products/featured/')
+        self.get('/api/store/products/featured/')
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='x')
+        self.client.force_authenticate(admin)
+        data, _ = self.get('/api/admin/analytics/response-cache/')
+        self.assertEqual(data['views']['product-featured']['hit_rate'], 0.5)
+
+
+class StandInRedis:
+    """
+    In-memory server answering the commands Django's RedisCache and the
+    realtime channel's pub/sub send
+    """
+
+    def __init__(self):
+        self.data = {}  # key: [value, expires at (time.monotonic) or None]
+        self.subscribers = {}  # channel: {Handler}
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.resp3 = False
+                self.write_lock = threading.Lock()  # PUBLISH from other connections writes here too
+                try:
+                    self.serve()
+                finally:
+                    with server.lock:
+                        for handlers in server.subscribers.values():
+                            handlers.discard(self)
+
+            def serve(self):
+                queued = None
+                while True:
+                    command = self.read_command()
+                    if command is None:
+                        return
+                    name = command[0].upper()
+                    if name == b'HELLO':
+                        self.resp3 = command[1:2] == [b'3']
+                    if name == b'SUBSCRIBE':
+                        with server.lock:
+                            for channel in command[1:]:
+                                server.subscribers.setdefault(channel, set()).add(self)
+                        reply = b''.join(self.push(b'subscribe', channel, 1) for channel in command[1:])
+                    elif name == b'MULTI':
+                        queued, reply = [], b'+OK\r\n'
+                    elif name == b'EXEC':
+                        replies = [server.execute(c, self.resp3) for c in queued]
+                        queued, reply = None, b'*%d\r\n' % len(replies) + b''.join(replies)
+                    elif queued is not None:
+                        queued.append(command)
+                        reply = b'+QUEUED\r\n'
+                    else:
+                        reply = server.execute(command, self.resp3)
+                    self.write(reply)
+
+            def push(self, kind, channel, payload):
+                """A pub/sub message (a RESP3 push, a plain array in RESP2)"""
+                tail = b':%d\r\n' % payload if isinstance(payload, int) else _bulk(payload)
+                return (b'>3\r\n' if self.resp3 else b'*3\r\n') + _bulk(kind) + _bulk(channel) + tail
+
+            def write(self, data):
+                with self.write_lock:
+                    self.wfile.write(data)
+
+            def read_command(self):
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                args = []
+                for _ in range(int(line[1:])):
+                    size = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(size + 2)[:-2])
+                return args
+
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'redis://127.0.0.1:{self.server.server_address[1]}/0'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            entry = None
+        return entry
+
+    def execute(self, command, resp3=False):
+        null = b'_\r\n' if resp3 else b'$-1\r\n'
+        name, args = command[0].upper().decode(), command[1:]
+        with self.lock:
+            if name == 'GET':
+                entry = self._live(args[0])
+                return _bulk(entry[0]) if entry else null
+            if name == 'MGET':
+                entries = [self._live(key) for key in args]
+                return b'*%d\r\n' % len(args) + b''.join(_bulk(e[0]) if e else null for e in entries)
+            if name == 'SET':
+                key, value, options = args[0], args[1], [o.upper() for o in args[2:]]
+                if b'NX' in options and self._live(key):
+                    return null
+                ttl = int(options[options.index(b'EX') + 1]) if b'EX' in options else None
+                self.data[key] = [value, None if ttl is None else time.monotonic() + ttl]
+                return b'+OK\r\n'
+            if name == 'MSET':
+                for key, value in zip(args[::2], args[1::2]):
+                    self.data[key] = [value, None]
+                return b'+OK\r\n'
+            if name in ('DEL', 'EXISTS'):
+                live = [key for key in args if self._live(key)]
+                if name == 'DEL':
+                    for key in live:
+                        del self.data[key]
+                return b':%d\r\n' % len(live)
+            if name == 'INCRBY':
+                entry = self._live(args[0]) or self.data.setdefault(args[0], [b'0', None])
+                entry[0] = b'%d' % (int(entry[0]) + int(args[1]))
+                return b':' + entry[0] + b'\r\n'
+            if name in ('EXPIRE', 'PERSIST'):
+                entry = self._live(args[0])
+                if entry:
+                    entry[1] = time.monotonic() + int(args[1]) if name == 'EXPIRE' else None
+                return b':%d\r\n' % bool(entry)
+            if name == 'PUBLISH':
+                handlers = list(self.subscribers.get(args[0], ()))
+                for handler in handlers:
+                    handler.write(handler.push(b'message', args[0], args[1]))
+                return b':%d\r\n' % len(handlers)
+            if name == 'FLUSHDB':
+                self.data.clear()
+                return b'+OK\r\n'
+            if name == 'HELLO':
+                # redis-py 8 switches to RESP3, where only nulls look different
+                fields = {b'server': b'redis', b'version': b'7.2.0', b'proto': int(args[0]) if args else 2}
+                return b'%%%d\r\n' % len(fields) + b''.join(
+                    _bulk(k) + (b':%d\r\n' % v if isinstance(v, int) else _bulk(v)) for k, v in fields.items()
+                )
+            if name in ('PING', 'CLIENT', 'SELECT'):
+                return b'+OK\r\n'
+            return b'-ERR unknown command ' + name.encode() + b'\r\n'
+
+
+def _bulk(value):
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+@override_settings(REALTIME_CHANNEL='local')
+class RealtimeTests(TransactionTestCase):
+    # Committed rows: the database channel polls from its own thread
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='listener', email='listener@example.com', password='x')
+        self.token = str(AccessToken.for_user(self.user))
+
+    async def open_stream(self):
+        response = await self.async_client.get('/api/events/', {'token': self.token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = aiter(response.streaming_content)
+        self.assertEqual(await anext(content), b'retry: 5000\n\n')
+        return content
+
+    async def next_event(self, content, timeout=5):
+        while True:
+            chunk = (await asyncio.wait_for(anext(content), timeout)).decode()
+            if chunk.startswith(':'):
+                continue  # heartbeat
+            fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+            return fields['event'], json.loads(fields['data'])
+
+    def notify(self):
+        return Notification.objects.create(
+            user=self.user, notification_type='system', title='Hello', message='Welcome to PawJeevan',
+        )
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.client.get('/api/events/').status_code, 401)
+        self.assertEqual(self.client.get('/api/events/', {'token': 'nope'}).status_code, 401)
+
+    async def test_notification(self):
+        content = await self.open_stream()
+        await sync_to_async(self.notify)()
+        event, data = await self.next_event(content)
+        self.assertEqual(event, 'notification')
+        self.assertEqual(data['title'], 'Hello')
+        await content.aclose()
+
+    async def test_group_message(self):
+        def post():
+            group = Group.objects.create(
+                name='Beagles', slug='beagles', description='Beagle owners', group_type='interest', creator=self.user,
+            )
+            group.members.add(self.user)
+            return group
+
+        group = await sync_to_async(post)()
+        content = await self.open_stream()
+        await group.group_messages.acreate(sender=self.user, content='Woof')
+        event, data = await self.next_event(content)
+        self.assertEqual(event, 'group_message')
+        self.assertEqual((data['group_id'], data['content']), (group.id, 'Woof'))
+        await content.aclose()
+
+    @override_settings(REALTIME_CHANNEL='auto', REDIS_URL='')
+    def test_without_redis_nothing_is_written_for_absent_listeners(self):
+        self.assertIsInstance(realtime.get_channel(), realtime.LocalChannel)
+        self.assertFalse(realtime.has_listeners(realtime.user_topic(self.user.id)))
+        self.notify()
+        self.assertFalse(RealtimeEvent.objects.exists())
+
+
+@override_settings(REALTIME_CHANNEL='database', REALTIME_POLL_SECONDS=0.05)
+class DatabaseRealtimeTests(RealtimeTests):
+    async def test_events_of_other_processes(self):
+        content = await self.open_stream()
+        # What the scheduler or a management command would write
+        await RealtimeEvent.objects.acreate(
+            topic=realtime.user_topic(self.user.id), event_type='notification', data={'title': 'From afar'},
+        )
+        event, data = await self.next_event(content)
+        self.assertEqual((event, data), ('notification', {'title': 'From afar'}))
+        await content.aclose()
+
+    def test_expired_events_are_pruned(self):
+        old = RealtimeEvent.objects.create(topic='user:1', event_type='notification', data={})
+        RealtimeEvent.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(minutes=10))
+        with self.settings(REALTIME_EVENT_RETENTION=60):
+            realtime.DatabaseChannel().send([('user:1', 'notification', {'n': 1})])
+        self.assertEqual(list(RealtimeEvent.objects.values_list('data', flat=True)), [{'n': 1}])
+
+
+@unittest.skipUnless(find_spec('redis'), 'redis client not installed')
+class RedisRealtimeTests(RealtimeTests):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.redis = StandInRedis()
+        # After RealtimeTests' own override
+        cls.enterClassContext(override_settings(REALTIME_CHANNEL='redis', REDIS_URL=cls.redis.url))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.redis.stop()
+
+    def setUp(self):
+        super().setUp()
+        # The listener subscribes on its own thread; let it finish before publishing
+        channel = realtime.get_channel()
+        self.assertIsInstance(channel, realtime.RedisChannel)
+        channel.listen()
+        deadline = time.monotonic() + 5
+        while not self.redis.subscribers and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+@unittest.skipUnless(find_spec('redis'), 'redis client not installed')
+class RedisResponseCacheTests(ResponseCacheTests):
+    @classmethod
+    def setUpClass(cls):
+        cls.redis = StandInRedis()
+        cls.enterClassContext(override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': cls.redis.url},
+        }))
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.redis.stop()
+
+    def test_responses_are_stored_in_redis(self):
+        self.get('/api/store/categories/')
+        self.assertTrue(any(key.startswith(b':1:response:CategoryViewSet:') for key in self.redis.data))
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='owner', email='owner@example.com', password='x')
+        cls.other = User.objects.create_user(username='other', email='other@example.com', password='x')
+        cls.category = Category.objects.create(name='Test food', slug='test-food')
+        cls.brand = Brand.objects.create(name='Test brand', slug='test-brand')
+        cls.product = Product.objects.create(
+            name='Kibble', slug='kibble', description='Dry food', category=cls.category, brand=cls.brand,
+            pet_type='dog', price='10.00', sku='KIB-1',
+        )
+        cls.group = Group.objects.create(
+            name='Walkers', slug='walkers', description='Daily walks', group_type='interest', creator=cls.user,
+        )
+        cls.pet = PetProfile.objects.create(owner=cls.user, name='Rex', pet_type='dog', gender='male', weight=10)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, **headers):
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+            response = self.client.get(url, headers=headers)
+        return response, len(queries)
+
+    def assertRevalidates(self, url):
+        """The URL's ETag gets a 304 at a lower cost; returns the ETag"""
+        response, full_queries = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response, queries = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        self.assertLess(queries, full_queries)
+        return etag
+
+    def assertChanged(self, url, etag):
+        response, _ = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_product_detail(self):
+        url = f'/api/store/products/{self.product.slug}/'
+        etag = self.assertRevalidates(url)
+        review = Review.objects.create(product=self.product, user=self.other, rating=5, title='Good', comment='Yes')
+        self.assertChanged(url, etag)
+
+        etag = self.assertRevalidates(url)
+        review.delete()
+        self.assertChanged(url, etag)
+
+        # Nested category and brand are part of the representation
+        etag = self.assertRevalidates(url)
+        self.brand.name = 'Renamed brand'
+        self.brand.save()
+        self.assertChanged(url, etag)
+
+    def test_product_list_notices_deletions(self):
+        url = '/api/store/products/'
+        extra = Product.objects.create(name='Treats', slug='treats', description='-', pet_type='dog',
+                                       price='2.00', sku='TRT-1')
+        etag = self.assertRevalidates(url)
+        extra.delete()
+        self.assertChanged(url, etag)
+
+    def test_query_string_is_part_of_the_etag(self):
+        first, _ = self.get('/api/store/products/?ordering=price')
+        second, _ = self.get('/api/store/products/?ordering=-price')
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    def test_last_modified_only_where_exact(self):
+        response, _ = self.get(f'/api/store/categories/{self.category.slug}/')
+        self.assertEqual(response['Last-Modified'], http_date(self.category.updated_at.timestamp()))
+        for url in ('/api/store/categories/', f'/api/store/products/{self.product.slug}/'):
+            response, _ = self.get(url)
+            self.assertIn('ETag', response)
+            self.assertNotIn('Last-Modified', response)
+
+    def test_if_modified_since(self):
+        url = f'/api/store/categories/{self.category.slug}/'
+        response, _ = self.get(url)
+        since = response['Last-Modified']
+        response, _ = self.get(url, if_modified_since=since)
+        self.assertEqual(response.status_code, 304)
+
+        Category.objects.filter(pk=self.category.pk).update(updated_at=timezone.now() + timedelta(seconds=5))
+        response, _ = self.get(url, if_modified_since=since)
+        self.assertEqual(response.status_code, 200)
+
+    def test_group_membership_and_user(self):
+        url = '/api/community/groups/'
+        etag = self.assertRevalidates(url)
+        self.group.members.add(self.other)
+        self.assertChanged(url, etag)
+
+        # is_member differs per user
+        mine, _ = self.get(url)
+        self.client.force_authenticate(self.other)
+        theirs, _ = self.get(url)
+        self.assertNotEqual(mine['ETag'], theirs['ETag'])
+
+    def test_pet_profiles(self):
+        for url in ('/api/users/pets/', f'/api/users/pets/{self.pet.pk}/'):
+            etag = self.assertRevalidates(url)
+            self.pet.weight = 11
+            self.pet.save()
+            self.assertChanged(url, etag)
+
+    def test_cached_anonymous_response_revalidates_without_queries(self):
+        self.client.force_authenticate(None)
+        url = '/api/store/categories/'
+        response, _ = self.get(url)
+        response, queries = self.get(url, if_none_match=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(queries, 0)
+
+    def test_unsafe_methods_are_unaffected(self):
+        response, _ = self.get(f'/api/users/pets/{self.pet.pk}/')
+        response = self.client.patch(f'/api/users/pets/{self.pet.pk}/', {'name': 'Max'},
+                                     headers={'if_none_match': response['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Max')
+
+
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        metrics.registry.clear()
+        self.addCleanup(metrics.registry.clear)
+
+    def test_render(self):
+        metrics.observe('http_request_duration_seconds', 0.02, route='/api/x/', method='GET', status='2xx')
+        metrics.observe('http_request_duration_seconds', 3, route='/api/x/', method='GET', status='2xx')
+        metrics.set_gauge('db_replica_lag_seconds', 1.5, replica='r1')
+        text = metrics.render()
+
+        self.assertIn('# TYPE http_request_duration_seconds histogram', text)
+        labels = 'method="GET",route="/api/x/",status="2xx"'
+        self.assertIn('http_request_duration_seconds_bucket{%s,le="0.025"} 1' % labels, text)
+        self.assertIn('http_request_duration_seconds_bucket{%s,le="5.0"} 2' % labels, text)
+        self.assertIn('http_request_duration_seconds_bucket{%s,le="+Inf"} 2' % labels, text)
+        self.assertIn('http_request_duration_seconds_sum{%s} 3.02' % labels, text)
+        self.assertIn('http_request_duration_seconds_count{%s} 2' % labels, text)
+        self.assertIn('# TYPE db_replica_lag_seconds gauge', text)
+        self.assertIn('db_replica_lag_seconds{replica="r1"} 1.5', text)
+
+    def test_label_values_are_escaped(self):
+        metrics.observe('email_send_duration_seconds', 0.1, kind='a"b\\c')
+        self.assertIn('kind="a\\"b\\\\c"', metrics.render())
+
+    def test_disabled(self):
+        with self.settings(METRICS_ENABLED=False):
+            metrics.observe('email_send_duration_seconds', 0.1, kind='otp')
+        self.assertEqual(metrics.collect(), ({}, {}))
+
+    def test_collect_sums_other_processes(self):
+        metrics.observe('email_send_duration_seconds', 0.1, kind='otp')
+        metrics.set_gauge('db_replica_lag_seconds', 1, replica='r1')
+        with tempfile.TemporaryDirectory() as directory:
+            other = [0] * (len(metrics.registry.buckets) + 1) + [0.5, 1]
+            other[metrics.registry.buckets.index(0.5)] = 1
+            with open(os.path.join(directory, '1-other.json'), 'w') as f:
+                json.dump({
+                    'buckets': metrics.registry.buckets,
+                    'metrics': [['email_send_duration_seconds', [['kind', 'otp']], other]],
+                    # Set later than ours: wins
+                    'gauges': [['db_replica_lag_seconds', [['replica', 'r1']], [7, time.time() + 60]]],
+                }, f)
+            with open(os.path.join(directory, '2-other-buckets.json'), 'w') as f:
+                json.dump({'buckets': [1], 'metrics': [['email_send_duration_seconds', [['kind', 'otp']], [1, 0, 1.0, 1]]]}, f)
+            with open(os.path.join(directory, '3-partial.json'), 'w') as f:
+                f.write('{"buck')
+
+            with self.settings(METRICS_MULTIPROC_DIR=directory):
+                totals, gauges = metrics.collect()
+
+        values = totals[('email_send_duration_seconds', (('kind', 'otp'),))]
+        self.assertEqual(values[-1], 2)
+        self.assertAlmostEqual(values[-2], 0.6)
+        self.assertEqual(gauges[('db_replica_lag_seconds', (('replica', 'r1'),))], 7)
+
+    def test_concurrent_flush(self):
+        registry = metrics.Registry()
+        registry.observe('email_send_duration_seconds', 0.1, {'kind': 'otp'})
+        errors = []
+
+        def flush():
+            try:
+                for _ in range(50):
+                    registry.flush()
+            except Exception as e:
+                errors.append(e)
+
+        with tempfile.TemporaryDirectory() as directory, self.settings(METRICS_MULTIPROC_DIR=directory):
+            threads = [threading.Thread(target=flush) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            files = os.listdir(directory)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].endswith('.json'))
+
+    def test_unwritable_directory_does_not_fail_observe(self):
+        with tempfile.NamedTemporaryFile() as not_a_directory:
+            with self.settings(METRICS_MULTIPROC_DIR=not_a_directory.name, METRICS_FLUSH_SECONDS=0):
+                with self.assertLogs('pawjeevan_backend.metrics', 'WARNING'):
+                    metrics.observe('email_send_duration_seconds', 0.1, kind='otp')
+        self.assertEqual(len(metrics.registry.snapshot()), 1)
+
+
+@override_settings(RESPONSE_CACHE_SECONDS=0, PROFILING_SLOW_REQUEST_MS=60_000, PROFILING_SLOW_QUERY_COUNT=1000)
+class QueryProfilingTests(TestCase):
+    URL = '/api/store/categories/'
+
+    def test_server_timing(self):
+        response = self.client.get(self.URL)
+        self.assertRegex(response['Server-Timing'], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"$')
+        self.assertFalse(SlowRequestLog.objects.exists())
+
+    def test_query_heavy_request_is_logged_and_stored(self):
+        with self.settings(PROFILING_SLOW_QUERY_COUNT=1, PROFILING_SAMPLE_RATE=1), \
+                self.assertLogs('pawjeevan.profiling', 'WARNING') as logs:
+            self.client.get(self.URL)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], self.URL)
+        self.assertGreaterEqual(record['queries'], 1)
+
+        log = SlowRequestLog.objects.get()
+        self.assertEqual((log.method, log.path, log.status_code), ('GET', self.URL, 200))
+        self.assertEqual(log.query_count, record['queries'])
+        self.assertTrue(log.view_name.endswith('CategoryViewSet'))
+
+    def test_slow_request_outside_the_sample_is_only_logged(self):
+        with self.settings(PROFILING_SLOW_REQUEST_MS=0, PROFILING_SAMPLE_RATE=0), \
+                self.assertLogs('pawjeevan.profiling', 'WARNING'):
+            self.client.get(self.URL)
+        self.assertFalse(SlowRequestLog.objects.exists())
+
+    def test_old_logs_are_pruned(self):
+        def log(age_days):
+            row = SlowRequestLog.objects.create(
+                method='GET', path='/', status_code=200, duration_ms=900, db_time_ms=10, query_count=3,
+            )
+            SlowRequestLog.objects.filter(pk=row.pk).update(created_at=timezone.now() - timedelta(days=age_days))
+            return row
+
+        log(10)
+        recent = log(1)
+        with self.settings(PROFILING_LOG_RETENTION_DAYS=7):
+            self.assertEqual(prune_slow_request_logs(), 1)
+        self.assertEqual(list(SlowRequestLog.objects.all()), [recent])
@@ -4,17 +4,22 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 # Local views
-from .views import google_config_view
+from .views import google_config_view, metrics_view
+from .realtime import event_stream_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     # Public config for frontend runtime
     path("api/config/google/", google_config_view),
+    # Server-sent events push channel (serve via asgi.py)
+    path("api/events/", event_stream_view),
     path("api/users/", include("users.urls")),
     path("api/store/", include("store.urls")),
     path("api/community/", include("community.urls")),
     path("api/ai/", include("ai_module.urls")),
     path("api/admin/", include("admin_panel.urls")),
+    # Prometheus scrape target (admin credentials required)
+    path("metrics", metrics_view),
 ]
 
 if settings.DEBUG:
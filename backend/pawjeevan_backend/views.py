@@ -1,8 +1,11 @@
 from django.conf import settings
+from django.http import HttpResponse
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 
+from . import metrics
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -14,3 +17,10 @@ def google_config_view(request):
     return Response({
         'google_client_id': settings.GOOGLE_CLIENT_ID or ''
     })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """Latency histograms of all workers in Prometheus text format (admin only)."""
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
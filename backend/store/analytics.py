@@ -0,0 +1,93 @@
+"""
+Sales analytics over the OrderLineFact table.
+
+Facts are written once per order line at checkout, so reports group by
+plain indexed columns (date, product, category_slug, brand) instead of
+joining Order/OrderItem and reading product_meta JSON.
+"""
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import OrderItem, OrderLineFact
+
+GROUP_BY_FIELDS = {
+    'day': ('date',),
+    'product': ('product_id', 'product_name'),
+    'category': ('category_slug',),
+    'brand': ('brand',),
+}
+
+# Orders in these states are excluded from sales figures
+EXCLUDED_ORDER_STATUSES = ('cancelled', 'refunded')
+
+
+def _fact_for(item, order):
+    meta = item.product_meta or {}
+    product = item.product
+    category = meta.get('category') or (product.category.slug if product and product.category else '')
+    brand = meta.get('brand') or (product.brand.name if product and product.brand else '')
+    return OrderLineFact(
+        order_item=item,
+        order=order,
+        date=timezone.localdate(order.created_at),
+        product_id=item.product_id,
+        product_name=item.product_name,
+        category_slug=category or '',
+        brand=brand or '',
+        quantity=item.quantity,
+        revenue=item.subtotal,
+        order_status=order.status,
+        payment_status=order.payment_status,
+    )
+
+
+def record_order_facts(order):
+    """Write fact rows for every line of ``order`` (idempotent)"""
+    items = order.items.select_related('product__category', 'product__brand')
+    return OrderLineFact.objects.bulk_create(
+        [_fact_for(item, order) for item in items], ignore_conflicts=True
+    )
+
+
+def backfill_order_facts(orders):
+    """Write missing fact rows for an iterable of orders; returns rows attempted"""
+    items = (
+        OrderItem.objects.filter(order__in=orders, fact__isnull=True)
+        .select_related('order', 'product__category', 'product__brand')
+    )
+    facts = [_fact_for(item, item.order) for item in items]
+    OrderLineFact.objects.bulk_create(facts, ignore_conflicts=True)
+    return len(facts)
+
+
+def sync_order_status(order):
+    OrderLineFact.objects.filter(order=order).exclude(
+        order_status=order.status, payment_status=order.payment_status
+    ).update(order_status=order.status, payment_status=order.payment_status)
+
+
+def sales_summary(start, end, group_by='day', paid_only=False, limit=None):
+    """
+    Quantity, revenue and order count per group for orders placed in
+    [start, end]. Dimension groups are sorted by revenue (highest first).
+    """
+    fields = GROUP_BY_FIELDS[group_by]
+    facts = OrderLineFact.objects.filter(date__range=(start, end)).exclude(order_status__in=EXCLUDED_ORDER_STATUSES)
+    if paid_only:
+        facts = facts.filter(payment_status='paid')
+
+    rows = (
+        facts.values(*fields)
+        .annotate(quantity=Sum('quantity'), revenue=Sum('revenue'), orders=Count('order_id', distinct=True))
+        .order_by(*(fields if group_by == 'day' else ('-revenue',)))
+    )
+    if limit:
+        rows = rows[:limit]
+    totals = facts.aggregate(quantity=Sum('quantity'), revenue=Sum('revenue'), orders=Count('order_id', distinct=True))
+    return {
+        'range': {'start': start, 'end': end},
+        'group_by': group_by,
+        'paid_only': paid_only,
+        'totals': {key: value or 0 for key, value in totals.items()},
+        'results': list(rows),
+    }
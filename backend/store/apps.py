@@ -6,6 +6,8 @@ class StoreConfig(AppConfig):
     name = 'store'
 
     def ready(self):
+        from . import signals  # noqa: F401
+
         # Create default product categories after migrations if they don't exist.
         from django.db.models.signals import post_migrate
         from django.dispatch import receiver
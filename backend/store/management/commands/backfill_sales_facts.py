@@ -0,0 +1,50 @@
+"""
+Populate OrderLineFact for orders placed before the fact table existed
+(or after a --rebuild). Safe to re-run: lines that already have a fact are skipped.
+"""
+from datetime import date, datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from store.analytics import backfill_order_facts
+from store.models import Order, OrderLineFact
+
+
+class Command(BaseCommand):
+    help = 'Backfill the OrderLineFact sales table from existing orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only orders placed on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Orders per batch (default: 1000)')
+        parser.add_argument('--rebuild', action='store_true', help='Delete existing facts in the range first')
+
+    def handle(self, *args, **options):
+        orders = Order.objects.order_by('id')
+        facts = OrderLineFact.objects.all()
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date (YYYY-MM-DD)')
+            orders = orders.filter(created_at__gte=timezone.make_aware(datetime.combine(since, time.min)))
+            facts = facts.filter(date__gte=since)
+
+        if options['rebuild']:
+            deleted, _ = facts.delete()
+            self.stdout.write(self.style.WARNING(f'Deleted {deleted} existing fact row(s)'))
+
+        batch_size = max(options['batch_size'], 1)
+        last_id, written = 0, 0
+        while True:
+            # Keyset batches keep memory flat on large order tables
+            ids = list(orders.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                written += backfill_order_facts(ids)
+            last_id = ids[-1]
+            self.stdout.write(f'  ... up to order {last_id}: {written} line(s)')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {written} order line fact(s)'))
@@ -8,10 +8,11 @@ def migrate_adoption_listings(apps, schema_editor):
     # Get the old and new models
     CommunityAdoption = apps.get_model('community', 'AdoptionListing')
     StoreAdoption = apps.get_model('store', 'AdoptionListing')
+    db = schema_editor.connection.alias
     
     # Copy all records
-    for old_listing in CommunityAdoption.objects.all():
-        StoreAdoption.objects.create(
+    for old_listing in CommunityAdoption.objects.using(db).all():
+        StoreAdoption.objects.using(db).create(
             id=old_listing.id,
             title=old_listing.title,
             pet_name=old_listing.pet_name,
@@ -37,7 +38,7 @@ def migrate_adoption_listings(apps, schema_editor):
 def reverse_migrate(apps, schema_editor):
     """Delete all store AdoptionListing records"""
     StoreAdoption = apps.get_model('store', 'AdoptionListing')
-    StoreAdoption.objects.all().delete()
+    StoreAdoption.objects.using(schema_editor.connection.alias).all().delete()
 
 
 class Migration(migrations.Migration):
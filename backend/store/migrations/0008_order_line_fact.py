@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_review_helpful_users'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderLineFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('product_name', models.CharField(max_length=200)),
+                ('category_slug', models.CharField(blank=True, max_length=50)),
+                ('brand', models.CharField(blank=True, max_length=100)),
+                ('quantity', models.IntegerField()),
+                ('revenue', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('order_status', models.CharField(max_length=20)),
+                ('payment_status', models.CharField(max_length=20)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='line_facts', to='store.order')),
+                ('order_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fact', to='store.orderitem')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.product')),
+            ],
+            options={
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['date'], name='store_fact_date_idx'), models.Index(fields=['product', 'date'], name='store_fact_product_idx'), models.Index(fields=['category_slug', 'date'], name='store_fact_category_idx'), models.Index(fields=['brand', 'date'], name='store_fact_brand_idx')],
+            },
+        ),
+    ]
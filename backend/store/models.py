@@ -40,6 +40,7 @@ class Brand(models.Model):
     description = models.TextField(blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['name']
@@ -142,6 +143,7 @@ class ProductImage(models.Model):
     alt_text = models.CharField(max_length=200, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-is_primary', 'created_at']
@@ -357,6 +359,38 @@ class OrderItem(models.Model):
             return Decimal(str(price or 0)) * Decimal(str(qty))
 
 
+class OrderLineFact(models.Model):
+    """
+    Denormalised copy of each order line for sales analytics (one row per
+    OrderItem). Written at checkout by store.analytics.record_order_facts and
+    backfilled with `manage.py backfill_sales_facts`; order/payment status
+    are kept in sync when the order is saved.
+    """
+    order_item = models.OneToOneField(OrderItem, on_delete=models.CASCADE, related_name='fact')
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='line_facts')
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True)
+    product_name = models.CharField(max_length=200)
+    category_slug = models.CharField(max_length=50, blank=True)
+    brand = models.CharField(max_length=100, blank=True)
+    quantity = models.IntegerField()
+    revenue = models.DecimalField(max_digits=12, decimal_places=2)
+    order_status = models.CharField(max_length=20)
+    payment_status = models.CharField(max_length=20)
+
+    class Meta:
+        ordering = ['date']
+        indexes = [
+            models.Index(fields=['date'], name='store_fact_date_idx'),
+            models.Index(fields=['product', 'date'], name='store_fact_product_idx'),
+            models.Index(fields=['category_slug', 'date'], name='store_fact_category_idx'),
+            models.Index(fields=['brand', 'date'], name='store_fact_brand_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.quantity}x {self.product_name}"
+
+
 class Wishlist(models.Model):
     """User wishlist/favorites"""
     user = models.OneToOneField(
@@ -0,0 +1,20 @@
+"""
+Signal receivers for the store app
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from pawjeevan_backend.response_cache import invalidate_on_change
+
+from .analytics import sync_order_status
+from .models import Brand, Category, Order, Product, ProductImage, Review
+
+# Anonymous catalogue responses cached by pawjeevan_backend.response_cache
+invalidate_on_change(Category, Brand, Product, ProductImage, Review)
+
+
+@receiver(post_save, sender=Order)
+def sync_sales_facts(sender, instance, created, **kwargs):
+    """Carry status/payment changes over to the order's OrderLineFact rows"""
+    if not created:
+        sync_order_status(instance)
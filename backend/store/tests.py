@@ -1,3 +1,92 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from .analytics import sales_summary
+from .models import Brand, Category, Order, OrderLineFact, Product
+
+
+class SalesFactTests(TestCase):
+    """OrderLineFact rows from checkout to the sales report (store/analytics.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='x')
+        food, toys = (Category.objects.create(name=f'Test {name}', slug=f'test-{name}') for name in ('food', 'toys'))
+        brand = Brand.objects.create(name='Test brand', slug='test-brand')
+        cls.kibble = Product.objects.create(
+            name='Kibble', slug='kibble', description='-', category=food, brand=brand,
+            pet_type='dog', price='10.00', sku='KIB-1', stock=50,
+        )
+        cls.ball = Product.objects.create(
+            name='Ball', slug='ball', description='-', category=toys,
+            pet_type='dog', price='3.00', sku='BALL-1', stock=50,
+        )
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def checkout(self, *lines):
+        response = self.client.post('/api/store/orders/', {
+            'delivery_method': 'pickup',
+            'items': [
+                {'product_id': product.id, 'quantity': quantity, 'product_price': str(product.price)}
+                for product, quantity in lines
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return Order.objects.get(pk=response.data['id'])
+
+    def summary(self, group_by='day', **kwargs):
+        return sales_summary(self.today, self.today, group_by, **kwargs)
+
+    def test_checkout_to_report(self):
+        order = self.checkout((self.kibble, 2), (self.ball, 1))
+        self.checkout((self.ball, 4))
+
+        facts = OrderLineFact.objects.filter(order=order).order_by('product_name')
+        self.assertEqual(
+            [(f.product_name, f.category_slug, f.brand, f.quantity, f.revenue) for f in facts],
+            [('Ball', 'test-toys', '', 1, Decimal('3.00')), ('Kibble', 'test-food', 'Test brand', 2, Decimal('20.00'))],
+        )
+        self.assertEqual(self.summary()['totals'], {'quantity': 7, 'revenue': Decimal('35.00'), 'orders': 2})
+        self.assertEqual(
+            [(row['category_slug'], row['revenue']) for row in self.summary('category')['results']],
+            [('test-food', Decimal('20.00')), ('test-toys', Decimal('15.00'))],
+        )
+        self.assertEqual(self.summary(paid_only=True)['totals']['orders'], 0)
+
+        # Status changes reach the facts through the post_save signal
+        order.payment_status = 'paid'
+        order.save()
+        self.assertEqual(self.summary(paid_only=True)['totals'], {'quantity': 3, 'revenue': Decimal('23.00'), 'orders': 1})
+
+        response = self.client.post(f'/api/store/orders/{order.id}/cancel/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(facts.values_list('order_status', flat=True)), {'cancelled'})
+        self.assertEqual(self.summary()['totals'], {'quantity': 4, 'revenue': Decimal('12.00'), 'orders': 1})
+        self.assertEqual(self.summary(paid_only=True)['totals']['orders'], 0)
+
+    def test_backfill_is_idempotent(self):
+        self.checkout((self.kibble, 2), (self.ball, 1))
+        self.checkout((self.ball, 4))
+        expected = self.summary('product')
+        OrderLineFact.objects.all().delete()
+
+        out = StringIO()
+        call_command('backfill_sales_facts', batch_size=1, stdout=out)
+        self.assertIn('Backfilled 3 order line fact(s)', out.getvalue())
+        self.assertEqual(self.summary('product'), expected)
 
-# Create your tests here.
+        out = StringIO()
+        call_command('backfill_sales_facts', stdout=out)
+        self.assertIn('Backfilled 0 order line fact(s)', out.getvalue())
+        self.assertEqual(OrderLineFact.objects.count(), 3)
@@ -10,7 +10,7 @@ import uuid
 from decimal import Decimal
 
 from .models import (
-    Category, Brand, Product, Review,
+    Category, Brand, Product, ProductImage, Review,
     Cart, CartItem, Order, OrderItem, Wishlist, AdoptionListing
 )
 from .serializers import (
@@ -19,6 +19,10 @@ from .serializers import (
     CartSerializer, CartItemSerializer, OrderSerializer, WishlistSerializer,
     AdoptionListingSerializer
 )
+from .analytics import record_order_facts
+from pawjeevan_backend.conditional import ConditionalGetMixin
+from pawjeevan_backend.db_router import ReplicaReadMixin
+from pawjeevan_backend.response_cache import cache_anonymous_response
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.utils.html import strip_tags
@@ -96,7 +100,7 @@ def send_order_confirmation_email(order, request=None):
         logger.exception("Failed to send order confirmation email for order %s: %s", getattr(order, 'order_number', 'unknown'), str(e))
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Read-only categories
     """
@@ -104,6 +108,14 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CategorySerializer
     lookup_field = "slug"
 
+    @cache_anonymous_response(Category)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_anonymous_response(Category)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class BrandViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -113,8 +125,16 @@ class BrandViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = BrandSerializer
     lookup_field = "slug"
 
+    @cache_anonymous_response(Brand)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_anonymous_response(Brand)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductViewSet(ReplicaReadMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Read-only products with filters/search/order
     """
@@ -125,6 +145,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ["name", "description", "sku"]
     ordering_fields = ["price", "created_at", "name"]
     lookup_field = "slug"
+    conditional_related = ("images", "reviews", "category", "brand")
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -158,6 +179,8 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         return qs
 
     @action(detail=False, methods=["get"])
+    # Category and brand: filters by slug/name (and their renames) shape the list
+    @cache_anonymous_response(Product, ProductImage, Review, Category, Brand)
     def featured(self, request):
         """
         Return featured products
@@ -466,6 +489,7 @@ class OrderViewSet(viewsets.ModelViewSet):
                         li['prod'].stock = 0
                     li['prod'].save()
 
+            record_order_facts(order)
             ser = OrderSerializer(order, context={"request": request})
             # Send confirmation receipt to the user's billing email (best-effort)
             try:
@@ -532,6 +556,7 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         # clear cart
         cart.items.all().delete()
+        record_order_facts(order)
 
         ser = OrderSerializer(order, context={"request": request})
         # Send confirmation receipt to the user's billing email (best-effort)
@@ -665,7 +690,7 @@ class WishlistViewSet(viewsets.ViewSet):
         return Response({"action": action, "wishlist": ser.data})
 
 
-class AdoptionListingViewSet(viewsets.ModelViewSet):
+class AdoptionListingViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = AdoptionListing.objects.all().order_by('-created_at')
     serializer_class = AdoptionListingSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
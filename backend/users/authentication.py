@@ -0,0 +1,88 @@
+"""
+JWT authentication with a short-lived user cache.
+
+simplejwt's JWTAuthentication loads the User row on every request. The user
+is cached here for a few seconds under a key that includes a per-user
+version; bumping the version (see invalidate_cached_user) orphans any cached
+copy, including one written by a request that raced with the invalidation.
+
+The version only reaches other worker processes through a shared cache
+(REDIS_URL). With the per-process local-memory cache a password change, ban
+or deactivation would not be seen by the other workers until the TTL ran
+out, so users are then not cached at all unless JWT_USER_CACHE_LOCAL says
+there is only one process.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def _version_key(user_id):
+    return f'jwt-user-version:{user_id}'
+
+
+def _user_key(user_id, version):
+    return f'jwt-user:{user_id}:v{version}'
+
+
+def _current_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a lost/evicted version never lines up with
+        # entries cached under an earlier one
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def user_cache_enabled():
+    if getattr(settings, 'JWT_USER_CACHE_TTL', 60) <= 0:
+        return False
+    if isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache):
+        # Invalidation wouldn't reach the other workers
+        return getattr(settings, 'JWT_USER_CACHE_LOCAL', False)
+    return True
+
+
+def invalidate_cached_user(user_id):
+    """Drop any cached copy of the user (call after the row changes)"""
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """Drop-in replacement for JWTAuthentication that caches the resolved user"""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or not user_cache_enabled():
+            return super().get_user(validated_token)
+
+        key = _user_key(user_id, _current_version(user_id))
+        user = cache.get(key)
+        if user is None:
+            # Runs the usual existence/active/revocation checks
+            user = super().get_user(validated_token)
+            cache.set(key, user, getattr(settings, 'JWT_USER_CACHE_TTL', 60))
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code='password_changed'
+            )
+        return user
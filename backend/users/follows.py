@@ -0,0 +1,52 @@
+"""
+Stored follower/following counters and batched follow lookups.
+
+User.followers is a self-referential m2m: a through row (from_user, to_user)
+means to_user follows from_user.
+"""
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .authentication import invalidate_cached_user
+from .models import User
+
+Follow = User.followers.through
+
+
+def _count(column):
+    return Coalesce(
+        Subquery(
+            Follow.objects.filter(**{column: OuterRef('pk')})
+            .order_by().values(column).annotate(n=Count('id')).values('n'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def refresh_follow_counts(user_ids):
+    """
+    Recompute followers_count/following_count for ``user_ids`` from the
+    through table in one UPDATE. Recounting (rather than +1/-1) stays
+    correct under concurrent follows and duplicate adds.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    User.objects.filter(pk__in=user_ids).update(
+        followers_count=_count('from_user'),
+        following_count=_count('to_user'),
+    )
+    # update() skips post_save, so drop the cached auth users by hand
+    for user_id in user_ids:
+        invalidate_cached_user(user_id)
+
+
+def following_ids(user, candidate_ids):
+    """The subset of ``candidate_ids`` that ``user`` follows (one query)"""
+    if not user or not user.is_authenticated or not candidate_ids:
+        return set()
+    return set(
+        Follow.objects.filter(to_user=user.pk, from_user__in=candidate_ids)
+        .values_list('from_user', flat=True)
+    )
@@ -0,0 +1,61 @@
+"""
+Benchmark JWT user resolution: queries and time per authenticated request
+Compares simplejwt's JWTAuthentication with CachedJWTAuthentication
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import CachedJWTAuthentication, invalidate_cached_user
+from users.models import User
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare DB queries and latency per request for JWT user resolution'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Authenticated requests per run (default: 500)')
+
+    def handle(self, *args, **options):
+        n = max(options['requests'], 1)
+        try:
+            # Everything (including the throwaway user) is rolled back at the end
+            with transaction.atomic():
+                self._run(n)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, n):
+        user = User.objects.create_user(
+            username='bench_auth_user', email='bench_auth_user@example.invalid', password='bench-pass-123'
+        )
+        token = str(AccessToken.for_user(user))
+        request = RequestFactory().get('/api/users/notifications/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        self.stdout.write(f'{n} authenticated requests per backend\n')
+        self.stdout.write(f'{"backend":<28}{"queries":>10}{"queries/req":>14}{"avg ms":>10}')
+        for auth in (JWTAuthentication(), CachedJWTAuthentication()):
+            invalidate_cached_user(user.pk)
+            # One process here, so the local-memory cache is fine
+            with override_settings(JWT_USER_CACHE_LOCAL=True), CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                for _ in range(n):
+                    auth.authenticate(request)
+                elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{type(auth).__name__:<28}{len(ctx.captured_queries):>10}'
+                f'{len(ctx.captured_queries) / n:>14.3f}{elapsed * 1000 / n:>10.3f}'
+            )
+
+        # The user row is about to be rolled back; don't leave it cached
+        invalidate_cached_user(user.pk)
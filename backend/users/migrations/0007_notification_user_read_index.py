@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_pendingregistration'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', 'created_at'], name='users_notif_user_read_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:53
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_follow_counts(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Follow = User.followers.through
+
+    def count(column):
+        return Coalesce(
+            Subquery(
+                Follow.objects.filter(**{column: OuterRef('pk')})
+                .order_by().values(column).annotate(n=Count('id')).values('n'),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+    User.objects.using(schema_editor.connection.alias).update(followers_count=count('from_user'), following_count=count('to_user'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_scheduled_notification_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_follow_counts, migrations.RunPython.noop),
+    ]
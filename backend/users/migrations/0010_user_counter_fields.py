@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:31
+
+import users.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_user_follow_counts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='followers_count',
+            field=users.models.CounterField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='following_count',
+            field=users.models.CounterField(default=0),
+        ),
+    ]
@@ -7,6 +7,20 @@ from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 
 
+class CounterField(models.PositiveIntegerField):
+    """
+    A denormalised count maintained by UPDATE queries (see users.follows).
+    Saving an existing row writes the column back to itself, so an instance
+    loaded before the count moved (request.user from the auth cache, a
+    form...) can't overwrite it; inserts store the instance's value.
+    """
+
+    def pre_save(self, model_instance, add):
+        if add:
+            return super().pre_save(model_instance, add)
+        return models.F(self.attname)
+
+
 class User(AbstractUser):
     """
     Custom User Model extending Django's AbstractUser
@@ -29,6 +43,11 @@ class User(AbstractUser):
         related_name='following', 
         blank=True
     )
+    # Denormalised sizes of the two sides of `followers`, written only by
+    # users.follows.refresh_follow_counts() (via users.signals on every
+    # add/remove/clear); save() never overwrites them
+    followers_count = CounterField(default=0)
+    following_count = CounterField(default=0)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -217,6 +236,10 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Unread counts and the per-user list/delta queries
+            models.Index(fields=['user', 'is_read', 'created_at'], name='users_notif_user_read_idx'),
+        ]
 
     def __str__(self):
         return f"{self.notification_type} - {self.title} ({self.user.username})"
@@ -236,10 +259,26 @@ class ScheduledNotification(models.Model):
     send_at = models.DateTimeField()
     processed = models.BooleanField(default=False)
 
+    # Work-queue bookkeeping (see users/notification_queue.py). A worker
+    # claims rows by setting lease_owner/leased_until; after a failure
+    # leased_until doubles as the earliest retry time.
+    attempts = models.PositiveIntegerField(default=0)
+    lease_owner = models.CharField(max_length=64, blank=True)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['send_at']
+        indexes = [
+            # Only pending rows are ever scanned, so keep processed ones out
+            models.Index(
+                fields=['send_at'],
+                condition=models.Q(processed=False),
+                name='users_schednotif_due_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Scheduled {self.notification_type} for {self.user.username} at {self.send_at}"
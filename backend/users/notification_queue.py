@@ -0,0 +1,101 @@
+"""
+ScheduledNotification as a work queue.
+
+Workers claim due rows in batches, process them and then either complete
+them or record the failure for a later retry. A claim is a lease: the row
+is stamped with a unique lease_owner and a leased_until deadline, so
+several workers can drain the queue in parallel without picking the same
+rows, and rows held by a worker that died become claimable again once the
+lease runs out.
+
+On PostgreSQL the candidate rows are selected with FOR UPDATE SKIP LOCKED
+so concurrent claimers don't block on each other; on SQLite, which has a
+single writer, the conditional UPDATE alone decides who gets each row.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q, Subquery
+from django.utils import timezone
+
+from .models import ScheduledNotification
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _claimable(now):
+    return ScheduledNotification.objects.filter(
+        Q(leased_until__isnull=True) | Q(leased_until__lte=now),
+        processed=False,
+        send_at__lte=now,
+    )
+
+
+def claim_due(limit=None, now=None):
+    """
+    Lease up to ``limit`` due rows to a new owner token and return them
+    (oldest send_at first). Each claim counts as an attempt.
+    """
+    now = now or timezone.now()
+    limit = limit or _setting('SCHEDULED_NOTIFICATION_BATCH_SIZE', 500)
+    owner = uuid.uuid4().hex
+    lease = timedelta(seconds=_setting('SCHEDULED_NOTIFICATION_LEASE_SECONDS', 300))
+
+    with transaction.atomic():
+        candidates = _claimable(now).order_by('send_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            ids = list(candidates.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            target = ScheduledNotification.objects.filter(id__in=ids)
+        else:
+            target = ScheduledNotification.objects.filter(id__in=Subquery(candidates.values('id')[:limit]))
+        # Re-checking the claimable condition in the UPDATE keeps two
+        # claimers from taking the same row
+        claimed = target.filter(
+            Q(leased_until__isnull=True) | Q(leased_until__lte=now),
+            processed=False,
+        ).update(
+            lease_owner=owner,
+            leased_until=now + lease,
+            attempts=F('attempts') + 1,
+        )
+    if not claimed:
+        return []
+    return list(ScheduledNotification.objects.filter(lease_owner=owner, processed=False).order_by('send_at', 'id'))
+
+
+def complete(items):
+    """Mark claimed rows as processed"""
+    return ScheduledNotification.objects.filter(
+        id__in=[item.id for item in items], lease_owner__in={item.lease_owner for item in items}
+    ).update(processed=True, leased_until=None, last_error='')
+
+
+def fail(items, error, now=None):
+    """
+    Record a failed attempt. Rows are retried with exponential backoff
+    until SCHEDULED_NOTIFICATION_MAX_ATTEMPTS, then marked processed so
+    they stop cycling (last_error keeps the reason).
+    """
+    now = now or timezone.now()
+    max_attempts = _setting('SCHEDULED_NOTIFICATION_MAX_ATTEMPTS', 5)
+    base = _setting('SCHEDULED_NOTIFICATION_RETRY_SECONDS', 60)
+    message = str(error)[:1000]
+
+    exhausted = [item.id for item in items if item.attempts >= max_attempts]
+    if exhausted:
+        ScheduledNotification.objects.filter(id__in=exhausted).update(
+            processed=True, leased_until=None, last_error=message
+        )
+    by_attempts = {}
+    for item in items:
+        if item.attempts < max_attempts:
+            by_attempts.setdefault(item.attempts, []).append(item.id)
+    for attempts, ids in by_attempts.items():
+        ScheduledNotification.objects.filter(id__in=ids).update(
+            leased_until=now + timedelta(seconds=base * 2 ** (attempts - 1)),
+            last_error=message,
+        )
@@ -0,0 +1,88 @@
+"""
+Cached per-user unread notification counter.
+
+The count lives in the Django cache and is adjusted in place when
+notifications are created, read or deleted. Any path that can't adjust it
+precisely simply drops the key; the next read recomputes it with one
+indexed COUNT on (user, is_read, created_at).
+
+Adjustments only reach other worker processes through a shared cache
+(REDIS_URL). With the per-process local-memory cache the other workers would
+serve a stale badge until the TTL ran out, so the count is then computed on
+every read unless NOTIFICATION_COUNT_CACHE_LOCAL says there is one process.
+"""
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def _unread_key(user_id):
+    return f'notifications-unread:{user_id}'
+
+
+def _ttl():
+    return getattr(settings, 'NOTIFICATION_COUNT_CACHE_TTL', 300)
+
+
+def count_cache_enabled():
+    if _ttl() <= 0:
+        return False
+    if isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache):
+        # Adjustments wouldn't reach the other workers
+        return getattr(settings, 'NOTIFICATION_COUNT_CACHE_LOCAL', False)
+    return True
+
+
+def get_unread_count(user_id):
+    """Return the user's unread count, computing and caching it on a miss"""
+    from .models import Notification
+
+    if not count_cache_enabled():
+        return Notification.objects.filter(user_id=user_id, is_read=False).count()
+    key = _unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(key, count, _ttl())
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    """Apply +/- delta to a cached count; no-op if nothing is cached yet"""
+    if not delta:
+        return
+    key = _unread_key(user_id)
+    try:
+        value = cache.incr(key, delta)
+    except ValueError:
+        return
+    if value < 0:
+        # Drifted (e.g. a missed update); let the next read recompute it
+        cache.delete(key)
+
+
+def invalidate_unread_count(user_id):
+    cache.delete(_unread_key(user_id))
+
+
+def invalidate_unread_counts(user_ids):
+    cache.delete_many([_unread_key(user_id) for user_id in set(user_ids)])
+
+
+def notify_bulk_created(notifications):
+    """
+    bulk_create() skips post_save, so do what the signal receivers would:
+    refresh unread counters and push to connected clients.
+    """
+    if not notifications:
+        return
+    from pawjeevan_backend.realtime import has_listeners, publish_many_on_commit, user_topic
+    from .serializers import NotificationSerializer
+
+    invalidate_unread_counts(n.user_id for n in notifications)
+    events = []
+    for notification in notifications:
+        topic = user_topic(notification.user_id)
+        if has_listeners(topic):
+            events.append((topic, 'notification', NotificationSerializer(notification).data))
+    publish_many_on_commit(events)
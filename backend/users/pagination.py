@@ -0,0 +1,21 @@
+"""
+Cursor pagination for follower/following lists
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class FollowListPagination(CursorPagination):
+    """
+    Stable cursors over large follower lists: no COUNT(*) per page and no
+    OFFSET scans. `count` in the response comes from the stored counter.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    def get_paginated_response(self, data, count=None):
+        response = super().get_paginated_response(data)
+        if count is not None:
+            response.data['count'] = count
+        return response
@@ -18,11 +18,23 @@ class AbsoluteURLImageField(serializers.ImageField):
         return request.build_absolute_uri(url)
 
 
+class UserListSerializer(serializers.ListSerializer):
+    """Resolves is_following for the whole list with one query"""
+
+    def to_representation(self, data):
+        from .follows import following_ids
+
+        items = list(data.all() if hasattr(data, 'all') else data)
+        request = self.context.get("request")
+        self.context["following_ids"] = following_ids(
+            getattr(request, "user", None), [item.pk for item in items]
+        )
+        return super().to_representation(items)
+
+
 class UserSerializer(serializers.ModelSerializer):
     avatar = AbsoluteURLImageField(required=False, allow_null=True)
 
-    followers_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
 
     class Meta:
@@ -33,15 +45,13 @@ class UserSerializer(serializers.ModelSerializer):
             "is_profile_locked",
             "followers_count", "following_count", "is_following", "created_at",
         ]
-        read_only_fields = ["id", "is_verified", "created_at"]
-
-    def get_followers_count(self, obj):
-        return obj.followers.count()
-
-    def get_following_count(self, obj):
-        return obj.following.count()
+        read_only_fields = ["id", "is_verified", "followers_count", "following_count", "created_at"]
+        list_serializer_class = UserListSerializer
 
     def get_is_following(self, obj):
+        following_ids = self.context.get("following_ids")
+        if following_ids is not None:
+            return obj.pk in following_ids
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             return request.user.following.filter(id=obj.id).exists()
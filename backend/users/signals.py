@@ -0,0 +1,66 @@
+"""
+Signal receivers for the users app
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from pawjeevan_backend.realtime import has_listeners, publish_on_commit, user_topic
+from pawjeevan_backend.response_cache import invalidate_on_change
+
+from .authentication import invalidate_cached_user
+from .follows import refresh_follow_counts
+from .models import Notification, User
+from .notifications import adjust_unread_count, invalidate_unread_count
+
+# Authors' names, avatars and locked profiles shape the cached posts feed;
+# follows, logins and other profile edits don't
+invalidate_on_change(User, fields=('username', 'avatar', 'is_profile_locked'))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_cache(sender, instance, **kwargs):
+    """Keep CachedJWTAuthentication from serving a stale user"""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.followers.through)
+def update_follow_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep User.followers_count/following_count in step with the m2m"""
+    if action == 'pre_clear':
+        # pk_set is empty for clear(); remember who is about to be affected
+        column = 'to_user' if reverse else 'from_user'
+        other = 'from_user' if reverse else 'to_user'
+        instance._follow_clear_ids = list(sender.objects.filter(**{column: instance.pk}).values_list(other, flat=True))
+        return
+    if action == 'post_clear':
+        affected = getattr(instance, '_follow_clear_ids', [])
+    elif action in ('post_add', 'post_remove'):
+        affected = pk_set or ()
+    else:
+        return
+    refresh_follow_counts([instance.pk, *affected])
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_count_on_save(sender, instance, created, **kwargs):
+    if created:
+        if not instance.is_read:
+            adjust_unread_count(instance.user_id, 1)
+    else:
+        # Previous is_read value is unknown here; recompute on next read
+        invalidate_unread_count(instance.user_id)
+
+
+@receiver(post_delete, sender=Notification)
+def update_unread_count_on_delete(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread_count(instance.user_id, -1)
+
+
+@receiver(post_save, sender=Notification)
+def push_new_notification(sender, instance, created, **kwargs):
+    """Deliver new notifications to connected SSE clients"""
+    if created and has_listeners(user_topic(instance.user_id)):
+        from .serializers import NotificationSerializer
+        publish_on_commit(user_topic(instance.user_id), 'notification', NotificationSerializer(instance).data)
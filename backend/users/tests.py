@@ -1,3 +1,471 @@
-from django.test import TestCase
+import datetime
+import json
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from google.auth import crypt, jwt
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import CachedJWTAuthentication
+from .models import Notification, User
+from .throttling import IPRateThrottle, SlidingWindowThrottle
+from .utils import social
+
+CLIENT_ID = 'test-client.apps.googleusercontent.com'
+
+
+def make_key(kid):
+    """RSA key plus the self-signed x509 cert Google would publish for it"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, kid)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    return crypt.RSASigner.from_string(private_pem, kid), cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+class StandInCertServer:
+    """Local replacement for https://www.googleapis.com/oauth2/v1/certs"""
+
+    def __init__(self):
+        self.certs = {}
+        self.cache_control = 'public, max-age=3600'
+        self.hits = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits += 1
+                body = json.dumps(server.certs).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Cache-Control', server.cache_control)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/oauth2/v1/certs'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class VerifyGoogleIdTokenTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StandInCertServer()
+        cls.server.start()
+        cls.signer, cert = make_key('key-1')
+        cls.server.certs = {'key-1': cert}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.hits = 0
+        self.server.cache_control = 'public, max-age=3600'
+        social.cert_cache.clear()
+        overrides = override_settings(
+            GOOGLE_CERTS_URL=self.server.url,
+            GOOGLE_ALLOWED_CLIENT_IDS=[CLIENT_ID],
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def make_token(self, signer=None, **claims):
+        now = int(time.time())
+        payload = {
+            'iss': 'https://accounts.google.com',
+            'aud': CLIENT_ID,
+            'sub': '1234567890',
+            'email': 'pet.owner@example.com',
+            'name': 'Pet Owner',
+            'iat': now,
+            'exp': now + 3600,
+        }
+        payload.update(claims)
+        return jwt.encode(signer or self.signer, payload).decode()
+
+    def test_valid_token_returns_payload(self):
+        payload = social.verify_google_id_token(self.make_token())
+        self.assertEqual(payload['email'], 'pet.owner@example.com')
+
+    def test_certs_are_reused_within_max_age(self):
+        for _ in range(3):
+            social.verify_google_id_token(self.make_token())
+        self.assertEqual(self.server.hits, 1)
+
+    def test_certs_are_refetched_when_max_age_is_zero(self):
+        self.server.cache_control = 'public, max-age=0'
+        social.verify_google_id_token(self.make_token())
+        social.verify_google_id_token(self.make_token())
+        self.assertEqual(self.server.hits, 2)
+
+    def test_wrong_audience_is_reported(self):
+        with self.assertRaisesRegex(ValueError, 'wrong audience'):
+            social.verify_google_id_token(self.make_token(aud='someone-else'))
+
+    def test_wrong_issuer_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, 'wrong issuer'):
+            social.verify_google_id_token(self.make_token(iss='https://evil.example.com'))
+
+    def test_expired_token_is_rejected(self):
+        past = int(time.time()) - 7200
+        with self.assertRaises(ValueError):
+            social.verify_google_id_token(self.make_token(iat=past, exp=past + 60))
+
+    @override_settings(GOOGLE_CERTS_MIN_REFRESH_SECONDS=0)
+    def test_rotated_key_triggers_one_refresh(self):
+        social.verify_google_id_token(self.make_token())
+        new_signer, new_cert = make_key('key-2')
+        old_certs = dict(self.server.certs)
+        self.server.certs = {**old_certs, 'key-2': new_cert}
+        self.addCleanup(setattr, self.server, 'certs', old_certs)
+
+        payload = social.verify_google_id_token(self.make_token(signer=new_signer))
+        self.assertEqual(payload['sub'], '1234567890')
+        self.assertEqual(self.server.hits, 2)
+
+    def test_unknown_key_is_rejected(self):
+        other_signer, _ = make_key('key-unknown')
+        with self.assertRaises(ValueError):
+            social.verify_google_id_token(self.make_token(signer=other_signer))
+
+    def test_unknown_keys_do_not_refetch_fresh_certs(self):
+        social.verify_google_id_token(self.make_token())
+        other_signer, _ = make_key('key-unknown')
+        for _ in range(3):
+            with self.assertRaisesRegex(ValueError, 'key id'):
+                social.verify_google_id_token(self.make_token(signer=other_signer))
+        self.assertEqual(self.server.hits, 1)
+
+
+class FollowCountTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='secret123')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='secret123')
+
+    def test_counts_follow_the_m2m(self):
+        self.alice.following.add(self.bob)
+        self.assertEqual(User.objects.get(pk=self.bob.pk).followers_count, 1)
+        self.assertEqual(User.objects.get(pk=self.alice.pk).following_count, 1)
+        self.alice.following.remove(self.bob)
+        self.assertEqual(User.objects.get(pk=self.bob.pk).followers_count, 0)
+
+    def test_saving_a_stale_instance_keeps_the_counts(self):
+        stale = User.objects.get(pk=self.bob.pk)
+        self.alice.following.add(self.bob)
+
+        stale.bio = 'Dog person'
+        stale.save()
+
+        bob = User.objects.get(pk=self.bob.pk)
+        self.assertEqual(bob.bio, 'Dog person')
+        self.assertEqual(bob.followers_count, 1)
+
+    def test_profile_and_password_updates_keep_the_counts(self):
+        client = APIClient()
+        client.force_authenticate(self.bob)  # loaded before alice follows
+        self.alice.following.add(self.bob)
+
+        response = client.patch('/api/users/profiles/me/', {'bio': 'Cat person'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = client.post(
+            '/api/users/profiles/change-password/',
+            {'old_password': 'secret123', 'new_password': 'secret456'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+        bob = User.objects.get(pk=self.bob.pk)
+        self.assertEqual(bob.bio, 'Cat person')
+        self.assertTrue(bob.check_password('secret456'))
+        self.assertEqual(bob.followers_count, 1)
+
+    def test_save_keeps_the_default_semantics(self):
+        self.alice.following.add(self.bob)
+        stale = User.objects.get(pk=self.bob.pk)
+        stale.followers_count = 5
+        stale.save(update_fields=['bio', 'followers_count'])
+        self.assertEqual(User.objects.get(pk=self.bob.pk).followers_count, 1)
+
+        # A plain save of a row that's gone inserts it again, counters and all
+        User.objects.filter(pk=self.bob.pk).delete()
+        stale.save()
+        self.assertEqual(User.objects.get(pk=self.bob.pk).followers_count, 5)
+
+
+def shared_cache(test):
+    # File-based: shared by every process on the host, like Redis
+    location = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, location, ignore_errors=True)
+    return override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+    }})
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='carol', email='carol@example.com', password='secret123')
+        token = AccessToken.for_user(self.user)
+        self.request = RequestFactory().get('/api/users/notifications/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.auth = CachedJWTAuthentication()
+
+    def queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            user, _ = self.auth.authenticate(self.request)
+        self.assertEqual(user.pk, self.user.pk)
+        return len(ctx.captured_queries)
+
+    def test_local_memory_cache_is_not_used(self):
+        self.queries()
+        self.assertEqual(self.queries(), 1)
+
+    @override_settings(JWT_USER_CACHE_LOCAL=True)
+    def test_local_memory_cache_for_a_single_process(self):
+        self.queries()
+        self.assertEqual(self.queries(), 0)
+
+    def test_shared_cache(self):
+        with shared_cache(self):
+            self.queries()
+            self.assertEqual(self.queries(), 0)
+
+            self.user.is_active = False
+            self.user.save()
+            with self.assertRaises(AuthenticationFailed):
+                self.auth.authenticate(self.request)
+
+
+class NotificationCountTests(TestCase):
+    """Unread badge count and delta sync (users/notifications.py)"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='dave', email='dave@example.com', password='secret123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def notify(self, title='Hello'):
+        return Notification.objects.create(user=self.user, notification_type='system', title=title, message='')
+
+    def unread(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/users/notifications/unread_count/')
+        self.assertEqual(response.status_code, 200)
+        self.queries = len(ctx.captured_queries)
+        return response.data['unread_count']
+
+    def test_shared_cache_is_kept_up_to_date(self):
+        with shared_cache(self):
+            first = self.notify()
+            self.notify()
+            self.assertEqual(self.unread(), 2)
+            self.assertEqual(self.unread(), 2)
+            self.assertEqual(self.queries, 0)
+
+            self.notify()
+            self.assertEqual(self.unread(), 3)
+            self.client.post(f'/api/users/notifications/{first.pk}/mark_read/')
+            self.client.post(f'/api/users/notifications/{first.pk}/mark_read/')  # no double count
+            self.assertEqual(self.unread(), 2)
+            self.client.delete(f'/api/users/notifications/{first.pk}/')  # already read
+            self.assertEqual(self.unread(), 2)
+            self.notify().delete()
+            self.assertEqual(self.unread(), 2)
+            self.assertEqual(self.queries, 0)
+
+    def test_mark_all_read_recounts(self):
+        real_update = QuerySet.update
+
+        def update_then_notify(queryset, **kwargs):
+            updated = real_update(queryset, **kwargs)
+            if queryset.model is Notification:
+                self.notify('Created meanwhile')
+            return updated
+
+        with shared_cache(self):
+            self.notify()
+            self.assertEqual(self.unread(), 1)
+            with mock.patch.object(QuerySet, 'update', update_then_notify):
+                self.client.post('/api/users/notifications/mark_all_read/')
+            self.assertEqual(self.unread(), 1)
+
+    def test_local_memory_cache_is_not_used(self):
+        self.notify()
+        self.assertEqual(self.unread(), 1)
+        # Another worker's notification, which this process never hears about
+        Notification.objects.bulk_create([
+            Notification(user=self.user, notification_type='system', title='Elsewhere', message=''),
+        ])
+        self.assertEqual(self.unread(), 2)
+        self.assertEqual(self.queries, 1)
+
+    @override_settings(NOTIFICATION_COUNT_CACHE_LOCAL=True)
+    def test_local_memory_cache_for_a_single_process(self):
+        self.notify()
+        self.unread()
+        self.assertEqual(self.unread(), 1)
+        self.assertEqual(self.queries, 0)
+
+    def test_delta(self):
+        self.notify('old')
+        url = '/api/users/notifications/delta/'
+        initial = self.client.get(url).data
+        self.assertEqual(initial['results'], [])
+
+        for n in range(3):
+            self.notify(f'new {n}')
+        page = self.client.get(url, {'since': initial['cursor'], 'limit': 2}).data
+        self.assertEqual([n['title'] for n in page['results']], ['new 0', 'new 1'])
+        self.assertTrue(page['has_more'])
+        self.assertEqual(page['unread_count'], 4)
+
+        page = self.client.get(url, {'since': page['cursor'], 'limit': 2}).data
+        self.assertEqual([n['title'] for n in page['results']], ['new 2'])
+        self.assertFalse(page['has_more'])
+
+        self.assertEqual(self.client.get(url, {'since': page['cursor']}).data['results'], [])
+        self.assertEqual(self.client.get(url, {'since': 'x'}).status_code, 400)
+
+    def test_delta_only_returns_own_notifications(self):
+        cursor = self.client.get('/api/users/notifications/delta/').data['cursor']
+        other = User.objects.create_user(username='erin', email='erin@example.com', password='secret123')
+        Notification.objects.create(user=other, notification_type='system', title='Not yours', message='')
+        self.assertEqual(self.client.get('/api/users/notifications/delta/', {'since': cursor}).data['results'], [])
+
+
+class IPRateThrottleTests(TestCase):
+    """Sliding-window limit of 4 requests a minute per client IP"""
+
+    class View:
+        throttle_scope = 'test'
+
+    def setUp(self):
+        cache.clear()
+        self.now = 600.0  # start of a window
+
+    def allow(self, remote_addr='203.0.113.7', forwarded_for=None):
+        throttle = IPRateThrottle()
+        throttle.THROTTLE_RATES = {'test_ip': '4/min'}
+        throttle.timer = lambda: self.now
+        headers = {'REMOTE_ADDR': remote_addr}
+        if forwarded_for:
+            headers['HTTP_X_FORWARDED_FOR'] = forwarded_for
+        request = APIRequestFactory().post('/', **headers)
+        self.last = throttle
+        return throttle.allow_request(request, self.View())
+
+    def test_limit_and_retry_after(self):
+        self.assertEqual([self.allow() for _ in range(5)], [True] * 4 + [False])
+        # The full bucket only starts to decay once it becomes the previous one
+        self.assertEqual(self.last.wait(), 60)
+
+        # Other clients have their own window
+        self.assertTrue(self.allow(remote_addr='198.51.100.1'))
+
+    def test_previous_window_is_weighted_by_its_overlap(self):
+        for _ in range(4):
+            self.allow()
+
+        # Half way through the next window the 4 count as 2
+        self.now += 90
+        self.assertEqual([self.allow() for _ in range(3)], [True, True, False])
+
+        # A window later only the 2 from this one weigh in, and less and less
+        self.now += 60
+        self.assertEqual([self.allow() for _ in range(4)], [True, True, True, False])
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        for n in range(4):
+            self.assertTrue(self.allow(forwarded_for=f'10.0.0.{n}'))
+        self.assertFalse(self.allow(forwarded_for='10.0.0.99'))
+
+    def test_client_address_from_trusted_proxy(self):
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            # The proxy appends the address it saw; whatever the client put
+            # in front of it doesn't change the key
+            for n in range(4):
+                self.assertTrue(self.allow(remote_addr='192.0.2.1', forwarded_for=f'10.0.0.{n}, 203.0.113.7'))
+            self.assertFalse(self.allow(remote_addr='192.0.2.1', forwarded_for='203.0.113.7'))
+            self.assertTrue(self.allow(remote_addr='192.0.2.1', forwarded_for='198.51.100.1'))
+
+    def test_concurrent_requests_cannot_exceed_the_limit(self):
+        # Every request reads the cache before any of them gets further, as
+        # parallel requests from a brute-force script would
+        barrier = threading.Barrier(8)
+
+        class InterleavingCache:
+            def __getattr__(self, name):
+                return getattr(cache, name)
+
+            def get(self, *args, **kwargs):
+                barrier.wait(timeout=5)
+                return cache.get(*args, **kwargs)
+
+            def get_many(self, *args, **kwargs):
+                barrier.wait(timeout=5)
+                return cache.get_many(*args, **kwargs)
+
+        results = []
+        with mock.patch('users.throttling._cache', InterleavingCache):
+            threads = [threading.Thread(target=lambda: results.append(self.allow())) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(sorted(results), [False] * 4 + [True] * 4)
+
+        # The rejected ones weren't counted: half way through the next
+        # window the 4 accepted ones weigh 2
+        self.now += 90
+        self.assertEqual([self.allow() for _ in range(3)], [True, True, False])
+
+    def test_login_is_throttled(self):
+        client = APIClient()
+        # A fixed clock, so the 11 logins (slow password hashing) can't
+        # straddle a window boundary
+        with mock.patch.object(SlidingWindowThrottle, 'timer', lambda self: 600.0):
+            statuses = [
+                client.post('/api/users/login/', {'email': 'nobody@example.com', 'password': 'x'}, format='json').status_code
+                for _ in range(11)
+            ]
+        self.assertEqual(statuses, [401] * 10 + [429])
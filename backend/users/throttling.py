@@ -0,0 +1,184 @@
+"""
+Sliding-window rate limits for the unauthenticated auth endpoints
+(login, registration, OTP send/verify).
+
+DRF runs throttles in APIView.initial(), before the handler, so a rejected
+request never reaches password hashing or SMTP. A rejection raises
+Throttled, which DRF turns into a 429 with a Retry-After header.
+
+Each limit is a sliding-window counter: two fixed buckets (current and
+previous window) in the cache, with the previous one weighted by how much
+of it still overlaps the window. That is two integers per client instead
+of DRF's per-request timestamp list. A request is counted with an atomic
+increment before it is compared with the limit (and uncounted if rejected),
+so concurrent requests can't all pass on the same count.
+"""
+import hashlib
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.throttling import SimpleRateThrottle
+
+# Used when the configured cache is unreachable, so limits still apply
+# (per process) instead of failing open or erroring
+_fallback_cache = LocMemCache('throttle-fallback', {'OPTIONS': {'MAX_ENTRIES': 10000}})
+
+
+class ThrottleStats:
+    """Per-scope counters of checked and rejected requests (this process)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = defaultdict(int)
+        self._rejected = defaultdict(int)
+        self.fallbacks = 0
+
+    def record(self, scope, allowed):
+        with self._lock:
+            self._checked[scope] += 1
+            if not allowed:
+                self._rejected[scope] += 1
+
+    def record_fallback(self):
+        with self._lock:
+            self.fallbacks += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'scopes': {
+                    scope: {'checked': checked, 'rejected': self._rejected[scope]}
+                    for scope, checked in sorted(self._checked.items())
+                },
+                'cache_fallbacks': self.fallbacks,
+            }
+
+
+stats = ThrottleStats()
+
+
+def get_throttle_stats():
+    return stats.snapshot()
+
+
+def _cache():
+    return caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Base class: the view sets ``throttle_scope`` (e.g. "login") and each
+    subclass adds its key type, giving rate names such as "login_ip" in
+    REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"].
+    """
+    key_type = None
+
+    def __init__(self):
+        # Scope and rate depend on the view, resolved in allow_request()
+        self._wait = None
+
+    def get_ident_value(self, request):
+        raise NotImplementedError
+
+    def get_cache_key(self, request, view):
+        value = self.get_ident_value(request)
+        if not value:
+            return None
+        digest = hashlib.sha1(value.encode()).hexdigest()[:20]
+        return f'throttle:{self.scope}:{digest}'
+
+    def allow_request(self, request, view):
+        base_scope = getattr(view, 'throttle_scope', None)
+        if not base_scope:
+            return True
+        self.scope = f'{base_scope}_{self.key_type}'
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        try:
+            allowed = self._check(_cache())
+        except Exception:
+            stats.record_fallback()
+            allowed = self._check(_fallback_cache)
+        stats.record(self.scope, allowed)
+        return allowed
+
+    def _check(self, cache):
+        now = self.timer()
+        window = self.duration
+        index = int(now // window)
+        current_key = f'{self.key}:{index}'
+        previous_key = f'{self.key}:{index - 1}'
+
+        # Count the request first: incr() is atomic, so of concurrent
+        # requests only as many as the limit allows see a value under it.
+        # Buckets must outlive the window that weighs them
+        cache.add(current_key, 0, timeout=2 * window)
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.set(current_key, 1, timeout=2 * window)
+            current = 1
+        previous = cache.get(previous_key, 0)
+        elapsed = (now - index * window) / window
+        if previous * (1 - elapsed) + current <= self.num_requests:
+            return True
+
+        # Rejected requests don't count towards the limit
+        try:
+            cache.decr(current_key)
+        except ValueError:
+            pass
+        self._wait = self._time_until_allowed(now, index, previous, current - 1)
+        return False
+
+    def _time_until_allowed(self, now, index, previous, current):
+        window, limit = self.duration, self.num_requests
+        if current < limit and previous:
+            # Still in this bucket: wait for the previous one to decay enough
+            allowed_at = index * window + window * (1 - (limit - current) / previous)
+        else:
+            # Next bucket, once this one (then "previous") has decayed enough
+            allowed_at = (index + 1) * window + window * max(1 - limit / max(current, 1), 0)
+        return max(allowed_at - now, 1)
+
+    def wait(self):
+        return self._wait
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """
+    Keyed by client IP: REMOTE_ADDR, or the X-Forwarded-For entry added by
+    the outermost of REST_FRAMEWORK["NUM_PROXIES"] trusted proxies
+    """
+    key_type = 'ip'
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class EmailRateThrottle(SlidingWindowThrottle):
+    """Keyed by the email (or pending/user id) the request is about"""
+    key_type = 'email'
+
+    def get_ident_value(self, request):
+        # Malformed bodies raise ParseError here, which is the 400 the view
+        # would have returned anyway
+        data = request.data
+        email = data.get('email') if hasattr(data, 'get') else None
+        if email and isinstance(email, str):
+            return email.strip().lower()
+        user_id = data.get('user_id') if hasattr(data, 'get') else None
+        if user_id:
+            return f'id:{user_id}'
+        return None
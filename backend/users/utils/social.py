@@ -1,6 +1,120 @@
+"""
+Google sign-in helpers: ID token verification and avatar import.
+
+Google's signing certificates are fetched over a pooled HTTP session and
+cached in-process for as long as the certs response's Cache-Control
+max-age allows, so a login normally verifies the token without any network
+round-trip. A token signed with a key the cached certs don't have refetches
+them early (Google rotated its keys), but at most once every
+GOOGLE_CERTS_MIN_REFRESH_SECONDS, so forged tokens with made-up key ids
+can't turn every login attempt into a request to Google. Avatars are downloaded on a background thread after the login
+transaction commits.
+"""
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 from django.conf import settings
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+from django.db import close_old_connections, transaction
+from google.auth import jwt
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+_session = None
+_session_lock = threading.Lock()
+_avatar_executor = None
+
+
+def get_session():
+    """Process-wide requests.Session so TLS connections to Google are reused"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=10)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+class CertificateCache:
+    """Google's public certs, refreshed when their Cache-Control max-age runs out."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._certs = None
+        self._expires_at = 0.0
+        self._fetched_at = None
+        self.fetches = 0
+
+    def _url(self):
+        return getattr(settings, "GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs")
+
+    def _fetch(self):
+        resp = get_session().get(self._url(), timeout=getattr(settings, "GOOGLE_CERTS_TIMEOUT", 5))
+        resp.raise_for_status()
+        match = _MAX_AGE_RE.search(resp.headers.get("Cache-Control", ""))
+        # No max-age: keep them briefly rather than refetching on every login
+        max_age = int(match.group(1)) if match else getattr(settings, "GOOGLE_CERTS_DEFAULT_TTL", 300)
+        self._certs = resp.json()
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + max_age
+        self.fetches += 1
+
+    def get(self):
+        with self._lock:
+            if self._certs is None or time.monotonic() >= self._expires_at:
+                self._fetch()
+            return self._certs
+
+    def refresh(self):
+        """
+        Refetch before max-age runs out, unless the certs were fetched less
+        than GOOGLE_CERTS_MIN_REFRESH_SECONDS ago; returns the current certs
+        either way (another thread may just have fetched the new key)
+        """
+        min_interval = getattr(settings, "GOOGLE_CERTS_MIN_REFRESH_SECONDS", 60)
+        with self._lock:
+            if self._fetched_at is None or time.monotonic() - self._fetched_at >= min_interval:
+                self._fetch()
+            return self._certs
+
+    def clear(self):
+        with self._lock:
+            self._certs = None
+            self._expires_at = 0.0
+            self._fetched_at = None
+
+
+cert_cache = CertificateCache()
+
+
+def _allowed_audiences():
+    # Prepare allowed audiences: prefer explicit allowed list from settings
+    if getattr(settings, "GOOGLE_ALLOWED_CLIENT_IDS", None):
+        return list(settings.GOOGLE_ALLOWED_CLIENT_IDS)
+    raw_aud = getattr(settings, "GOOGLE_CLIENT_ID", "") or ""
+    return [a.strip() for a in raw_aud.split(",") if a.strip()]
+
+
+def _decode(token):
+    try:
+        return jwt.decode(token, certs=cert_cache.get(), audience=None)
+    except ValueError as err:
+        if "Certificate for key id" not in str(err):
+            raise
+        # Google may have rotated its keys before our cached copy expired;
+        # if the certs are too fresh to refetch, this fails the same way
+        return jwt.decode(token, certs=cert_cache.refresh(), audience=None)
 
 
 def verify_google_id_token(token: str):
@@ -12,26 +126,60 @@ def verify_google_id_token(token: str):
     if not token:
         raise ValueError("No token provided")
 
-    # Prepare allowed audiences: prefer explicit allowed list from settings
-    audiences = []
-    if hasattr(settings, 'GOOGLE_ALLOWED_CLIENT_IDS') and settings.GOOGLE_ALLOWED_CLIENT_IDS:
-        audiences = list(settings.GOOGLE_ALLOWED_CLIENT_IDS)
-    else:
-        raw_aud = settings.GOOGLE_CLIENT_ID or ""
-        audiences = [a.strip() for a in raw_aud.split(",") if a.strip()]
-
-    request = google_requests.Request()
+    audiences = _allowed_audiences()
+    # Signature and expiry are checked once; audience and issuer are checked
+    # on the decoded payload so a mismatch can be reported without decoding again
     try:
-        # If we have multiple audiences, pass the list; otherwise pass the single value
-        aud_param = audiences if len(audiences) > 1 else (audiences[0] if audiences else None)
-        payload = id_token.verify_oauth2_token(token, request, aud_param)
-        return payload
-    except ValueError as err:
-        # Try to decode without audience to expose token audience for better diagnostics
-        try:
-            payload = id_token.verify_oauth2_token(token, request, None)
-            token_aud = payload.get("aud")
-            raise ValueError(f"Invalid Google token details: Token has wrong audience: {token_aud!r}, expected one of {audiences!r}")
-        except Exception:
-            # Re-raise the original error if we couldn't decode
-            raise ValueError(f"Invalid Google token: {err}")
+        payload = _decode(token)
+    except (ValueError, requests.RequestException) as err:
+        raise ValueError(f"Invalid Google token: {err}")
+
+    if payload.get("iss") not in GOOGLE_ISSUERS:
+        raise ValueError(f"Invalid Google token: wrong issuer {payload.get('iss')!r}")
+    token_aud = payload.get("aud")
+    if audiences and token_aud not in audiences:
+        raise ValueError(f"Invalid Google token details: Token has wrong audience: {token_aud!r}, expected one of {audiences!r}")
+    return payload
+
+
+# ---------------------------------------------------------------------------
+# Avatar import
+# ---------------------------------------------------------------------------
+
+def _get_avatar_executor():
+    global _avatar_executor
+    if _avatar_executor is None:
+        _avatar_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="google-avatar")
+    return _avatar_executor
+
+
+def download_google_avatar(user_id, picture, google_sub):
+    """Fetch the Google profile picture and store it if the user still has no avatar"""
+    from django.core.files.base import ContentFile
+    from users.models import User
+
+    close_old_connections()
+    try:
+        resp = get_session().get(picture, timeout=5)
+        if resp.status_code != 200 or not resp.content:
+            return
+        user = User.objects.filter(pk=user_id).first()
+        if user is None or user.avatar:
+            return
+        # Determine a safe extension (fallback to jpg)
+        ext = picture.split('?')[0].split('.')[-1].lower()
+        if len(ext) > 4 or '/' in ext or ext == '':
+            ext = 'jpg'
+        user.avatar.save(f'google_{google_sub}.{ext}', ContentFile(resp.content), save=True)
+        logger.info("Saved Google avatar for user %s", user.email)
+    except Exception as e:
+        logger.warning("Failed to download Google avatar for user %s: %s", user_id, e)
+    finally:
+        close_old_connections()
+
+
+def schedule_avatar_download(user_id, picture, google_sub):
+    """Download the avatar in the background once the login has committed"""
+    transaction.on_commit(
+        lambda: _get_avatar_executor().submit(download_google_avatar, user_id, picture, google_sub)
+    )
@@ -8,11 +8,13 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.db import transaction
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
 import secrets
 from django.core.mail import send_mail
 from django.conf import settings
 import textwrap
+from pawjeevan_backend import metrics
+from pawjeevan_backend.conditional import ConditionalGetMixin
 
 from .models import (
     User,
@@ -29,6 +31,9 @@ from .serializers import (
     VaccinationRecordSerializer, MedicalRecordSerializer, NotificationSerializer,
     OTPRequestSerializer, OTPVerifySerializer
 )
+from .notifications import adjust_unread_count, get_unread_count, invalidate_unread_count
+from .pagination import FollowListPagination
+from .throttling import EmailRateThrottle, IPRateThrottle
 import logging
 
 logger = logging.getLogger(__name__)
@@ -37,6 +42,8 @@ logger = logging.getLogger(__name__)
 class UserRegistrationView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = [AllowAny]
+    throttle_classes = [IPRateThrottle, EmailRateThrottle]
+    throttle_scope = "register"
     serializer_class = UserRegistrationSerializer
 
     def create(self, request, *args, **kwargs):
@@ -120,11 +127,14 @@ def send_otp_email(email, code):
     # Use a dedicated OTP sender (friendly display name) if configured, otherwise fall back
     # to the global DEFAULT_FROM_EMAIL.
     from_email = getattr(settings, 'OTP_FROM_EMAIL', getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@pawjeevan.local'))
-    send_mail(subject, message, from_email, [email], fail_silently=False, html_message=html_message)
+    with metrics.timed('email_send_duration_seconds', kind='otp'):
+        send_mail(subject, message, from_email, [email], fail_silently=False, html_message=html_message)
 
 
 class UserLoginView(generics.GenericAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPRateThrottle, EmailRateThrottle]
+    throttle_scope = "login"
     parser_classes = [JSONParser]
 
     def post(self, request):
@@ -151,7 +161,6 @@ class SocialLoginView(generics.GenericAPIView):
     permission_classes = [AllowAny]
     parser_classes = [JSONParser]
 
-    @transaction.atomic
     def post(self, request):
         provider = request.data.get("provider")
         if provider != "google":
@@ -161,7 +170,7 @@ class SocialLoginView(generics.GenericAPIView):
         if not id_token_str:
             return Response({"error": "Missing id_token"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Verify token
+        # Verify token (outside any transaction: it may need to fetch certs)
         try:
             from .utils.social import verify_google_id_token
             payload = verify_google_id_token(id_token_str)
@@ -177,36 +186,20 @@ class SocialLoginView(generics.GenericAPIView):
         if not email:
             return Response({"error": "Google token did not contain email"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Find or create user
-        user, created = User.objects.get_or_create(email=email, defaults={
-            "username": email.split("@")[0],
-            "first_name": full_name.split(" ")[0] if full_name else "",
-            "last_name": " ".join(full_name.split(" ")[1:]) if full_name and len(full_name.split(" ")) > 1 else "",
-        })
+        with transaction.atomic():
+            # Find or create user
+            user, created = User.objects.get_or_create(email=email, defaults={
+                "username": email.split("@")[0],
+                "first_name": full_name.split(" ")[0] if full_name else "",
+                "last_name": " ".join(full_name.split(" ")[1:]) if full_name and len(full_name.split(" ")) > 1 else "",
+            })
 
-        # Optionally update profile picture or other fields. Download and save
-        # the Google profile image when:
-        #  - the user was just created, or
-        #  - the user exists but has no avatar yet.
-        if picture and hasattr(user, "avatar") and (created or not bool(user.avatar)):
-            try:
-                import requests
-                from django.core.files.base import ContentFile
-
-                resp = requests.get(picture, timeout=5)
-                if resp.status_code == 200 and resp.content:
-                    # Determine a safe extension (fallback to jpg)
-                    ext = picture.split('?')[0].split('.')[-1].lower()
-                    if len(ext) > 4 or '/' in ext or ext == '':
-                        ext = 'jpg'
-                    filename = f'google_{google_sub}.{ext}'
-                    try:
-                        user.avatar.save(filename, ContentFile(resp.content), save=True)
-                        logger.info("Saved Google avatar for user %s", user.email)
-                    except Exception as e:
-                        logger.warning("Failed to save avatar for user %s: %s", user.email, e)
-            except Exception as e:
-                logger.warning("Failed to download Google avatar for %s: %s", user.email, e)
+            # Import the Google profile image when the user was just created
+            # or has no avatar yet. The download runs in the background after
+            # commit, so the client picks it up on its next profile fetch.
+            if picture and (created or not bool(user.avatar)):
+                from .utils.social import schedule_avatar_download
+                schedule_avatar_download(user.id, picture, google_sub)
 
         # Issue tokens using SimpleJWT
         refresh = RefreshToken.for_user(user)
@@ -290,6 +283,12 @@ class UserViewSet(viewsets.ModelViewSet):
         request.user.following.remove(to_unfollow)
         return Response({"status": "unfollowed"})
 
+    def _follow_list(self, request, queryset, count):
+        paginator = FollowListPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = UserSerializer(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data, count=count)
+
     @action(detail=True, methods=["get"])
     def followers(self, request, pk=None):
         user = self.get_object()
@@ -301,13 +300,7 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        followers = user.followers.all()
-        page = self.paginate_queryset(followers)
-        if page is not None:
-            serializer = UserSerializer(page, many=True, context={"request": request})
-            return self.get_paginated_response(serializer.data)
-        serializer = UserSerializer(followers, many=True, context={"request": request})
-        return Response(serializer.data)
+        return self._follow_list(request, user.followers.all(), user.followers_count)
 
     @action(detail=True, methods=["get"])
     def following(self, request, pk=None):
@@ -320,20 +313,19 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        following = user.following.all()
-        page = self.paginate_queryset(following)
-        if page is not None:
-            serializer = UserSerializer(page, many=True, context={"request": request})
-            return self.get_paginated_response(serializer.data)
-        serializer = UserSerializer(following, many=True, context={"request": request})
-        return Response(serializer.data)
+        return self._follow_list(request, user.following.all(), user.following_count)
 
 
-class PetProfileViewSet(viewsets.ModelViewSet):
+class PetProfileViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = PetProfile.objects.all()
     serializer_class = PetProfileSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
+    conditional_related = ("owner",)
+
+    def get_conditional_extra(self):
+        # "age" goes up on birthdays without the row changing
+        return (date.today(),)
 
     def get_queryset(self):
         # Always filter by owner, even for staff users in the API
@@ -491,20 +483,63 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def mark_read(self, request, pk=None):
         """Mark a notification as read"""
         notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        # Conditional update so the cached counter only moves on a real change
+        if Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True):
+            adjust_unread_count(request.user.id, -1)
         return Response({'status': 'notification marked as read'})
 
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Mark all notifications as read"""
-        self.get_queryset().update(is_read=True)
-        return Response({'status': 'all notifications marked as read'})
+        updated = self.get_queryset().filter(is_read=False).update(is_read=True)
+        # Not set to 0: a notification created meanwhile would go uncounted
+        invalidate_unread_count(request.user.id)
+        return Response({'status': 'all notifications marked as read', 'updated': updated})
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Cheap badge count (served from cache)"""
+        return Response({'unread_count': get_unread_count(request.user.id)})
+
+    @action(detail=False, methods=['get'])
+    def delta(self, request):
+        """
+        Notifications created after a cursor, oldest first.
+        GET /api/users/notifications/delta/?since=<cursor>&limit=<n>
+        Pass the returned `cursor` as `since` on the next poll; omit `since`
+        on the first call to start from the current newest notification.
+        """
+        since = request.query_params.get('since')
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 100)
+            since = int(since) if since not in (None, '') else None
+        except ValueError:
+            return Response({'error': 'since and limit must be integers'}, status=400)
+
+        qs = self.get_queryset()
+        if since is None:
+            # Initial sync: nothing is "new" yet, just hand out the cursor
+            latest = qs.order_by('-id').values_list('id', flat=True).first()
+            items, has_more, cursor = [], False, latest or 0
+        else:
+            items = list(qs.filter(id__gt=since).order_by('id')[:limit + 1])
+            has_more = len(items) > limit
+            items = items[:limit]
+            cursor = items[-1].id if items else since
+
+        return Response({
+            'results': self.get_serializer(items, many=True).data,
+            'cursor': cursor,
+            'has_more': has_more,
+            'unread_count': get_unread_count(request.user.id),
+        })
 
 
 class SendOTPView(generics.GenericAPIView):
     """Request or resend an OTP to a user's email."""
     permission_classes = [AllowAny]
+    throttle_classes = [IPRateThrottle, EmailRateThrottle]
+    throttle_scope = "otp_send"
     serializer_class = OTPRequestSerializer
 
     def post(self, request):
@@ -561,6 +596,8 @@ class SendOTPView(generics.GenericAPIView):
 class VerifyOTPView(generics.GenericAPIView):
     """Verify an OTP and activate the user's account."""
     permission_classes = [AllowAny]
+    throttle_classes = [IPRateThrottle, EmailRateThrottle]
+    throttle_scope = "otp_verify"
     serializer_class = OTPVerifySerializer
 
     def post(self, request):
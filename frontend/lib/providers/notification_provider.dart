@@ -26,6 +26,8 @@ class NotificationProvider extends ChangeNotifier {
       // Ensure notifications are shown newest-first based on device-local times
       _notifications.sort((a, b) => b.createdAt.compareTo(a.createdAt));
       _updateUnreadCount();
+      // The list is paginated, so ask the server for the real total
+      _unreadCount = await _service.getUnreadCount();
     } catch (e) {
       _error = e.toString();
     } finally {
@@ -39,6 +41,7 @@ class NotificationProvider extends ChangeNotifier {
       await _service.markAsRead(notificationId);
       final index = _notifications.indexWhere((n) => n.id == notificationId);
       if (index != -1) {
+        final wasUnread = !_notifications[index].isRead;
         _notifications[index] = NotificationModel(
           id: _notifications[index].id,
           type: _notifications[index].type,
@@ -47,7 +50,7 @@ class NotificationProvider extends ChangeNotifier {
           createdAt: _notifications[index].createdAt,
           isRead: true,
         );
-        _updateUnreadCount();
+        if (wasUnread && _unreadCount > 0) _unreadCount--;
         notifyListeners();
       }
     } catch (e) {
@@ -55,6 +58,16 @@ class NotificationProvider extends ChangeNotifier {
     }
   }
 
+  /// Refresh only the badge count without reloading the list.
+  Future<void> refreshUnreadCount() async {
+    try {
+      _unreadCount = await _service.getUnreadCount();
+      notifyListeners();
+    } catch (e) {
+      debugPrint('Error loading unread count: $e');
+    }
+  }
+
   void _updateUnreadCount() {
     _unreadCount = _notifications.where((n) => !n.isRead).length;
   }
@@ -62,8 +75,11 @@ class NotificationProvider extends ChangeNotifier {
   Future<void> deleteNotification(int notificationId) async {
     try {
       await _service.deleteNotification(notificationId);
-      _notifications.removeWhere((n) => n.id == notificationId);
-      _updateUnreadCount();
+      final index = _notifications.indexWhere((n) => n.id == notificationId);
+      if (index != -1) {
+        if (!_notifications[index].isRead && _unreadCount > 0) _unreadCount--;
+        _notifications.removeAt(index);
+      }
       notifyListeners();
     } catch (e) {
       debugPrint('Error deleting notification: $e');
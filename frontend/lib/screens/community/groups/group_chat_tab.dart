@@ -28,10 +28,16 @@ class _GroupChatTabState extends State<GroupChatTab> {
   List<GroupMessage> _messages = [];
   bool _isLoadingMessages = true;
   Timer? _refreshTimer;
+  // Keyset cursors of the newest and oldest messages loaded (see GroupViewSet.messages)
+  String? _afterCursor;
+  String? _beforeCursor;
+  bool _hasOlderMessages = false;
+  bool _isLoadingOlder = false;
 
   @override
   void initState() {
     super.initState();
+    _scrollController.addListener(_onScroll);
     _fetchMessages();
     // Auto-refresh messages every 3 seconds
     _refreshTimer = Timer.periodic(const Duration(seconds: 3), (timer) {
@@ -47,29 +53,49 @@ class _GroupChatTabState extends State<GroupChatTab> {
     super.dispose();
   }
 
-  Future<void> _fetchMessages({bool silent = false}) async {
+  void _onScroll() {
+    // Near the top: load the page of history before the oldest message shown
+    if (_scrollController.position.pixels <= _scrollController.position.minScrollExtent + 100) {
+      _fetchOlderMessages();
+    }
+  }
+
+  Future<void> _fetchMessages({bool silent = false, bool reload = false}) async {
     try {
       final dio = Dio();
       final prefs = await SharedPreferences.getInstance();
       final token = prefs.getString('token');
 
+      // After the first page, only ask for messages newer than the last one we have
+      final incremental = !reload && _afterCursor != null;
       final response = await dio.get(
         '${ApiConstants.baseUrl}${ApiConstants.groups}${widget.group.slug}/messages/',
+        queryParameters: incremental ? {'after': _afterCursor} : null,
         options: Options(
           headers: {'Authorization': 'Bearer $token'},
         ),
       );
 
-      final newMessages = (response.data as List)
+      final data = response.data;
+      final List rawMessages = data is Map ? (data['results'] as List? ?? []) : data as List;
+      final newMessages = rawMessages
           .map((json) => GroupMessage.fromJson(json))
           .toList();
+      if (data is Map && data['after'] != null) {
+        _afterCursor = data['after'] as String;
+      }
+      if (!incremental) {
+        // A fresh newest page: history is loaded again from its start
+        _beforeCursor = data is Map ? data['before'] as String? : null;
+        _hasOlderMessages = data is Map && data['has_more'] == true;
+      }
 
       if (mounted) {
-        if (!silent || _messages.length != newMessages.length) {
+        if (!silent || newMessages.isNotEmpty) {
           setState(() {
             final wasAtBottom = _scrollController.hasClients &&
                 _scrollController.position.pixels >= _scrollController.position.maxScrollExtent - 100;
-            _messages = newMessages;
+            _messages = incremental ? [..._messages, ...newMessages] : newMessages;
             _isLoadingMessages = false;
             
             if (wasAtBottom || !silent) {
@@ -80,7 +106,7 @@ class _GroupChatTabState extends State<GroupChatTab> {
       }
     } catch (e) {
       print('Error fetching messages: $e');
-      if (!silent) {
+      if (!silent && mounted) {
         setState(() {
           _isLoadingMessages = false;
         });
@@ -88,6 +114,57 @@ class _GroupChatTabState extends State<GroupChatTab> {
     }
   }
 
+  Future<void> _fetchOlderMessages() async {
+    if (_isLoadingOlder || !_hasOlderMessages || _beforeCursor == null) return;
+    setState(() {
+      _isLoadingOlder = true;
+    });
+
+    try {
+      final dio = Dio();
+      final prefs = await SharedPreferences.getInstance();
+      final token = prefs.getString('token');
+
+      final response = await dio.get(
+        '${ApiConstants.baseUrl}${ApiConstants.groups}${widget.group.slug}/messages/',
+        queryParameters: {'before': _beforeCursor},
+        options: Options(
+          headers: {'Authorization': 'Bearer $token'},
+        ),
+      );
+
+      final data = response.data as Map;
+      final olderMessages = (data['results'] as List? ?? [])
+          .map((json) => GroupMessage.fromJson(json))
+          .toList();
+
+      if (mounted) {
+        // Keep the messages on screen where they are as the list grows above them
+        final distanceFromBottom = _scrollController.hasClients
+            ? _scrollController.position.maxScrollExtent - _scrollController.position.pixels
+            : 0.0;
+        setState(() {
+          _messages = [...olderMessages, ..._messages];
+          _beforeCursor = data['before'] as String? ?? _beforeCursor;
+          _hasOlderMessages = data['has_more'] == true;
+          _isLoadingOlder = false;
+        });
+        WidgetsBinding.instance.addPostFrameCallback((_) {
+          if (_scrollController.hasClients) {
+            _scrollController.jumpTo(_scrollController.position.maxScrollExtent - distanceFromBottom);
+          }
+        });
+      }
+    } catch (e) {
+      print('Error fetching older messages: $e');
+      if (mounted) {
+        setState(() {
+          _isLoadingOlder = false;
+        });
+      }
+    }
+  }
+
   Future<void> _sendMessage() async {
     if (_messageController.text.trim().isEmpty) return;
 
@@ -147,13 +224,28 @@ class _GroupChatTabState extends State<GroupChatTab> {
                       ),
                     )
                   : RefreshIndicator(
-                      onRefresh: () => _fetchMessages(),
+                      onRefresh: () => _fetchMessages(reload: true),
                       child: ListView.builder(
                         key: const PageStorageKey<String>('chat_messages'),
                         controller: _scrollController,
                         padding: const EdgeInsets.all(16),
-                        itemCount: _messages.length,
+                        itemCount: _messages.length + (_isLoadingOlder ? 1 : 0),
                         itemBuilder: (context, index) {
+                          if (_isLoadingOlder) {
+                            if (index == 0) {
+                              return const Padding(
+                                padding: EdgeInsets.only(bottom: 8),
+                                child: Center(
+                                  child: SizedBox(
+                                    width: 20,
+                                    height: 20,
+                                    child: CircularProgressIndicator(strokeWidth: 2),
+                                  ),
+                                ),
+                              );
+                            }
+                            index -= 1;
+                          }
                           final message = _messages[index];
                           final isMe = message.senderId == widget.currentUserId;
                           final showAvatar = index == _messages.length - 1 ||
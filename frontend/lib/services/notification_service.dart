@@ -25,6 +25,16 @@ class NotificationService {
     return [];
   }
 
+  /// Server-side unread count (cached on the backend, cheap to poll).
+  Future<int> getUnreadCount() async {
+    final response = await _api.get('${ApiConstants.notifications}unread_count/');
+    if (response.statusCode == 200 && response.data is Map) {
+      final count = response.data['unread_count'];
+      if (count is int) return count;
+    }
+    return 0;
+  }
+
   Future<void> markAsRead(int notificationId) async {
     await _api.patch(
       '${ApiConstants.notifications}$notificationId/mark_read/',